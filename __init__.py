@@ -1,7 +1,23 @@
 """Top-level package for arg-toolkit."""
 
 import os
-import importlib.util
+import ast
+import sys
+import json
+import time
+import importlib
+import threading
+
+BASE_FOLDER = os.path.dirname(__file__)
+SRC_FOLDER = os.path.join(BASE_FOLDER, "src")
+MANIFEST_PATH = os.path.join(BASE_FOLDER, "node_manifest.json")
+
+# Set ARG_TOOLKIT_PROFILE_IMPORTS=1 to eagerly import every node module at startup and print a per-module/per-dependency
+# cost report. ARG_TOOLKIT_IMPORT_BUDGET_MS additionally fails the load when the total goes over budget.
+PROFILE_ENV = "ARG_TOOLKIT_PROFILE_IMPORTS"
+BUDGET_ENV = "ARG_TOOLKIT_IMPORT_BUDGET_MS"
+# Set ARG_TOOLKIT_WARM_UP_RIVAGAN=1 to load the RivaGAN model sessions in the background while ComfyUI starts up.
+RIVAGAN_WARM_UP_ENV = "ARG_TOOLKIT_WARM_UP_RIVAGAN"
 
 # track which module defined each key
 NODE_CLASS_SOURCES = {}
@@ -9,42 +25,238 @@ NODE_DISPLAY_NAME_SOURCES = {}
 NODE_CLASS_MAPPINGS = {}
 NODE_DISPLAY_NAME_MAPPINGS = {}
 
-BASE_FOLDER = os.path.dirname(__file__)
-SRC_FOLDER = os.path.join(BASE_FOLDER, "src")
 
-for root, _, files in os.walk(SRC_FOLDER):
-    for filename in files:
-        if filename.endswith(".py") and filename != "__init__.py":
+def _literal_mapping(tree, name):
+    # Reads a module-level `NAME = {...}` dict without executing the module.
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or not isinstance(node.value, ast.Dict):
+            continue
+        if not any(isinstance(target, ast.Name) and target.id == name for target in node.targets):
+            continue
+        mapping = {}
+        for key, value in zip(node.value.keys, node.value.values):
+            mapping[ast.literal_eval(key)] = value.id if isinstance(value, ast.Name) else ast.literal_eval(value)
+        return mapping
+    return {}
+
+
+def build_manifest():
+    """Statically scans `src/` and returns node key -> {module, class, display_name}.
+
+    Nothing gets imported here, the mappings are read straight off the syntax tree of each file.
+    """
+    manifest = {}
+    sources = {}
+    for root, dirs, files in os.walk(SRC_FOLDER):
+        dirs.sort()
+        for filename in sorted(files):
+            if not filename.endswith(".py") or filename == "__init__.py":
+                continue
             module_path = os.path.join(root, filename)
 
             # module name like "src.subfolder.plugin"
             rel_path = os.path.relpath(module_path, BASE_FOLDER)
             module_name = rel_path.replace(os.sep, ".")[:-3]
 
-            spec = importlib.util.spec_from_file_location(module_name, module_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-
-            if getattr(module, "NODE_CLASS_MAPPINGS", None):
-                for key, value in module.NODE_CLASS_MAPPINGS.items():
-                    if key in NODE_CLASS_MAPPINGS:
-                        print(
-                            f"[ComfyUI-ARG-Toolkit] [Duplicate NODE_CLASS_MAPPINGS] '{key}' "
-                            f"overwritten by {module_name} (was {NODE_CLASS_SOURCES[key]})"
-                        )
-                    NODE_CLASS_MAPPINGS[key] = value
-                    NODE_CLASS_SOURCES[key] = module_name
-
-            if getattr(module, "NODE_DISPLAY_NAME_MAPPINGS", None):
-                for key, value in module.NODE_DISPLAY_NAME_MAPPINGS.items():
-                    if key in NODE_DISPLAY_NAME_MAPPINGS:
-                        print(
-                            f"[ComfyUI-ARG-Toolkit] [Duplicate NODE_DISPLAY_NAME_MAPPINGS] '{key}' "
-                            f"overwritten by {module_name} (was {NODE_DISPLAY_NAME_SOURCES[key]})"
-                        )
-                    NODE_DISPLAY_NAME_MAPPINGS[key] = value
-                    NODE_DISPLAY_NAME_SOURCES[key] = module_name
+            with open(module_path, encoding="utf-8") as f:
+                tree = ast.parse(f.read(), filename=module_path)
+            class_mappings = _literal_mapping(tree, "NODE_CLASS_MAPPINGS")
+            display_mappings = _literal_mapping(tree, "NODE_DISPLAY_NAME_MAPPINGS")
+
+            for key, class_name in class_mappings.items():
+                if key in manifest:
+                    print(
+                        f"[ComfyUI-ARG-Toolkit] [Duplicate NODE_CLASS_MAPPINGS] '{key}' overwritten by {module_name} (was {sources[key]})"
+                    )
+                manifest[key] = {
+                    "module": module_name,
+                    "class": class_name,
+                    "display_name": display_mappings.get(key),
+                }
+                sources[key] = module_name
+    return manifest
+
+
+def write_manifest(path=MANIFEST_PATH):
+    manifest = build_manifest()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    return manifest
+
+
+def load_manifest(path=MANIFEST_PATH):
+    # Fall back to a live scan for checkouts where the manifest was not regenerated.
+    if not os.path.exists(path):
+        return build_manifest()
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+_import_lock = threading.Lock()
+
+
+def _import_node_module(module_name):
+    with _import_lock:
+        return importlib.import_module(f".{module_name}", __name__)
+
+
+class _LazyNode(type):
+    """Stand-in for a node class. The backing module is only imported the first time the class is touched
+    (attribute lookup, instantiation, isinstance), after which everything is forwarded to the real class.
+    """
+
+    def _resolve(cls):
+        target = cls.__dict__.get("_node_target")
+        if target is None:
+            module = _import_node_module(cls._node_module)
+            target = getattr(module, cls._node_class)
+            type.__setattr__(cls, "_node_target", target)
+        return target
+
+    def __getattr__(cls, name):
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return getattr(cls._resolve(), name)
+
+    def __call__(cls, *args, **kwargs):
+        return cls._resolve()(*args, **kwargs)
+
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, cls._resolve())
+
+    def __repr__(cls):
+        return f"<lazy node '{cls._node_module}.{cls._node_class}'>"
+
+
+def _lazy_node(module_name, class_name):
+    return _LazyNode(class_name, (), {"_node_module": module_name, "_node_class": class_name, "_node_target": None})
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows, memory deltas are reported as 0
+        return 0
+    # Not the current RSS but the peak, which is still good enough to see who grew it. Kilobytes on Linux, bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _third_party_imports(module_name):
+    module_path = os.path.join(BASE_FOLDER, *module_name.split(".")) + ".py"
+    with open(module_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=module_path)
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            candidates = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            candidates = [node.module]
+        else:
+            continue
+        for candidate in candidates:
+            top_level = candidate.split(".")[0]
+            if top_level not in sys.stdlib_module_names and top_level not in names:
+                names.append(top_level)
+    return names
+
+
+def _timed_import(kind, name, importer, import_func):
+    start_rss = _rss_bytes()
+    start = time.perf_counter()
+    error = None
+    try:
+        import_func()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "kind": kind,
+        "name": name,
+        "importer": importer,
+        "seconds": time.perf_counter() - start,
+        "memory_bytes": _rss_bytes() - start_rss,
+        "error": error,
+    }
+
+
+def profile_imports(manifest=None):
+    """Imports every node module in the manifest and returns one record per module and per third-party dependency.
+
+    Dependencies are imported on their own right before the first module that uses them, so their cost (including whatever they
+    pull in transitively) is not folded into that module's own time. Anything already in `sys.modules` is free and skipped.
+    """
+    manifest = load_manifest() if manifest is None else manifest
+    records = []
+    for module_name in dict.fromkeys(entry["module"] for entry in manifest.values()):
+        if f"{__name__}.{module_name}" in sys.modules:
+            continue
+        for dependency in _third_party_imports(module_name):
+            if dependency not in sys.modules:
+                records.append(
+                    _timed_import("dependency", dependency, module_name, lambda dependency=dependency: importlib.import_module(dependency))
+                )
+        records.append(_timed_import("module", module_name, None, lambda module_name=module_name: _import_node_module(module_name)))
+    return records
+
+
+def import_report(records):
+    total_seconds = sum(record["seconds"] for record in records)
+    total_memory = sum(record["memory_bytes"] for record in records)
+    lines = [f"[ComfyUI-ARG-Toolkit] Import profile: {total_seconds * 1000:.1f} ms, {total_memory / 2**20:+.1f} MiB"]
+    for record in sorted(records, key=lambda record: record["seconds"], reverse=True):
+        line = f"  {record['seconds'] * 1000:9.1f} ms  {record['memory_bytes'] / 2**20:+8.1f} MiB  {record['kind']:<10}  {record['name']}"
+        if record["importer"]:
+            line += f" (via {record['importer']})"
+        if record["error"]:
+            line += f" FAILED: {record['error']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def check_import_budget(records, budget_ms):
+    total_ms = sum(record["seconds"] for record in records) * 1000
+    if total_ms > budget_ms:
+        slowest = max(records, key=lambda record: record["seconds"])
+        raise RuntimeError(
+            f"[ComfyUI-ARG-Toolkit] Startup import budget exceeded: {total_ms:.1f} ms > {budget_ms:.1f} ms "
+            f"(slowest: {slowest['kind']} {slowest['name']}, {slowest['seconds'] * 1000:.1f} ms)"
+        )
+
+
+def _warm_up_rivagan():
+    try:
+        _import_node_module("src.watermark_engine").warm_up_rivagan()
+    except Exception as e:
+        print(f"[ComfyUI-ARG-Toolkit] RivaGAN warm-up failed: {type(e).__name__}: {e}")
+
+
+_manifest = load_manifest()
+for key, entry in _manifest.items():
+    NODE_CLASS_MAPPINGS[key] = _lazy_node(entry["module"], entry["class"])
+    NODE_CLASS_SOURCES[key] = entry["module"]
+    if entry.get("display_name") is not None:
+        NODE_DISPLAY_NAME_MAPPINGS[key] = entry["display_name"]
+        NODE_DISPLAY_NAME_SOURCES[key] = entry["module"]
+
+if os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes"):
+    _import_records = profile_imports(_manifest)
+    print(import_report(_import_records))
+    if os.environ.get(BUDGET_ENV, "").strip():
+        check_import_budget(_import_records, float(os.environ[BUDGET_ENV]))
+
+if os.environ.get(RIVAGAN_WARM_UP_ENV, "").strip().lower() in ("1", "true", "yes"):
+    threading.Thread(target=_warm_up_rivagan, name="arg-toolkit-rivagan-warm-up", daemon=True).start()
 
 __author__ = """AzelusLightvale"""
 __all__ = ["NODE_CLASS_MAPPINGS", "NODE_DISPLAY_NAME_MAPPINGS", "WEB_DIRECTORY"]
 WEB_DIRECTORY = "./web"
+
+if __name__ == "__main__":
+    # Regenerate the manifest after adding or renaming nodes: `python __init__.py`
+    print(f"[ComfyUI-ARG-Toolkit] Wrote {len(write_manifest())} nodes to {MANIFEST_PATH}")
@@ -0,0 +1,234 @@
+import functools
+import math
+from itertools import chain
+
+import numpy as np
+from secretpy import alphabets as al
+
+# Compiled tables for the substitution-family ciphers, so a whole text goes through one C-level pass instead of secretpy's
+# per-character Python loops. Output is identical to secretpy:
+# - Monoalphabetic ciphers build the exact substitution dict secretpy builds (same comprehension, so duplicate letters resolve
+#   the same way) and apply it with `str.translate`.
+# - Periodic ciphers map the text to alphabet indexes through a code point lookup array, shift them with numpy using the key
+#   cycled over the text, and map the results back to the first letter of each alphabet entry.
+# Tables are compiled once per (cipher, alphabet, key, direction). Anything secretpy would raise on (characters missing from
+# the alphabet, bad keys, no alphabet at all) makes `crypt` return None, and the caller runs secretpy itself for the error.
+# For more information, check https://github.com/tigertv/secretpy/tree/master/secretpy/ciphers
+
+MAX_COMPILED = 256
+MAX_FUSED_PERIOD = 4096  # longest period a fused periodic table may reach
+
+
+def _caesar_subst(alphabet, key):
+    key %= len(alphabet)
+    shifted = chain(range(key, len(alphabet)), range(key))
+    return {c: alphabet[i][0] for i, letters in zip(shifted, alphabet) for c in letters}
+
+
+def _rot13_subst(alphabet):
+    key = len(alphabet) >> 1
+    if len(alphabet) & 1:
+        alphabet += alphabet[key]
+        key += 1
+    return _caesar_subst(alphabet, key)
+
+
+def _keyword_subst(alphabet, key, encrypt):
+    indexes = {c: i for i, letters in enumerate(alphabet) for c in letters}
+    key_indexes = dict.fromkeys(indexes[char] for char in key)
+    new_key = [alphabet[i] for i in key_indexes] + [a[0] for i, a in enumerate(alphabet) if i not in key_indexes]
+    if encrypt:
+        return {c: new_key[i] for c, i in indexes.items()}
+    return {c: alphabet[i][0] for i, letters in enumerate(new_key) for c in letters}
+
+
+def _affine_subst(alphabet, key, encrypt):
+    a, b = int(key[0]), int(key[1])
+    n = len(alphabet)
+    if encrypt:
+        return {c: alphabet[(i * a + b) % n][0] for i, letters in enumerate(alphabet) for c in letters}
+    a = next((i for i in range(1, n) if (a * i) % n == 1), 1)
+    return {c: alphabet[(a * (i - b)) % n][0] for i, letters in enumerate(alphabet) for c in letters}
+
+
+def _simple_subst(alphabet, key, encrypt):
+    if len(alphabet) != len(key):
+        raise ValueError("Lengths of alphabet and key should be the same")
+    if encrypt:
+        return {a: k[0] for k, letters in zip(key, alphabet) for a in letters}
+    return {k[0]: a[0] for k, a in zip(key, alphabet)}
+
+
+def _rot18_alphabet():
+    half = len(al.ENGLISH) >> 1
+    return al.ENGLISH[:half] + al.DECIMAL[:5] + al.ENGLISH[half:] + al.DECIMAL[5:]
+
+
+ROT47_ALPHABET = "".join(chr(code) for code in range(33, 33 + 47 * 2))
+
+
+def _substitution(name, alphabet, key, encrypt):
+    if name == "Caesar":
+        return _caesar_subst(alphabet, key if encrypt else -key)
+    if name == "Atbash":
+        return {c: alphabet[len(alphabet) - i - 1][0] for i, letters in enumerate(alphabet) for c in letters}
+    if name == "Affine":
+        return _affine_subst(alphabet, key, encrypt)
+    if name == "Keyword":
+        return _keyword_subst(alphabet, key, encrypt)
+    if name == "SimpleSubstitution":
+        return _simple_subst(alphabet, key, encrypt)
+    # The Rot ciphers are their own inverse
+    if name == "Rot5":
+        return _caesar_subst(al.DECIMAL, 5)
+    if name == "Rot13":
+        return _rot13_subst(alphabet)
+    if name == "Rot18":
+        return _rot13_subst(_rot18_alphabet())
+    if name == "Rot47":
+        return _caesar_subst(ROT47_ALPHABET, 47)
+    raise KeyError(name)
+
+
+def _code_points(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+
+
+class CipherTable:
+    """A compiled substitution: `rows[j]` maps every letter to its output at key position j (mod the period).
+
+    One row is a monoalphabetic cipher, applied with `str.translate`. More rows are a periodic one: the text becomes alphabet
+    indexes through a code point lookup array, and each letter is gathered from a flat [period, letters] table of output
+    code points. No rows at all is a periodic cipher with an empty key, which secretpy turns into an empty string.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._gather = None
+
+    @property
+    def period(self):
+        return len(self.rows)
+
+    def _gather_tables(self):
+        if self._gather is None:
+            letters = list(self.rows[0])
+            # Code point -> letter index, the last slot (-1) catches every code point past the largest letter
+            lookup = np.full(max(map(ord, letters)) + 2, -1, dtype=np.int32)
+            lookup[[ord(c) for c in letters]] = np.arange(len(letters), dtype=np.int32)
+            table = np.array([ord(row[c]) for row in self.rows for c in letters], dtype="<u4")
+            row_starts = np.arange(self.period, dtype=np.int32) * len(letters)
+            self._gather = lookup, table, row_starts
+        return self._gather
+
+    def apply(self, text):
+        """Runs the cipher over `text`, or returns None if `text` has a character the table has no letter for."""
+        if not self.rows:
+            return ""
+        if self.period == 1:
+            if self._gather is None:
+                # Translating with the first table deletes every known letter, anything left over is not in the alphabet
+                self._gather = dict.fromkeys(map(ord, self.rows[0])), str.maketrans(self.rows[0])
+            known, table = self._gather
+            return None if text.translate(known) else text.translate(table)
+        lookup, table, row_starts = self._gather_tables()
+        try:
+            points = _code_points(text)
+        except UnicodeEncodeError:
+            return None
+        index = lookup[np.minimum(points, len(lookup) - 1)]
+        if (index < 0).any():
+            return None
+        # Key position of every letter, added in place through a [-1, period] view of the whole periods plus the tail
+        whole = len(index) - len(index) % self.period
+        index[:whole].reshape(-1, self.period)[...] += row_starts
+        index[whole:] += row_starts[: len(index) - whole]
+        return table[index].tobytes().decode("utf-32-le")
+
+    def then(self, other, max_period=MAX_FUSED_PERIOD):
+        """The single table doing `self` then `other`, or None when the two cannot be composed.
+
+        Composing needs every output of `self` to be one letter `other` knows (so `other` could never fail on it and letters
+        keep their positions), and the combined period (the lcm of both) to stay under `max_period`.
+        """
+        if not self.rows or not other.rows:
+            return None
+        known = other.rows[0]
+        if any(len(output) != 1 or output not in known for row in self.rows for output in row.values()):
+            return None
+        period = math.lcm(self.period, other.period)
+        if period > max_period:
+            return None
+        rows = [{c: other.rows[j % other.period][output] for c, output in self.rows[j % self.period].items()} for j in range(period)]
+        return CipherTable(rows)
+
+
+def _compile_substitution(name, alphabet, key, encrypt):
+    return CipherTable([_substitution(name, alphabet, key, encrypt)])
+
+
+def _compile_periodic(name, alphabet, key, encrypt):
+    n = len(alphabet)
+    indexes = {c: i for i, letters in enumerate(alphabet) for c in letters}
+    if name == "Gronsfeld":
+        shifts = [(-i if encrypt else i) % n for i in key]
+    else:
+        shifts = [indexes[c] for c in key]
+        if name == "Vigenere":
+            shifts = [(-i if encrypt else i) % n for i in shifts]
+        elif name == "Porta":
+            if n < 2:
+                raise ValueError("Porta needs at least two letters")  # secretpy divides by zero
+            shifts = [i >> 1 for i in shifts]
+    if not shifts:
+        return CipherTable([])  # secretpy zips the text with an empty key cycle
+    # result[j, i] is the alphabet index letter i becomes under key letter j
+    shifts = np.array(shifts, dtype=np.int64)[:, None]
+    letters = np.arange(n, dtype=np.int64)[None, :]
+    if name == "Beaufort":
+        result = (shifts - letters) % n
+    elif name == "Porta":
+        half = n >> 1
+        result = np.where(letters < half, (letters + shifts) % half + half, (letters - shifts) % half)
+    else:  # Vigenere and Gronsfeld both subtract the (already negated for encryption) shift
+        result = (letters - shifts) % n
+    firsts = [entry[0] for entry in alphabet]
+    return CipherTable([{c: firsts[row[i]] for c, i in indexes.items()} for row in result.tolist()])
+
+
+SUBSTITUTION_CIPHERS = ("Caesar", "Atbash", "Affine", "Keyword", "SimpleSubstitution", "Rot5", "Rot13", "Rot18", "Rot47")
+PERIODIC_CIPHERS = ("Vigenere", "Beaufort", "Gronsfeld", "Porta")
+FIXED_ALPHABET_CIPHERS = ("Rot5", "Rot18", "Rot47")  # secretpy ignores the alphabet they are given
+
+
+@functools.lru_cache(maxsize=MAX_COMPILED)
+def compile_cipher(name, alphabet, key, encrypt):
+    """Returns the `CipherTable` of the cipher with this alphabet, key and direction, or None if only secretpy can run it."""
+    if name in FIXED_ALPHABET_CIPHERS:
+        alphabet = None
+    elif not alphabet:
+        return None
+    try:
+        if name in SUBSTITUTION_CIPHERS:
+            return _compile_substitution(name, alphabet, key, encrypt)
+        if name in PERIODIC_CIPHERS:
+            return _compile_periodic(name, alphabet, key, encrypt)
+    except (KeyError, ValueError, TypeError, IndexError, ZeroDivisionError):
+        pass  # Keys and alphabets secretpy rejects (or handles in its own odd way)
+    return None
+
+
+def compiled(name, alphabet, key, encrypt):
+    """`compile_cipher` for whatever the cipher nodes hand over, None for keys that cannot be cached."""
+    if name in FIXED_ALPHABET_CIPHERS:
+        alphabet = None  # One cache entry whatever alphabet the node was given
+    try:
+        return compile_cipher(name, alphabet, key, encrypt)
+    except TypeError:  # Unhashable key
+        return None
+
+
+def crypt(name, text, alphabet, key, encrypt):
+    """The secretpy `encrypt`/`decrypt` result of cipher `name`, or None when the caller has to fall back to secretpy."""
+    cipher = compiled(name, alphabet, key, encrypt)
+    return None if cipher is None else cipher.apply(text)
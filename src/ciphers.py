@@ -1,6 +1,13 @@
 import secretpy
 from secretpy import alphabets as al
+import functools
+import inspect
 import math
+import shlex
+import textwrap
+
+from . import cipher_tables, cryptanalysis, fractionation, key_search, key_squares, ngram_model, transpositions, worker_pool
+from .formatting_mask import FormattingMask
 
 # Second version, uses secretpy instead of pycipher due to both wider coverage and being more updated than pycipher.
 
@@ -11,6 +18,10 @@ import math
 
 class BaseCipherNode:
     CATEGORY = "ARG Toolkit/Cryptography/Classical"
+    # Every input comes in as a list and the result goes out as one, so a whole list of texts is a single node run
+    # (see run_list). A single text is a list of one, which ComfyUI hands to the next node like any other single value.
+    INPUT_IS_LIST = True
+    FUNCTION = "run_list"
 
     @classmethod
     def __init__(self):
@@ -52,91 +63,139 @@ class BaseCipherNode:
                         "tooltip": "Toggle between preserving the format of the message or remove all spaces, punctuations, and convert to lowercase.",
                     },
                 ),
-            }
+            },
+            "optional": {
+                "workers": (
+                    "INT",
+                    {
+                        "default": 1,
+                        "min": 1,
+                        "max": worker_pool.MAX_WORKERS,
+                        "step": 1,
+                        "display": "number",
+                        "tooltip": "Worker processes to split a list of texts over. 1 keeps all the work in the ComfyUI process.",
+                    },
+                ),
+            },
         }
 
     @classmethod
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
-        # Auto-set FUNCTION to lowercase class name
-        cls.FUNCTION = cls.__name__.lower()
+        # Auto-set CIPHER_FUNCTION (the node's single-text function) to lowercase class name
+        cls.CIPHER_FUNCTION = cls.__name__.lower()
 
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("encrypted_txt",)
+    OUTPUT_IS_LIST = (True,)
 
     def alphabet_checker(self, alphabet, as_tuple=True):
-        if alphabet.strip():
-            alphabet_upper = alphabet.strip().upper()
-            if hasattr(al, alphabet_upper):
-                predef = getattr(al, alphabet_upper)
-            else:
-                predef = alphabet
-
-            if as_tuple:
-                return tuple(predef)
-            else:
-                return "".join(predef)
-        return None
+        # Resolved once per process and alphabet, see key_squares.py
+        return key_squares.resolve_alphabet(alphabet, as_tuple)
 
     def preprocess_text(self, text, allowed_chars=None):
-        cleaned = []
-        position_map = []  # Maps cleaned position to original position
-
-        for i, ch in enumerate(text):
-            if allowed_chars is not None:
-                if ch.lower() in allowed_chars:
-                    cleaned.append(ch.lower())
-                    position_map.append(i)
-            else:
-                if ch.isalpha():  # keep everything except whitespace
-                    cleaned.append(ch.lower())
-                    position_map.append(i)
-
-        return "".join(cleaned), position_map
-
-    def restore_formatting(self, original_text, cipher_result, position_map, mode):
-        result = list(original_text)
-        for pos in position_map:
-            result[pos] = ""  # wipe letters, leave punctuation/spaces untouched
-
-        cipher_index = 0
-        for original_pos in position_map:
-            if cipher_index >= len(cipher_result):
-                break
-            if original_text[original_pos].isupper():
-                result[original_pos] = cipher_result[cipher_index].upper()
-            else:
-                result[original_pos] = cipher_result[cipher_index].lower()
-            cipher_index += 1
-
-        if mode:  # encryption may expand, so append leftovers
-            if cipher_index < len(cipher_result):
-                last_case = result[position_map[-1]].isupper() if position_map else False
-                tail = cipher_result[cipher_index:]
-                if last_case:
-                    result.extend(c.upper() for c in tail)
-                else:
-                    result.extend(c.lower() for c in tail)
-        # decrypt case: leftovers automatically dropped
-
-        return "".join(result)
+        # Returns the cleaned text and the FormattingMask to restore its formatting with
+        mask = FormattingMask(text, allowed_chars)
+        return mask.cleaned, mask
+
+    def restore_formatting(self, mask, cipher_result, mode):
+        return mask.restore(cipher_result, mode)
 
     def execute_cipher(self, text, alphabet, key, mode, keep_formatting, allowed_chars=None, **kwargs):
         cipher_name = self.__class__.__name__
-        cipher_class = getattr(secretpy, cipher_name)
-        cipher_instance = cipher_class()
         key = key.lower() if isinstance(key, str) else key
-        cleaned_text, position_map = self.preprocess_text(text, allowed_chars)
-        if mode:
-            result = cipher_instance.encrypt(cleaned_text, key, alphabet, **kwargs)
-        else:
-            result = cipher_instance.decrypt(cleaned_text, key, alphabet, **kwargs)
-        if keep_formatting and position_map:
-            formatted_result = self.restore_formatting(text, result, position_map, mode)
+        cleaned_text, mask = self.preprocess_text(text, allowed_chars)
+        result = run_cipher(cipher_name, cleaned_text, alphabet, key, mode, **kwargs)
+        if keep_formatting and mask:
+            formatted_result = self.restore_formatting(mask, result, mode)
             return (formatted_result,)
         else:
             return (result,)
 
+    def cipher_arguments(self, **inputs):
+        # Runs the node's own input handling (alphabet lookup, key conversion, checks) and returns what it would hand
+        # execute_cipher, without running the cipher. Used by CipherPipeline.
+        recorded = {}
+
+        def record(text, alphabet, key, mode, keep_formatting, allowed_chars=None, **kwargs):
+            key = key.lower() if isinstance(key, str) else key
+            recorded.update(
+                alphabet=alphabet, key=key, mode=mode, keep_formatting=keep_formatting, allowed_chars=allowed_chars, kwargs=kwargs
+            )
+            return (text,)
+
+        self.execute_cipher = record
+        try:
+            getattr(self, self.CIPHER_FUNCTION)(**inputs)
+        finally:
+            del self.execute_cipher
+        return recorded
+
+    def run_list(self, workers=(1,), **inputs):
+        """Runs the node over lists of inputs (what ComfyUI hands over with INPUT_IS_LIST), returns (list of results,).
+
+        Items line up by index, and shorter lists repeat their last item like ComfyUI does for nodes taking single values.
+        Items sharing every input but the text go through the node's input handling once, then their texts run through the
+        same compiled cipher, split over `workers` processes.
+        """
+        count = max(len(values) for values in inputs.values())
+        items = [{name: values[min(i, len(values) - 1)] for name, values in inputs.items()} for i in range(count)]
+        groups = {}
+        for i, item in enumerate(items):
+            groups.setdefault(tuple((name, value) for name, value in item.items() if name != "text"), []).append(i)
+        tasks, chunks = [], []
+        for settings, indexes in groups.items():
+            arguments = self.cipher_arguments(text="", **dict(settings))
+            for start, end in worker_pool.chunk_bounds(len(indexes), workers[0]):
+                chunks.append(indexes[start:end])
+                tasks.append((type(self).__name__, [items[i]["text"] for i in chunks[-1]], arguments))
+        results = [None] * count
+        for chunk, outputs in zip(chunks, worker_pool.map_tasks(crypt_texts, tasks, workers=workers[0])):
+            for i, output in zip(chunk, outputs):
+                results[i] = output
+        return (results,)
+
+
+# Nodes whose class name is not the name of their secretpy class
+SECRETPY_NAMES = {"ColTrans": "ColumnarTransposition"}
+
+
+# Fast paths tried in order before secretpy, each returning None for whatever it cannot take
+FAST_PATHS = (cipher_tables.crypt, key_squares.crypt, transpositions.crypt, fractionation.crypt)
+
+
+@functools.lru_cache(maxsize=None)
+def secretpy_cipher(cipher_name):
+    # secretpy's cipher objects keep no state between calls, one per cipher does for the whole process
+    return getattr(secretpy, SECRETPY_NAMES.get(cipher_name, cipher_name))()
+
+
+def run_cipher(cipher_name, text, alphabet, key, mode, **kwargs):
+    # Substitution-family, square, transposition and fractionating ciphers run from compiled tables, everything else (and
+    # anything they cannot take) through secretpy
+    result = None
+    for crypt in () if kwargs else FAST_PATHS:
+        result = crypt(cipher_name, text, alphabet, key, mode)
+        if result is not None:
+            break
+    if result is None:
+        cipher_instance = secretpy_cipher(cipher_name)
+        if mode:
+            result = cipher_instance.encrypt(text, key, alphabet, **kwargs)
+        else:
+            result = cipher_instance.decrypt(text, key, alphabet, **kwargs)
+    return result
+
+
+def crypt_texts(cipher_name, texts, arguments):
+    # One pool task of BaseCipherNode.run_list: what execute_cipher does, for every text with the same cipher arguments
+    results = []
+    for text in texts:
+        mask = FormattingMask(text, arguments["allowed_chars"])
+        result = run_cipher(cipher_name, mask.cleaned, arguments["alphabet"], arguments["key"], arguments["mode"], **arguments["kwargs"])
+        results.append(mask.restore(result, arguments["mode"]) if arguments["keep_formatting"] and mask else result)
+    return results
+
 
 class ADFGX(BaseCipherNode):
     @classmethod
@@ -198,13 +257,13 @@ class Affine(BaseCipherNode):
         return class_input
 
     def affine(self, text, alphabet, key_1, key_2, mode, keep_formatting):
-        if len(alphabet) is None or len(alphabet) <= 1:
+        processed_alphabet = self.alphabet_checker(alphabet, as_tuple=False)
+        size = len(processed_alphabet) if processed_alphabet else 0
+        if size <= 1:
             raise ValueError("Alphabet size must be >= 2 for Affine.")
-        if math.gcd(key_1, key_2) != 1:
-            allowed = [x for x in range(1, len(alphabet)) if math.gcd(x, len(alphabet) == 1)]
+        allowed = [x for x in range(1, size) if math.gcd(x, size) == 1]
         if key_1 not in allowed:
-            raise ValueError(f" Invalid key #1 ({key_1}) for the current alphabet size {len(alphabet)}.")
-        processed_alphabet = self.alphabet_checker(alphabet, as_tuple=False)
+            raise ValueError(f" Invalid key #1 ({key_1}) for the current alphabet size {size}.")
         key = (key_1, key_2)
         return self.execute_cipher(text, processed_alphabet, key, mode, keep_formatting)
 
@@ -539,28 +598,29 @@ class Porta(BaseCipherNode):
 
 
 class Rot13(BaseCipherNode):
-    def rot13(self, text, alphabet, key, mode, keep_formatting):
+    def rot13(self, text, alphabet, mode, keep_formatting):
         processed_alphabet = self.alphabet_checker(alphabet, as_tuple=False)
         key = None
         return self.execute_cipher(text, processed_alphabet, key, mode, keep_formatting)
 
 
 class Rot5(BaseCipherNode):
-    def rot5(self, text, alphabet, key, mode, keep_formatting):
+    def rot5(self, text, alphabet, mode, keep_formatting):
         processed_alphabet = self.alphabet_checker(alphabet, as_tuple=False)
         key = None
-        return self.execute_cipher(text, processed_alphabet, key, mode, keep_formatting)
+        # Rot5 only turns digits, the letters stay where they are
+        return self.execute_cipher(text, processed_alphabet, key, mode, keep_formatting, al.DECIMAL)
 
 
 class Rot18(BaseCipherNode):
-    def rot18(self, text, alphabet, key, mode, keep_formatting):
+    def rot18(self, text, alphabet, mode, keep_formatting):
         processed_alphabet = self.alphabet_checker(alphabet, as_tuple=False)
         key = None
-        return self.execute_cipher(text, processed_alphabet, key, mode, keep_formatting)
+        return self.execute_cipher(text, processed_alphabet, key, mode, keep_formatting, al.ENGLISH + al.DECIMAL)
 
 
 class Rot47(BaseCipherNode):
-    def rot47(self, text, alphabet, key, mode, keep_formatting):
+    def rot47(self, text, alphabet, mode, keep_formatting):
         processed_alphabet = self.alphabet_checker(alphabet, as_tuple=False)
         key = None
         return self.execute_cipher(text, processed_alphabet, key, mode, keep_formatting)
@@ -751,6 +811,362 @@ class Zigzag(BaseCipherNode):
         return self.execute_cipher(text, processed_alphabet, key, mode, keep_formatting)
 
 
+class CipherPipeline:
+    CATEGORY = "ARG Toolkit/Cryptography/Classical"
+    DESCRIPTION = textwrap.dedent("""Runs several classical ciphers one after the other, stripping the formatting once at the start and restoring it once at the end.
+    One stage per line: the cipher name, then its inputs as name=value (a bare value is the key), and `decrypt` to run that stage backwards. Lines starting with # are skipped.
+    Adjacent substitution ciphers (Caesar, Atbash, Affine, Keyword, Simple Substitution, Rot, Vigenere, Beaufort, Gronsfeld, Porta) over the same letters are composed into a single table and run in one pass.
+    """)
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "text": (
+                    "STRING",
+                    {
+                        "default": "Hello World!",
+                        "multiline": True,
+                        "placeholder": "Type your message here... (has to match the alphabet's language)",
+                    },
+                ),
+                "stages": (
+                    "STRING",
+                    {
+                        "default": "Vigenere key=lemon\nColTrans key=zebras\nRot13",
+                        "multiline": True,
+                        "tooltip": "One cipher per line, e.g. 'Vigenere key=lemon', 'Affine key_1=5 key_2=8', 'Caesar 3 decrypt'. Inputs left out use the node's defaults.",
+                    },
+                ),
+                "keep_formatting": (
+                    "BOOLEAN",
+                    {
+                        "default": True,
+                        "tooltip": "Toggle between preserving the format of the message or remove all spaces, punctuations, and convert to lowercase.",
+                    },
+                ),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("result", "plan")
+    FUNCTION = "run_pipeline"
+
+    def parse_stages(self, stages):
+        # Returns [(node class name, cipher_arguments), ...] for every stage line
+        nodes = {name.lower(): node for name, node in NODE_CLASS_MAPPINGS.items() if issubclass(node, BaseCipherNode)}
+        nodes.update({node.__name__.lower(): node for node in nodes.values()})
+        parsed = []
+        for number, line in enumerate(stages.splitlines(), start=1):
+            tokens = shlex.split(line, comments=True)
+            if not tokens:
+                continue
+            if tokens[0].lower() not in nodes:
+                raise ValueError(f"Line {number}: unknown cipher '{tokens[0]}'.")
+            node = nodes[tokens[0].lower()]()
+            required = node.INPUT_TYPES()["required"]
+            inputs = {name: (spec[1] if len(spec) > 1 else {}).get("default") for name, spec in required.items()}
+            inputs.update(mode=True, keep_formatting=False)
+            for token in tokens[1:]:
+                if token.lower() in ("encrypt", "decrypt"):
+                    inputs["mode"] = token.lower() == "encrypt"
+                    continue
+                name, separator, value = token.partition("=")
+                if not separator:
+                    name, value = "key", token
+                if name not in required or name in ("text", "mode", "keep_formatting"):
+                    raise ValueError(f"Line {number}: {tokens[0]} has no input '{name}'.")
+                kind = required[name][0]
+                inputs[name] = int(value) if kind == "INT" else value.lower() in ("true", "1", "yes") if kind == "BOOLEAN" else value
+            # Only what the node's function takes, and None for any it takes but never asks for
+            parameters = inspect.signature(getattr(node, node.CIPHER_FUNCTION)).parameters
+            arguments = {name: inputs.get(name) for name in parameters}
+            arguments["text"] = ""
+            parsed.append((type(node).__name__, node.cipher_arguments(**arguments)))
+        if not parsed:
+            raise ValueError("The pipeline has no stages.")
+        return parsed
+
+    def run_pipeline(self, text, stages, keep_formatting):
+        stages = self.parse_stages(stages)
+        mask = FormattingMask(text, stages[0][1]["allowed_chars"])
+        result = mask.cleaned
+        plan = []
+        group, table = [], None  # stages composed so far, and their fused table
+
+        def flush(result):
+            fused = table.apply(result) if table is not None else None
+            if fused is not None:
+                return fused
+            for name, arguments in group:  # Letters the table does not cover, let each cipher handle (or raise on) them
+                result = run_cipher(name, result, arguments["alphabet"], arguments["key"], arguments["mode"], **arguments["kwargs"])
+            return result
+
+        for name, arguments in stages:
+            stage_table = None
+            if not arguments["kwargs"]:
+                stage_table = cipher_tables.compiled(name, arguments["alphabet"], arguments["key"], arguments["mode"])
+            fused = table.then(stage_table) if table is not None and stage_table is not None else None
+            if fused is not None:
+                group, table = group + [(name, arguments)], fused
+                plan[-1] = f"{plan[-1]} + {name}"
+                continue
+            result = flush(result)
+            group, table = [(name, arguments)], stage_table
+            plan.append(name)
+        result = flush(result)
+
+        report = "\n".join(f"{i}: {step}" for i, step in enumerate(plan, start=1))
+        if keep_formatting and mask:
+            return (mask.restore(result, stages[-1][1]["mode"]), report)
+        return (result, report)
+
+
+class CipherBruteForce:
+    CATEGORY = "ARG Toolkit/Cryptography/Classical"
+    DESCRIPTION = textwrap.dedent("""Searches the key space of the Caesar, Affine and Vigenere ciphers for a plaintext in the chosen language, without knowing the key.
+    Caesar and Affine try every key (26 and 312 for English). Vigenere guesses the key length from the index of coincidence and Kasiski examination, then solves each letter of the key on its own.
+    Candidates are ranked by how common their letter groups (n-grams) are in the language, and the best ones are returned with their keys.
+    """)
+    BRUTE_FORCE_CIPHERS = ("Caesar", "Affine", "Vigenere")
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "text": (
+                    "STRING",
+                    {
+                        "default": "Uryyb Jbeyq!",
+                        "multiline": True,
+                        "placeholder": "Paste the encrypted message here... (the longer the better)",
+                    },
+                ),
+                "language": (
+                    ngram_model.languages(),
+                    {
+                        "default": "ENGLISH",
+                        "tooltip": "Language of the plaintext. The cipher runs over the secretpy alphabet of the same name.",
+                    },
+                ),
+                "ciphers": (["all", *cls.BRUTE_FORCE_CIPHERS], {"default": "all", "tooltip": "Which cipher's keys to try."}),
+                "max_key_length": (
+                    "INT",
+                    {
+                        "default": 12,
+                        "min": 1,
+                        "max": 64,
+                        "tooltip": "Longest Vigenere key to consider. The text needs a few dozen letters per key letter for the key to be found.",
+                    },
+                ),
+                "top_k": (
+                    "INT",
+                    {
+                        "default": 10,
+                        "min": 1,
+                        "max": 1000,
+                        "tooltip": "How many of the best candidates to return.",
+                    },
+                ),
+                "keep_formatting": (
+                    "BOOLEAN",
+                    {
+                        "default": True,
+                        "tooltip": "Toggle between preserving the format of the message or remove all spaces, punctuations, and convert to lowercase.",
+                    },
+                ),
+            },
+            "optional": {
+                "workers": (
+                    "INT",
+                    {
+                        "default": 1,
+                        "min": 1,
+                        "max": worker_pool.MAX_WORKERS,
+                        "step": 1,
+                        "display": "number",
+                        "tooltip": "Worker processes to split the key spaces over (one per cipher, and one per Vigenere key length). 1 keeps all the work in the ComfyUI process.",
+                    },
+                ),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "STRING", "STRING")
+    RETURN_NAMES = ("plaintexts", "report", "best")
+    OUTPUT_IS_LIST = (True, False, False)
+    FUNCTION = "brute_force"
+
+    @staticmethod
+    def key_inputs(candidate, alphabet):
+        # The key as inputs of the cipher's own node (and of CipherPipeline stages)
+        if candidate.cipher == "Affine":
+            return f"key_1={candidate.key[0]} key_2={candidate.key[1]}"
+        if candidate.cipher == "Vigenere":
+            return "key=" + "".join(alphabet[i][0] for i in candidate.key)
+        return f"key={candidate.key}"
+
+    def brute_force(self, text, language, ciphers, max_key_length, top_k, keep_formatting, workers=1):
+        table = ngram_model.get_table(language)
+        mask = FormattingMask(text, "".join(table.alphabet))
+        ciphertext = ngram_model.encode(mask.cleaned, table.alphabet)
+        if not len(ciphertext):
+            raise ValueError(f"The text has no {language} letters to decrypt.")
+        names = self.BRUTE_FORCE_CIPHERS if ciphers == "all" else (ciphers,)
+        tasks = [(name, ciphertext, language, top_k) for name in names if name != "Vigenere"]
+        if "Vigenere" in names:
+            periods = cryptanalysis.vigenere_periods(ciphertext, table, max_key_length)
+            tasks += [("Vigenere", ciphertext, language, top_k, period) for period in periods]
+        best = cryptanalysis.merge(worker_pool.map_tasks(cryptanalysis.solve, tasks, workers=workers), top_k)
+
+        plaintexts = [cryptanalysis.decode(candidate.plaintext, table.alphabet) for candidate in best]
+        if keep_formatting:
+            plaintexts = [mask.restore(plaintext) for plaintext in plaintexts]
+        report = "\n".join(
+            f"{i}. {candidate.score:.3f} {candidate.cipher} {self.key_inputs(candidate, table.alphabet)}"
+            for i, candidate in enumerate(best, start=1)
+        )
+        return (plaintexts, report, plaintexts[0])
+
+
+class CipherSolver:
+    CATEGORY = "ARG Toolkit/Cryptography/Classical"
+    DESCRIPTION = textwrap.dedent("""Cracks Simple Substitution, Keyword and Playfair ciphertexts without the key, by simulated annealing over keys.
+    Keys are scored by how common the letter groups (n-grams) of their plaintext are in the chosen language. Restarts from fresh keys until the time budget runs out (or for a set number of restarts), on every worker at once.
+    Longer texts solve faster and more reliably: a few hundred letters for substitutions, several hundred for Playfair.
+    """)
+    SOLVER_CIPHERS = ("SimpleSubstitution", "Keyword", "Playfair")
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "text": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": True,
+                        "placeholder": "Paste the encrypted message here... (the longer the better)",
+                    },
+                ),
+                "cipher": (
+                    list(cls.SOLVER_CIPHERS),
+                    {"default": "SimpleSubstitution", "tooltip": "The cipher the text was encrypted with."},
+                ),
+                "language": (
+                    ngram_model.languages(),
+                    {
+                        "default": "ENGLISH",
+                        "tooltip": "Language of the plaintext. Substitutions run over the secretpy alphabet of the same name.",
+                    },
+                ),
+                "alphabet": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": False,
+                        "tooltip": "Playfair only: the alphabet of the square. If left blank, uses ENGLISH_SQUARE_IJ for English and the language's _SQUARE alphabet otherwise.",
+                    },
+                ),
+                "time_budget": (
+                    "FLOAT",
+                    {
+                        "default": 20.0,
+                        "min": 0.1,
+                        "max": 3600.0,
+                        "step": 0.1,
+                        "tooltip": "Seconds to search for. Every worker searches for this long.",
+                    },
+                ),
+                "seed": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 0xFFFFFFFF,
+                        "tooltip": "Seed of the random keys. How far a time budget gets depends on the machine, so only a fixed number of restarts repeats a search exactly.",
+                    },
+                ),
+                "keep_formatting": (
+                    "BOOLEAN",
+                    {
+                        "default": True,
+                        "tooltip": "Toggle between preserving the format of the message or remove all spaces, punctuations, and convert to lowercase.",
+                    },
+                ),
+            },
+            "optional": {
+                "workers": (
+                    "INT",
+                    {
+                        "default": 1,
+                        "min": 1,
+                        "max": worker_pool.MAX_WORKERS,
+                        "step": 1,
+                        "display": "number",
+                        "tooltip": "Worker processes searching at the same time, each from its own seed. 1 keeps all the work in the ComfyUI process.",
+                    },
+                ),
+                "restarts": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 10000,
+                        "step": 1,
+                        "display": "number",
+                        "tooltip": "Restarts per worker. 0 searches until the time budget runs out, anything else runs exactly that many restarts whatever the budget, so the same seed gives the same key.",
+                    },
+                ),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "STRING", "STRING")
+    RETURN_NAMES = ("plaintext", "key", "report")
+    FUNCTION = "solve"
+
+    @staticmethod
+    def square_alphabet(language, alphabet):
+        if alphabet.strip():
+            return tuple(getattr(al, alphabet.strip().upper(), alphabet.strip()))
+        name = "ENGLISH_SQUARE_IJ" if language == "ENGLISH" else f"{language}_SQUARE"
+        if not hasattr(al, name):
+            raise ValueError(f"secretpy has no Playfair square for {language}, give one in `alphabet`.")
+        return tuple(getattr(al, name))
+
+    def solve(self, text, cipher, language, alphabet, time_budget, seed, keep_formatting, workers=1, restarts=0):
+        table = ngram_model.get_table(language)
+        alphabet = self.square_alphabet(language, alphabet) if cipher == "Playfair" else tuple(table.alphabet)
+        mask = FormattingMask(text, "".join(alphabet))
+        ciphertext = ngram_model.encode(mask.cleaned, alphabet)
+        if len(ciphertext) < table.n:
+            raise ValueError(f"The text needs at least {table.n} letters of the alphabet to score.")
+        if cipher == "Playfair" and len(ciphertext) % 2:
+            raise ValueError("Playfair ciphertext needs an even number of letters, this one has an odd number.")
+        tasks = [(cipher, ciphertext, alphabet, language, time_budget, seed + i, restarts) for i in range(workers)]
+        score, key = max(worker_pool.map_tasks(key_search.search, tasks, workers=workers), key=lambda result: result[0])
+
+        if cipher == "Playfair":
+            key = "".join(alphabet[i][0] for i in key.tolist())
+        else:
+            key = key_search.substitution_key(key, alphabet)
+            if cipher == "Keyword":
+                key = key_search.shortest_keyword(key, alphabet)
+        plaintext = run_cipher(cipher, mask.cleaned, alphabet, key, False)
+        report = f"{cipher} key={key}\nscore {score / (len(ciphertext) - table.n + 1):.3f} per {table.n}-gram"
+        if keep_formatting:
+            plaintext = mask.restore(plaintext)
+        return (plaintext, key, report)
+
+
 # A dictionary that contains all nodes you want to export with their names
 # NOTE: names should be globally unique
 NODE_CLASS_MAPPINGS = {
@@ -786,6 +1202,9 @@ NODE_CLASS_MAPPINGS = {
     "Vic": Vic,
     "Vigenere": Vigenere,
     "Zigzag": Zigzag,
+    "CipherPipeline": CipherPipeline,
+    "CipherBruteForce": CipherBruteForce,
+    "CipherSolver": CipherSolver,
 }
 
 # A dictionary that contains the friendly/humanly readable titles for the nodes
@@ -822,4 +1241,7 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "Vic": "Vic Cipher",
     "Vigenere": "Vigenere Cipher",
     "Zigzag": "Zigzag (Rail-fence) Cipher",
+    "CipherPipeline": "Cipher Pipeline",
+    "CipherBruteForce": "Cipher Brute Force (Caesar/Affine/Vigenere)",
+    "CipherSolver": "Cipher Solver (Substitution/Keyword/Playfair)",
 }
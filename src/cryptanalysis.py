@@ -0,0 +1,160 @@
+import functools
+import math
+import heapq
+from collections import namedtuple
+
+import numpy as np
+
+from . import ngram_model
+
+# Key-space search for the Caesar, Affine and Vigenere ciphers, with the same key conventions as secretpy.
+# The ciphertext is reduced to an array of alphabet indexes once, and candidate keys are tried many at a time as rows of an
+# integer matrix, so a whole key space is one numpy expression and one scoring pass:
+# - Caesar: every shift. Affine: every (a, b) with a coprime to the alphabet length (312 keys for English).
+# - Vigenere: the period is guessed from the index of coincidence of each column split and from Kasiski examination (repeated
+#   trigrams sit a multiple of the period apart), then every column is solved as a Caesar shift on its own.
+# Candidates are ranked by their mean n-gram log probability (see ngram_model.py), so texts of any length compare. Vigenere
+# columns hold every period-th letter, so they are solved on the single letter frequencies the n-gram table implies.
+
+Candidate = namedtuple("Candidate", ["score", "cipher", "key", "plaintext"])
+
+PERIOD_CANDIDATES = 4  # Vigenere periods solved by index of coincidence, plus the best by Kasiski examination
+COINCIDENCE_MARGIN = 0.5  # periods whose index of coincidence is this far from the worst towards the best are candidates
+LANGUAGE_COINCIDENCE = 0.9  # share of the language's index of coincidence over which a period is a candidate anyway
+MIN_COLUMN_LETTERS = 10  # shortest Vigenere column worth solving, shorter ones fit any key
+SHIFT_ALTERNATIVES = 2  # per Vigenere column, how many of the best shifts are tried when building keys
+
+
+def decode(indexes, alphabet):
+    return "".join(alphabet[i][0] for i in indexes.tolist())
+
+
+@functools.lru_cache(maxsize=None)
+def letter_log_probabilities(table):
+    """log10 probability of every single letter, summed out of an n-gram table."""
+    probabilities = 10 ** table.log_probabilities().reshape(len(table.alphabet), -1)
+    probabilities = probabilities.sum(axis=1)
+    return np.log10(probabilities / probabilities.sum())
+
+
+def _best(scores, plaintexts, labels, cipher, top_k):
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [Candidate(float(scores[i]), cipher, labels[i], plaintexts[i]) for i in order.tolist()]
+
+
+def caesar_candidates(ciphertext, table, top_k):
+    """Tries every Caesar shift, returns the `top_k` best as (score, "Caesar", shift, plaintext indexes)."""
+    shifts = np.arange(len(table.alphabet))
+    plaintexts = (ciphertext[None, :] - shifts[:, None]) % len(table.alphabet)
+    return _best(table.score_indexes(plaintexts), plaintexts, shifts.tolist(), "Caesar", top_k)
+
+
+def affine_keys(n):
+    return [(a, b) for a in range(1, n) if math.gcd(a, n) == 1 for b in range(n)]
+
+
+def affine_candidates(ciphertext, table, top_k):
+    """Tries every Affine key (a, b), decrypting like secretpy: a^-1 * (c - b) mod n."""
+    n = len(table.alphabet)
+    keys = affine_keys(n)
+    inverses = np.array([pow(a, -1, n) for a, _ in keys])[:, None]
+    offsets = np.array([b for _, b in keys])[:, None]
+    plaintexts = (inverses * (ciphertext[None, :] - offsets)) % n
+    return _best(table.score_indexes(plaintexts), plaintexts, keys, "Affine", top_k)
+
+
+def _column_counts(ciphertext, n, period):
+    columns = np.arange(len(ciphertext)) % period
+    return np.bincount(columns * n + ciphertext, minlength=period * n).reshape(period, n)
+
+
+def coincidence_index(ciphertext, n, period):
+    """Mean index of coincidence of the `period` columns of the ciphertext."""
+    counts = _column_counts(ciphertext, n, period)
+    totals = counts.sum(axis=1)
+    pairs = np.maximum(totals * (totals - 1), 1)
+    return float(((counts * (counts - 1)).sum(axis=1) / pairs).mean())
+
+
+def kasiski_counts(ciphertext, max_period):
+    """How many distances between repeated trigrams every period from 2 to `max_period` divides, as a [max_period + 1] array."""
+    counts = np.zeros(max_period + 1, dtype=np.int64)
+    if len(ciphertext) < 6 or max_period < 2:
+        return counts
+    codes = (ciphertext[:-2] * 1024 + ciphertext[1:-1]) * 1024 + ciphertext[2:]
+    order = np.argsort(codes, kind="stable")
+    repeated = codes[order][1:] == codes[order][:-1]
+    distances = (order[1:] - order[:-1])[repeated]  # consecutive occurrences of the same trigram
+    for period in range(2, max_period + 1):
+        counts[period] = int((distances % period == 0).sum())
+    return counts
+
+
+def vigenere_periods(ciphertext, table, max_period):
+    """The periods worth solving, shortest first.
+
+    Every multiple of the period has as high an index of coincidence as the period itself, and solving a multiple overfits
+    the shorter columns, so only periods close to the best index of coincidence and not multiples of a shorter pick are kept.
+    Kasiski's favourite period is added if it was not picked. Periods leaving fewer than `MIN_COLUMN_LETTERS` per column are
+    never tried.
+    """
+    n = len(table.alphabet)
+    language_coincidence = float((10 ** (2 * letter_log_probabilities(table))).sum())
+    max_period = max(1, min(max_period, len(ciphertext) // MIN_COLUMN_LETTERS))
+    coincidence = np.array([coincidence_index(ciphertext, n, period) for period in range(1, max_period + 1)])
+    threshold = coincidence.min() + COINCIDENCE_MARGIN * (coincidence.max() - coincidence.min())
+    threshold = min(threshold, LANGUAGE_COINCIDENCE * language_coincidence)
+    periods = []
+    for period in (np.flatnonzero(coincidence >= threshold) + 1).tolist():
+        if all(period % picked for picked in periods):
+            periods.append(period)
+    periods = periods[:PERIOD_CANDIDATES]
+    kasiski = kasiski_counts(ciphertext, max_period)
+    if kasiski.any():
+        favourite = int(np.argmax(kasiski))
+        if all(favourite % picked for picked in periods):
+            periods.append(favourite)
+    return periods
+
+
+def vigenere_candidates(ciphertext, table, period, top_k):
+    """Solves every column of a `period` split as a Caesar shift, then tries keys mixing the best shifts of each column."""
+    n = len(table.alphabet)
+    log_freq = letter_log_probabilities(table)
+    counts = _column_counts(ciphertext, n, period)
+    # column_scores[j, s]: log-likelihood of column j decrypted with shift s
+    shifted = (np.arange(n)[None, :] - np.arange(n)[:, None]) % n  # shifted[s, c] = plaintext of c under shift s
+    column_scores = counts @ log_freq[shifted].T
+    ranked = np.argsort(-column_scores, axis=1)[:, :SHIFT_ALTERNATIVES]
+    keys = [ranked[:, 0].copy()]
+    for column in range(period):  # the best key, and the best key with each column swapped for its runner-up
+        for alternative in range(1, ranked.shape[1]):
+            key = ranked[:, 0].copy()
+            key[column] = ranked[column, alternative]
+            keys.append(key)
+    keys = np.unique(np.stack(keys), axis=0)
+    plaintexts = (ciphertext[None, :] - keys[:, np.arange(len(ciphertext)) % period]) % n
+    return _best(table.score_indexes(plaintexts), plaintexts, [tuple(key.tolist()) for key in keys], "Vigenere", top_k)
+
+
+def solve(cipher, ciphertext, alphabet_name, top_k, period=None):
+    # One pool task: a whole key space, or one Vigenere period. Workers look the table up in their own (inherited) cache.
+    table = ngram_model.get_table(alphabet_name)
+    if cipher == "Caesar":
+        return caesar_candidates(ciphertext, table, top_k)
+    if cipher == "Affine":
+        return affine_candidates(ciphertext, table, top_k)
+    return vigenere_candidates(ciphertext, table, period, top_k)
+
+
+def merge(results, top_k):
+    """The `top_k` best candidates over several result lists, dropping plaintexts already found with a better key."""
+    seen, best = set(), []
+    for candidate in heapq.merge(*results, key=lambda candidate: -candidate.score):
+        plaintext = candidate.plaintext.tobytes()
+        if plaintext not in seen:
+            seen.add(plaintext)
+            best.append(candidate)
+            if len(best) == top_k:
+                break
+    return best
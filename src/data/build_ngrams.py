@@ -0,0 +1,116 @@
+import argparse
+import glob
+import gzip
+import hashlib
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src import ngram_model  # noqa: E402
+
+# Rebuilds src/data/ngrams.bin from the documentation of a Debian system. Run it from anywhere with
+# `python src/data/build_ngrams.py`; it prints the letter count and SHA-256 of every language's corpus next to the values
+# the shipped file was built from, and writes the tables over DATA_PATH (or --output).
+#
+# The shipped file came from Debian 12.12 (bookworm) with manpages 6.03-2 and vim-runtime 2:9.0.1378-2+deb12u2 installed,
+# and is reproduced byte for byte there. Corpora, in this order:
+# - ENGLISH: every /usr/share/man/man1..man8/**/*.gz page (sorted paths), then every /usr/share/common-licenses/* file and
+#   /usr/share/vim/vim90/tutor/tutor. 3- and 4-grams.
+# - GERMAN, RUSSIAN, SPANISH, ITALIAN, POLISH, DUTCH, SWEDISH, DANISH: every /usr/share/man/<code>/**/*.gz page (the
+#   translations other packages ship), then /usr/share/vim/vim90/tutor/tutor.<code>.utf-8. 3-grams.
+# Man pages are reduced to their running text: requests other than the font and paragraph macros in KEEP are dropped, as
+# are no-fill (.nf/.EX) blocks and troff escapes. Pages that are not UTF-8 are skipped.
+
+MAN_DIR = "/usr/share/man"
+LICENSE_DIR = "/usr/share/common-licenses"
+TUTOR_DIR = "/usr/share/vim/vim90/tutor"
+KEEP = {".B", ".I", ".BR", ".IR", ".RB", ".RI", ".IB", ".BI", ".SH", ".SS", ".TP", ".IP", ".PP"}
+ESCAPE = re.compile(r"\\(\(..|\[[^\]]*\]|f\(..|f\[[^\]]*\]|f.|s[+-]?\d+|\*\(..|\*\[[^\]]*\]|\*.|n\(..|n.|.)")
+# Language -> man page directory code, for the 3-gram only languages
+TRANSLATIONS = {
+    "GERMAN": "de",
+    "RUSSIAN": "ru",
+    "SPANISH": "es",
+    "ITALIAN": "it",
+    "POLISH": "pl",
+    "DUTCH": "nl",
+    "SWEDISH": "sv",
+    "DANISH": "da",
+}
+# Language -> (letters, SHA-256 of the corpus text) the shipped file was built from
+SHIPPED_CORPORA = {
+    "ENGLISH": (29128187, "6a710ddf4f2ffcb1dafb07ffb6109d45a83a11038e6a341b7539130827defb18"),
+    "GERMAN": (1293991, "3610c2e28d5008529625a17a8a0e7911389f43cd659de90560179ede89e03bdb"),
+    "RUSSIAN": (137443, "640a660153bc63be83ed0462eb616d274840ab2b17f36f25409ce77c12718e21"),
+    "SPANISH": (104071, "92231466cbe9a89486555edd1bef5b7f42cc11b77ace74d7cfd9d86ea9b6293c"),
+    "ITALIAN": (344532, "2e3fa9abfe6d4934fac00e29cf0dbe690a4bfe4442721a6649931f99d3475824"),
+    "POLISH": (219374, "027a98dd51fa409a4c4deaaa9ea6de684632d69e1643b90f3695cdb1a25c301e"),
+    "DUTCH": (622357, "5a29f7d532573309247118eb0e8c605121eef8c5c33e0db247dc5a44c2b468b3"),
+    "SWEDISH": (456698, "0d36dbb6dae903c5db917166b52628c18284ef5c777840b629c690cdaea712c1"),
+    "DANISH": (116990, "5423fec5c3b78c6995490caebddcdc6179f7fb1208335ea7c5c2f2cb9160c9f2"),
+}
+
+
+def man_text(path):
+    """The running text of a gzipped man page, "" when it is not UTF-8."""
+    try:
+        raw = gzip.open(path).read().decode("utf-8")
+    except (UnicodeDecodeError, OSError):
+        return ""
+    lines, skipping = [], False
+    for line in raw.splitlines():
+        if line.startswith((".nf", ".EX")):
+            skipping = True
+        elif line.startswith((".fi", ".EE")):
+            skipping = False
+        if skipping:
+            continue
+        if line.startswith((".", "'")):
+            macro, _, rest = line.partition(" ")
+            if macro not in KEEP:
+                continue
+            line = rest.replace('"', " ")
+        lines.append(ESCAPE.sub("", line))
+    return "\n".join(lines)
+
+
+def corpus(man_dirs, extra):
+    """The man pages of `man_dirs` (sorted paths), then the plain text files of `extra`, one after the other."""
+    parts = []
+    for man_dir in man_dirs:
+        for path in sorted(glob.glob(os.path.join(MAN_DIR, man_dir, "**", "*.gz"), recursive=True)):
+            parts.append(man_text(path))
+    for path in extra:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            parts.append(f.read())
+    return "\n".join(parts)
+
+
+def corpora():
+    """Language -> corpus text, ENGLISH first."""
+    english = [f"man{section}" for section in range(1, 9)]
+    texts = {"ENGLISH": corpus(english, sorted(glob.glob(os.path.join(LICENSE_DIR, "*"))) + [os.path.join(TUTOR_DIR, "tutor")])}
+    for name, code in TRANSLATIONS.items():
+        texts[name] = corpus([code], [os.path.join(TUTOR_DIR, f"tutor.{code}.utf-8")])
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuilds the n-gram tables of ngram_model.py.")
+    parser.add_argument("--output", default=ngram_model.DATA_PATH, help="file to write (default: the shipped one)")
+    args = parser.parse_args()
+    tables = {}
+    for name, text in corpora().items():
+        letters = len(ngram_model.encode(text, getattr(ngram_model.al, name)))
+        digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        shipped = SHIPPED_CORPORA[name]
+        print(f"{name}: {letters} letters, sha256 {digest} ({'same as' if (letters, digest) == shipped else 'differs from'} shipped)")
+        for n in (3, 4) if name == "ENGLISH" else (3,):
+            tables[name, n] = ngram_model.build_table(text, name, n)
+    ngram_model.write_tables(tables, args.output)
+
+
+if __name__ == "__main__":
+    main()
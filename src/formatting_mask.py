@@ -0,0 +1,89 @@
+import numpy as np
+
+# Formatting preservation for the classical ciphers, in a fixed number of C-level passes over the text.
+# Python's per-character predicates (isalpha, isupper, lower, upper) are only ever called once per *distinct* character:
+# the text becomes a numpy array of code points, every distinct code point is evaluated once, and the answers are spread
+# back over the whole text through a dense lookup indexed by code point.
+# The results are the same as walking the text character by character, including the odd cases (characters whose case
+# mapping is several characters long, like "ß".upper(), are handled through an object array instead of code points).
+
+
+def _code_points(text):
+    return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+
+
+def _from_code_points(points):
+    return points.astype("<u4").tobytes().decode("utf-32-le", "surrogatepass")
+
+
+def _distinct(points):
+    # Distinct code points in ascending order, in linear time (a bincount rather than a sort)
+    if not len(points):
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.bincount(points))
+
+
+def _spread(points, chars, values, dtype):
+    # values[i] belongs to chars[i], returns the value of every code point of the text
+    lookup = np.empty(int(chars[-1]) + 1 if len(chars) else 0, dtype=dtype)
+    lookup[chars] = np.array(values, dtype=dtype) if dtype is not object else _object_array(values)
+    return lookup[points]
+
+
+def _object_array(strings):
+    array = np.empty(len(strings), dtype=object)
+    array[:] = strings
+    return array
+
+
+class FormattingMask:
+    """Where the letters of a text are and which ones are upper case, computed once and reusable across ciphers.
+
+    `cleaned` is the text with only its letters (or only `allowed_chars`, compared in lower case) kept and lower-cased,
+    which is what the ciphers run on. `restore` puts a cipher result back into the original punctuation, spacing and case.
+    """
+
+    def __init__(self, text, allowed_chars=None):
+        self.text = text
+        points = _code_points(text)
+        chars = _distinct(points)
+        letters = [chr(c) for c in chars]
+        if allowed_chars is None:
+            kept = [letter.isalpha() for letter in letters]
+        else:
+            kept = [letter.lower() in allowed_chars for letter in letters]
+        self.positions = np.flatnonzero(_spread(points, chars, kept, bool))
+        self.upper = _spread(points, chars, [letter.isupper() for letter in letters], bool)[self.positions]
+        self.cleaned = text.translate({c: letter.lower() if keep else None for c, letter, keep in zip(chars.tolist(), letters, kept)})
+
+    def __len__(self):
+        return len(self.positions)
+
+    def restore(self, cipher_result, mode=False):
+        """Writes `cipher_result` over the letters of the original text, one character per letter, keeping each letter's case.
+
+        Letters past the end of the result are dropped. When encrypting (`mode`), characters past the last letter are appended
+        in the case of the last letter written. Decryption drops them.
+        """
+        count = min(len(self.positions), len(cipher_result))
+        points = _code_points(cipher_result)
+        chars = _distinct(points)
+        uppers = [chr(c).upper() for c in chars]
+        lowers = [chr(c).lower() for c in chars]
+        if all(len(upper) == 1 for upper in uppers) and all(len(lower) == 1 for lower in lowers):
+            upper = _spread(points, chars, [ord(upper) for upper in uppers], np.uint32)
+            lower = _spread(points, chars, [ord(lower) for lower in lowers], np.uint32)
+            result = _code_points(self.text).copy()
+        else:  # Some case mapping is longer than one character, work on strings instead of code points
+            upper = _spread(points, chars, uppers, object)
+            lower = _spread(points, chars, lowers, object)
+            result = _object_array(list(self.text))
+
+        cased = np.where(self.upper[:count], upper[:count], lower[:count])
+        result[self.positions[:count]] = cased
+        result = np.delete(result, self.positions[count:])  # letters the result did not reach are wiped
+        if mode and count < len(cipher_result):  # encryption may expand, so append leftovers
+            last = cased[-1] if len(self.positions) else None
+            last_upper = last is not None and (chr(last) if isinstance(last, np.integer) else last).isupper()
+            result = np.concatenate([result, (upper if last_upper else lower)[count:]])
+        return _from_code_points(result) if result.dtype != object else "".join(result)
@@ -0,0 +1,181 @@
+import numpy as np
+from secretpy import alphabets as al
+
+from . import key_squares, transpositions
+
+# Coordinate engine for the fractionating ciphers (Polybius, Bifid, Trifid, ADFGX, ADFGVX and Nihilist), with output
+# identical to secretpy. Each of them turns letters into coordinates on a square (or Trifid's 3x3x3 cube), moves the
+# coordinates around, and turns them back into letters or digits. Here the whole text goes through each step at once:
+# - letters -> grid positions through the shared `key_squares.key_square` lookup arrays, and rows/columns with one divmod,
+# - Bifid and Trifid periods as reshapes of the coordinate streams ([blocks, period, coordinates] <-> [blocks, coordinates,
+#   period]), with the shorter last block done on its own,
+# - ADFGX/ADFGVX's columnar transposition through the cached permutations of transpositions.py,
+# - coordinates -> letters by gathering from the square's letters.
+# `crypt` returns None for anything it cannot take (characters missing from the square, coordinates secretpy would read
+# past the end of the square with, multi-digit Polybius coordinates, malformed Nihilist numbers), and the caller runs
+# secretpy itself for the error or its odd result.
+
+FRACTIONATING_CIPHERS = ("Polybius", "Bifid", "Trifid", "ADFGX", "ADFGVX", "Nihilist")
+ADFGX_HEADER = "adfgx"
+ADFGVX_HEADER = "adfgvx"
+ADFGVX_ALPHABET = tuple(al.ENGLISH + "1234567890")  # secretpy's default for ADFGVX
+TRIFID_SIZE = 3  # Trifid letters are 3 base-3 digits: square, row, column
+MAX_DIGIT = 9  # Polybius and Nihilist write every coordinate as one digit from 1 to 9
+
+
+def _code_points(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+
+
+def _text(points):
+    return np.ascontiguousarray(points, dtype="<u4").tobytes().decode("utf-32-le")
+
+
+def _letters(square, positions):
+    # The letters at grid positions, or None where secretpy would read past the last letter
+    if len(positions) and (positions.min() < 0 or positions.max() >= len(square.entries)):
+        return None
+    return square.letters[positions]
+
+
+def _by_block(stream, period, shuffle):
+    """Runs `shuffle` over every `period` long block of a [letters, coordinates] array, the last (shorter) block on its own."""
+    whole = len(stream) - len(stream) % period
+    blocks = [shuffle(stream[:whole].reshape(-1, period, stream.shape[1])).reshape(-1, stream.shape[1])]
+    if whole < len(stream):
+        blocks.append(shuffle(stream[None, whole:]).reshape(-1, stream.shape[1]))
+    return np.concatenate(blocks)
+
+
+def _gather_coordinates(blocks):
+    # [blocks, period, coordinates] -> coordinate streams one after the other, regrouped into letters
+    return blocks.transpose(0, 2, 1).reshape(blocks.shape)
+
+
+def _scatter_coordinates(blocks):
+    # The inverse: letters' coordinates laid out one after the other, then read back as streams
+    return blocks.reshape(blocks.shape[0], blocks.shape[2], blocks.shape[1]).transpose(0, 2, 1)
+
+
+def _period(key, text):
+    key = int(key)
+    return key if key > 0 else len(text)
+
+
+def _polybius(text, alphabet, key, encrypt):
+    square = key_squares.key_square(alphabet, key)
+    if square.side > MAX_DIGIT:
+        return None
+    points = _code_points(text)
+    if encrypt:
+        positions = square.positions(points)
+        if positions is None:
+            return None
+        return _text(np.stack(np.divmod(positions, square.side), axis=1).ravel() + ord("1"))
+    digits = points.astype(np.int64) - ord("1")  # secretpy reads a trailing odd digit too, then drops it
+    if len(digits) and (digits.min() < 0 or digits.max() >= MAX_DIGIT):
+        return None
+    digits = digits[: len(digits) - len(digits) % 2]
+    letters = _letters(square, digits[0::2] * square.side + digits[1::2])
+    return None if letters is None else _text(letters)
+
+
+def _bifid(text, alphabet, key, encrypt):
+    square = key_squares.key_square(alphabet)
+    positions = square.positions(_code_points(text))
+    if positions is None:
+        return None
+    # Encrypting reads each block's rows then its columns two at a time, decrypting splits them back
+    coordinates = np.stack(np.divmod(positions, square.side), axis=1)
+    shuffled = _by_block(coordinates, _period(key, text), _gather_coordinates if encrypt else _scatter_coordinates)
+    letters = _letters(square, shuffled[:, 0] * square.side + shuffled[:, 1])
+    return None if letters is None else _text(letters)
+
+
+def _trifid(text, alphabet, key, encrypt):
+    if len(alphabet) != TRIFID_SIZE**3:
+        return None  # secretpy asserts on it
+    square = key_squares.key_square(alphabet)
+    positions = square.positions(_code_points(text))
+    if positions is None:
+        return None
+    digits = np.stack([positions // TRIFID_SIZE**2, positions // TRIFID_SIZE % TRIFID_SIZE, positions % TRIFID_SIZE], axis=1)
+    shuffled = _by_block(digits, _period(key, text), _gather_coordinates if encrypt else _scatter_coordinates)
+    return _text(square.letters[shuffled @ np.array([TRIFID_SIZE**2, TRIFID_SIZE, 1])])
+
+
+def _adfgx(text, alphabet, key, encrypt, header):
+    square = key_squares.key_square(alphabet)
+    if square.side > len(header):
+        return None
+    header_points = _code_points(header)
+    if encrypt:
+        positions = square.positions(_code_points(text))
+        if positions is None:
+            return None
+        letters = _text(header_points[np.stack(np.divmod(positions, square.side), axis=1).ravel()])
+        return transpositions.crypt("ColTrans", letters, al.ENGLISH, key, True)
+    letters = transpositions.crypt("ColTrans", text, al.ENGLISH, key, False)
+    if letters is None:
+        return None
+    points = _code_points(letters)
+    points = points[: len(points) - len(points) % 2]
+    # Header letter -> coordinate, -1 for anything else
+    lookup = np.full(max(header_points.max(), points.max(initial=0)) + 1, -1, dtype=np.int64)
+    lookup[header_points] = np.arange(len(header))
+    coordinates = lookup[points]
+    if (coordinates < 0).any():
+        return None
+    letters = _letters(square, coordinates[0::2] * square.side + coordinates[1::2])
+    return None if letters is None else _text(letters)
+
+
+def _nihilist(text, alphabet, key, encrypt):
+    square = key_squares.key_square(alphabet)
+    if square.side > MAX_DIGIT or not key:
+        return None
+
+    def numbers(positions):
+        # The two-digit Polybius number of every grid position, row then column from 1
+        row, column = np.divmod(positions, square.side)
+        return (row + 1) * 10 + column + 1
+
+    key_positions = square.positions(_code_points(key))
+    if key_positions is None:
+        return None
+    if encrypt:
+        positions = square.positions(_code_points(text))
+        if positions is None:
+            return None
+        shifts = numbers(key_positions)[np.arange(len(positions)) % len(key_positions)]
+        return " ".join(map(str, (numbers(positions) + shifts).tolist()))
+    if not text or not all(number.isascii() and number.isdigit() for number in text.split(" ")):
+        return None
+    values = np.array(text.split(" "), dtype=np.int64) - numbers(key_positions)[np.arange(text.count(" ") + 1) % len(key_positions)]
+    row, column = np.divmod(values, 10)
+    if (row < 1).any() or (row > MAX_DIGIT).any() or (column < 1).any():
+        return None  # Numbers secretpy reads as something other than two digits from 1 to 9
+    letters = _letters(square, (row - 1) * square.side + column - 1)
+    return None if letters is None else _text(letters)
+
+
+def crypt(name, text, alphabet, key, encrypt):
+    """The secretpy `encrypt`/`decrypt` result of a fractionating cipher, or None when the caller has to fall back to it."""
+    if name not in FRACTIONATING_CIPHERS:
+        return None
+    if name == "ADFGVX":
+        alphabet = alphabet or ADFGVX_ALPHABET
+    if not alphabet:
+        return None
+    try:
+        if name == "Polybius":
+            return _polybius(text, alphabet, key, encrypt)
+        if name == "Bifid":
+            return _bifid(text, alphabet, key, encrypt)
+        if name == "Trifid":
+            return _trifid(text, alphabet, key, encrypt)
+        if name == "Nihilist":
+            return _nihilist(text, alphabet, key, encrypt)
+        return _adfgx(text, alphabet, key, encrypt, ADFGX_HEADER if name == "ADFGX" else ADFGVX_HEADER)
+    except (KeyError, ValueError, TypeError, IndexError, ZeroDivisionError, OverflowError, UnicodeEncodeError):
+        return None  # Keys and alphabets secretpy rejects, or unhashable ones the squares cannot be cached for
@@ -0,0 +1,78 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch
+
+from .worker_pool import MAX_WORKERS, can_fork, chunk_bounds, get_executor, map_tasks, run, shutdown, usable_workers  # noqa: F401
+
+# Fans batched frame work out to the process pool of worker_pool.py, one chunk of frames per task.
+# Frames never go through pickle: the parent copies the uint8 batch into a SharedMemory block once, each worker maps it and
+# writes its chunk of the result into a second block. Only block names, the shape and the chunk bounds are sent over.
+
+
+def _close(block):
+    try:
+        block.close()
+    except BufferError:
+        pass  # A view is still alive (usually in a traceback), the mapping goes away with it
+
+
+def _run_chunk(func, args, source_name, target_name, shape, start, end):
+    source = shared_memory.SharedMemory(name=source_name)
+    target = None if target_name is None else shared_memory.SharedMemory(name=target_name)
+    try:
+        frames = torch.from_numpy(np.ndarray(shape, dtype=np.uint8, buffer=source.buf)[start:end])
+        if target is None:
+            return func(frames, *args)
+        # Results go straight into the output block
+        out = torch.from_numpy(np.ndarray(shape, dtype=np.uint8, buffer=target.buf)[start:end])
+        func(frames, *args, out=out)
+        del frames, out
+        return None
+    finally:
+        for block in (source, target):
+            if block is not None:
+                _close(block)
+
+
+def _fan_out(func, frames, args, workers, chunk_size, returns_frames, out=None):
+    workers = usable_workers(workers)
+    bounds = chunk_bounds(frames.shape[0], workers, chunk_size)
+    if workers <= 1 or len(bounds) <= 1 or not can_fork():
+        return [func(frames, *args, out=out)] if returns_frames else [func(frames, *args)]
+
+    frames = frames.contiguous().cpu()
+    shape = tuple(frames.shape)
+    size = max(frames.numel(), 1)
+    source = shared_memory.SharedMemory(create=True, size=size)
+    target = shared_memory.SharedMemory(create=True, size=size) if returns_frames else None
+    try:
+        np.ndarray(shape, dtype=np.uint8, buffer=source.buf)[:] = frames.numpy()
+        # Sized by the request, not the batch, so short batches reuse the pool
+        tasks = [(func, args, source.name, target.name if target else None, shape, start, end) for start, end in bounds]
+        chunk_results = run(_run_chunk, tasks, workers)
+        if returns_frames:
+            if out is None:
+                out = torch.empty(shape, dtype=torch.uint8)
+            out.numpy()[...] = np.ndarray(shape, dtype=np.uint8, buffer=target.buf)
+            return [out]
+        return chunk_results
+    finally:
+        for block in (source, target):
+            if block is not None:
+                _close(block)
+                block.unlink()
+
+
+def map_frames(func, frames, *args, workers=1, chunk_size=0, out=None):
+    """Runs `func(chunk, *args)` over chunks of a uint8 [B,H,W,C] batch and returns the stitched uint8 batch (in `out` if given).
+
+    `func` has to be a module-level function returning a uint8 tensor with the same shape as its chunk, and accept an `out=`
+    tensor to write into, which is what it gets when everything runs in-process (`out` may be `frames` itself).
+    """
+    return _fan_out(func, frames, args, workers, chunk_size, returns_frames=True, out=out)[0]
+
+
+def map_chunks(func, frames, *args, workers=1, chunk_size=0):
+    """Runs `func(chunk, *args)` over chunks of a uint8 [B,H,W,C] batch and returns the per-chunk results in batch order."""
+    return _fan_out(func, frames, args, workers, chunk_size, returns_frames=False)
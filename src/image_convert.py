@@ -0,0 +1,40 @@
+import torch
+
+# Conversions between ComfyUI IMAGE tensors (float32 [B,H,W,C] in [0, 1]) and the uint8 frames the steganography engines work on.
+# Every node converts its whole batch once on the way in and once on the way out, and nothing in between allocates a full float
+# copy of the batch:
+# - to_uint8 scales a few frames at a time through a small float scratch buffer instead of materializing `images * 255`.
+# - The engines write into the uint8 batch in place (`out=frames`), which the node owns since to_uint8 always returns a new tensor.
+# - to_float divides straight into the output tensor, optionally preallocated by the caller.
+# - Channel reordering for libraries that want BGR is a strided numpy view, not a copy.
+# Results are identical to the `(image.numpy() * 255).astype(np.uint8)` / `torch.from_numpy(...).float() / 255.0` round trip.
+
+CHUNK_ELEMENTS = 1 << 22  # float32 scratch elements used by to_uint8 (16 MiB)
+
+
+def to_uint8(images, out=None):
+    """float [B,H,W,C] -> new uint8 tensor (or `out`), truncating like numpy's astype."""
+    if out is None:
+        out = torch.empty(images.shape, dtype=torch.uint8, device=images.device)
+    if images.dtype == torch.uint8:
+        return out.copy_(images)
+    frame_elements = max(images[0].numel(), 1) if images.shape[0] else 1
+    per_chunk = max(1, CHUNK_ELEMENTS // frame_elements)
+    scratch = torch.empty((min(per_chunk, images.shape[0]), *images.shape[1:]), dtype=images.dtype, device=images.device)
+    for start in range(0, images.shape[0], per_chunk):
+        chunk = images[start : start + per_chunk]
+        scaled = torch.mul(chunk, 255, out=scratch[: chunk.shape[0]])
+        out[start : start + chunk.shape[0]].copy_(scaled)
+    return out
+
+
+def to_float(frames, out=None):
+    """uint8 [B,H,W,C] -> float32 in [0, 1], written into `out` if given."""
+    if out is None:
+        out = torch.empty(frames.shape, dtype=torch.float32, device=frames.device)
+    return torch.div(frames, 255.0, out=out)
+
+
+def bgr_view(frame):
+    """uint8 [...,H,W,C] RGB(A) tensor -> numpy BGR view sharing its memory (negative channel stride, no copy)."""
+    return frame.cpu().numpy()[..., 2::-1]
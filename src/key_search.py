@@ -0,0 +1,265 @@
+import itertools
+import time
+
+import numpy as np
+
+from . import cryptanalysis, ngram_model
+
+# Simulated annealing over the keys of the SimpleSubstitution, Keyword and Playfair ciphers, scored with the n-gram tables.
+# The ciphertext is decrypted once into an int array of plaintext letters (n-gram table indexes), and the n-gram log
+# probabilities of that plaintext are kept alongside it. A move swaps two letters of the key, which only changes the plaintext
+# in a few places, so only the n-grams overlapping those positions are looked up again and the score is updated by the
+# difference. Nothing goes through secretpy until the best key is known.
+# - Substitution (SimpleSubstitution and Keyword, which is a substitution with a keyed alphabet): the key maps every ciphertext
+#   letter to a plaintext letter, and starts from matching letter frequencies.
+# - Playfair: the key is the square, and a few moves in ten swap whole rows or columns or transpose it. Digraphs are
+#   decrypted again in one vectorized pass per move, and only the n-grams around the letters that changed are rescored.
+# Every restart anneals for a fixed number of moves from a shuffled key, restarts repeat until the time budget runs out (or
+# for a fixed number of restarts, which makes a seed repeat the same search on any machine), and each worker of the pool
+# runs its own restarts from its own seed.
+
+SUBSTITUTION_MOVES = 20000  # moves per substitution restart
+PLAYFAIR_MOVES = 100000  # moves per Playfair restart
+TEMPERATURE = 8.0  # starting temperature per 100 letters of ciphertext, in log10 probability, cooling down linearly to 0
+SQUARE_MOVES = 0.1  # share of Playfair moves that swap rows or columns or transpose the square
+DEADLINE_CHECK = 1024  # moves between looks at the clock
+
+
+class Plaintext:
+    """A plaintext as table letter indexes, with the n-gram log probability at every position kept up to date."""
+
+    def __init__(self, table, plain):
+        self.n = table.n
+        self.size = len(table.alphabet)
+        self.log_probabilities = table.log_probabilities()
+        self.plain = plain
+        self._offsets = np.arange(self.n)
+        self._weights = self.size ** np.arange(self.n - 1, -1, -1)
+        self.values = self.log_probabilities[self._codes(np.arange(max(len(plain) - self.n + 1, 0)))]
+        self.score = float(self.values.sum())
+
+    def _codes(self, starts):
+        return self.plain[starts[:, None] + self._offsets] @ self._weights
+
+    def starts(self, changed):
+        """Starts of every n-gram overlapping a position where the bool mask `changed` is set, in ascending order."""
+        count = len(self.values)
+        touched = changed[:count].copy()
+        for i in range(1, self.n):
+            touched |= changed[i : i + count]
+        return np.flatnonzero(touched)
+
+    def delta(self, starts):
+        """Score change from the plaintext edits at the n-grams at `starts`, and their new values."""
+        values = self.log_probabilities[self._codes(starts)]
+        return float(values.sum() - self.values[starts].sum()), values
+
+
+def _accept(delta, temperature, draw):
+    # Metropolis rule, `draw` is uniform in [0, 1)
+    return delta >= 0 or (temperature > 0 and draw < 10 ** (delta / temperature))
+
+
+def _temperature(length):
+    return TEMPERATURE * max(length, 1) / 100
+
+
+def substitution_start(ciphertext, table):
+    """Decryption key (ciphertext letter -> plaintext letter) matching the letters by frequency."""
+    size = len(table.alphabet)
+    frequencies = cryptanalysis.letter_log_probabilities(table)
+    cipher_order = np.argsort(-np.bincount(ciphertext, minlength=size), kind="stable")
+    key = np.empty(size, dtype=np.int64)
+    key[cipher_order] = np.argsort(-frequencies, kind="stable")
+    return key
+
+
+def _out_of_time(move, deadline):
+    return move % DEADLINE_CHECK == 0 and time.monotonic() >= deadline
+
+
+def anneal_substitution(ciphertext, table, key, moves, rng, deadline=np.inf):
+    """Anneals a substitution decryption key, returns (score, key). Stops early at `deadline` (a `time.monotonic` time)."""
+    size = len(table.alphabet)
+    text = Plaintext(table, key[ciphertext])
+    masks = [ciphertext == letter for letter in range(size)]
+    positions = [np.flatnonzero(mask) for mask in masks]
+    present = np.flatnonzero([len(letter_positions) for letter_positions in positions])
+    pair_starts = {}  # n-grams touched by swapping the letters of a pair, filled in as pairs come up
+    best_score, best_key = text.score, key.copy()
+    start_temperature = _temperature(len(ciphertext))
+    # Every random number of the run drawn at once
+    firsts = present[rng.integers(len(present), size=moves)].tolist()
+    seconds = rng.integers(size, size=moves).tolist()
+    draws = rng.random(moves).tolist()
+    for move, x, y, draw in zip(range(moves), firsts, seconds, draws):
+        if _out_of_time(move, deadline):
+            break
+        if x == y:
+            continue
+        key[x], key[y] = key[y], key[x]
+        text.plain[positions[x]] = key[x]
+        text.plain[positions[y]] = key[y]
+        pair = (x, y) if x < y else (y, x)
+        if pair not in pair_starts:
+            pair_starts[pair] = text.starts(masks[x] | masks[y])
+        affected = pair_starts[pair]
+        delta, values = text.delta(affected)
+        if _accept(delta, start_temperature * (1 - move / moves), draw):
+            text.values[affected] = values
+            text.score += delta
+            if text.score > best_score:
+                best_score, best_key = text.score, key.copy()
+        else:
+            key[x], key[y] = key[y], key[x]
+            text.plain[positions[x]] = key[x]
+            text.plain[positions[y]] = key[y]
+    return best_score, best_key
+
+
+class PlayfairSquare:
+    """Vectorized Playfair decryption of digraph arrays, with the same rules as secretpy's Playfair on a full square.
+
+    Where a digraph decrypts to only depends on where its two letters sit, so the plaintext grid positions of every pair of
+    ciphertext positions are worked out once, and decrypting under any square is a few lookups.
+    """
+
+    def __init__(self, side, letters):
+        self.side = side
+        self.letters = letters  # square letter -> table letter index
+        cells = side * side
+        row_a, column_a = np.divmod(np.repeat(np.arange(cells), cells), side)
+        row_b, column_b = np.divmod(np.tile(np.arange(cells), cells), side)
+        same_row = row_a == row_b
+        same_column = ~same_row & (column_a == column_b)
+        rectangle = ~same_row & ~same_column
+        # Same row: one column to the left, same column: one row up, otherwise the other corners of the rectangle
+        new_column_a = np.where(same_row, (column_a - 1) % side, np.where(rectangle, column_b, column_a))
+        new_column_b = np.where(same_row, (column_b - 1) % side, np.where(rectangle, column_a, column_b))
+        new_row_a = np.where(same_column, (row_a - 1) % side, row_a)
+        new_row_b = np.where(same_column, (row_b - 1) % side, row_b)
+        # [cells * cells, 2] plaintext positions of the digraph at positions (a, b), indexed by a * cells + b
+        self.decrypted = np.stack([new_row_a * side + new_column_a, new_row_b * side + new_column_b], axis=1)
+
+    def decrypt(self, square, first, second):
+        """Plaintext digraphs (as a [D, 2] array of square letters) of the ciphertext digraphs `first[i]`, `second[i]`.
+        `square[g]` is the letter at grid position g."""
+        position = np.empty(len(square), dtype=np.int64)
+        position[square] = np.arange(len(square))
+        return square[self.decrypted[position[first] * len(square) + position[second]]]
+
+    def plaintext(self, square, first, second):
+        """The plaintext as table letter indexes."""
+        return self.letters[self.decrypt(square, first, second).ravel()]
+
+
+def _square_move(square, side, rng):
+    grid = square.reshape(side, side).copy()
+    kind = rng.integers(3)
+    if kind == 0:
+        i, j = rng.choice(side, 2, replace=False)
+        grid[[i, j]] = grid[[j, i]]
+    elif kind == 1:
+        i, j = rng.choice(side, 2, replace=False)
+        grid[:, [i, j]] = grid[:, [j, i]]
+    else:
+        grid = grid.T
+    return grid.ravel()
+
+
+def anneal_playfair(ciphertext, table, playfair, square, moves, rng, deadline=np.inf):
+    """Anneals a Playfair square (grid position -> square letter), returns (score, square). Stops early at `deadline`.
+
+    A digraph's plaintext depends on where its letters sit and on which letters sit where they point, so every move decrypts
+    all digraphs again (one vectorized pass) and only the n-grams around the letters that came out different are rescored.
+    """
+    first, second = ciphertext[0::2], ciphertext[1::2]
+    text = Plaintext(table, playfair.plaintext(square, first, second))
+    best_score, best_square = text.score, square.copy()
+    start_temperature = _temperature(len(ciphertext))
+    reshapes = (rng.random(moves) < SQUARE_MOVES).tolist()
+    swaps = rng.integers(len(square), size=(moves, 2)).tolist()
+    draws = rng.random(moves).tolist()
+    for move, reshape, (i, j), draw in zip(range(moves), reshapes, swaps, draws):
+        if _out_of_time(move, deadline):
+            break
+        if reshape:
+            candidate = _square_move(square, playfair.side, rng)
+        elif i != j:
+            candidate = square.copy()
+            candidate[i], candidate[j] = square[j], square[i]
+        else:
+            continue
+        previous = text.plain
+        text.plain = playfair.plaintext(candidate, first, second)
+        affected = text.starts(text.plain != previous)
+        delta, values = text.delta(affected)
+        if _accept(delta, start_temperature * (1 - move / moves), draw):
+            square = candidate
+            text.values[affected] = values
+            text.score += delta
+            if text.score > best_score:
+                best_score, best_square = text.score, square.copy()
+        else:
+            text.plain = previous
+    return best_score, best_square
+
+
+def playfair_side(alphabet):
+    """Side of the Playfair square of `alphabet`, which has to fill it exactly."""
+    side = int(round(len(alphabet) ** 0.5))
+    if side * side != len(alphabet) or side < 2:
+        raise ValueError(f"The Playfair solver needs a square alphabet (like ENGLISH_SQUARE_IJ), this one has {len(alphabet)} letters.")
+    return side
+
+
+def search(cipher, ciphertext, alphabet, language, seconds, seed, restarts=0):
+    """Restarts annealing until `seconds` have passed (cutting the last restart short), returns the best (score, key) found.
+
+    With `restarts`, runs exactly that many restarts instead and never looks at the clock, so a seed always gives the same key.
+
+    The key is a decryption key (ciphertext letter -> plaintext letter) for substitutions, and a square (grid position ->
+    letter) for Playfair, both as alphabet indexes. One pool task: every worker calls this with its own seed.
+    """
+    table = ngram_model.get_table(language)
+    rng = np.random.default_rng(seed)
+    deadline = np.inf if restarts else time.monotonic() + seconds
+    best = (-np.inf, None)
+    if cipher == "Playfair":
+        letters = ngram_model.encode("".join(entry[0] for entry in alphabet), table.alphabet)
+        if len(letters) != len(alphabet):
+            raise ValueError(f"The square has letters the {language} n-gram table does not know.")
+        playfair = PlayfairSquare(playfair_side(alphabet), letters)
+    for restart in itertools.count(1):
+        if cipher == "Playfair":
+            square = rng.permutation(len(alphabet))
+            result = anneal_playfair(ciphertext, table, playfair, square, PLAYFAIR_MOVES, rng, deadline)
+        else:
+            key = substitution_start(ciphertext, table)
+            if best[1] is not None:  # Later restarts shake up the frequency match
+                for _ in range(len(key) // 2):
+                    i, j = rng.integers(len(key), size=2)
+                    key[i], key[j] = key[j], key[i]
+            result = anneal_substitution(ciphertext, table, key, SUBSTITUTION_MOVES, rng, deadline)
+        if result[0] > best[0]:
+            best = result
+        if restart == restarts or time.monotonic() >= deadline:
+            return best
+
+
+def substitution_key(decryption_key, alphabet):
+    """The SimpleSubstitution key (the ciphertext letter of every plaintext letter) of a decryption key."""
+    inverse = np.empty_like(decryption_key)
+    inverse[decryption_key] = np.arange(len(decryption_key))
+    return "".join(alphabet[i][0] for i in inverse.tolist())
+
+
+def keyed_alphabet(keyword, alphabet):
+    """The Keyword cipher's alphabet for `keyword`: its distinct letters, then the rest of the alphabet in order."""
+    firsts = [letters[0] for letters in alphabet]
+    return "".join(dict.fromkeys(list(keyword) + firsts))
+
+
+def shortest_keyword(key_alphabet, alphabet):
+    """The shortest Keyword key giving the keyed alphabet `key_alphabet` (at worst, the whole of it)."""
+    return next(key_alphabet[:end] for end in range(len(key_alphabet) + 1) if keyed_alphabet(key_alphabet[:end], alphabet) == key_alphabet)
@@ -0,0 +1,213 @@
+import functools
+import math
+
+import numpy as np
+from secretpy import alphabets as al
+
+# Shared alphabets and key squares for the cipher nodes, built once per process instead of on every node run.
+# - `resolve_alphabet` turns what the alphabet input holds (a secretpy alphabet name or the letters themselves) into the
+#   tuple or string the ciphers take.
+# - `key_square` lays an alphabet and key out the way secretpy's PolybiusSquare does, with lookup arrays both ways: code
+#   point -> grid position (row * side + column) and grid position -> letter. Squares are cached by (alphabet, key, family).
+# The digraph ciphers built on those squares (Playfair, TwoSquare, FourSquare, and ThreeSquare decryption) run from them
+# here, a whole text per numpy pass, with output identical to secretpy. `crypt` returns None for anything it cannot take
+# (characters missing from the square, squares with a ragged last row, bad keys), and the caller runs secretpy itself.
+# ThreeSquare encryption picks random letters, so it stays with secretpy.
+
+MAX_ALPHABETS = 64
+MAX_SQUARES = 256
+PLAYFAIR_PADDING = "x"  # secretpy's Playfair pads doubled letters and odd texts with x
+
+
+@functools.lru_cache(maxsize=MAX_ALPHABETS)
+def resolve_alphabet(alphabet, as_tuple=True):
+    """The alphabet a node's alphabet input stands for, as a tuple of letter entries or a string. None when blank."""
+    if not alphabet.strip():
+        return None
+    predefined = getattr(al, alphabet.strip().upper(), alphabet)
+    return tuple(predefined) if as_tuple else "".join(predefined)
+
+
+def _keyed_entries(alphabet, key):
+    # The order PolybiusSquare puts the alphabet in: the key's distinct letters, then the rest of the alphabet
+    if not key:
+        return tuple(alphabet)
+    indexes = {c: i for i, letters in enumerate(alphabet) for c in letters}
+    key_indexes = dict.fromkeys(indexes[char] for char in key)
+    return tuple(alphabet[i] for i in key_indexes) + tuple(a for i, a in enumerate(alphabet) if i not in key_indexes)
+
+
+SQUARE_FAMILIES = {"Polybius": _keyed_entries}  # cipher family -> how its key orders the alphabet
+
+
+class KeySquare:
+    """An alphabet laid out on a grid of `side` columns, row by row, like secretpy's PolybiusSquare."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.side = int(math.ceil(math.sqrt(len(entries))))
+        self.rows = len(entries) // self.side
+        self.coordinates = {c: divmod(i, self.side) for i, letters in enumerate(entries) for c in letters}
+        # Code point -> grid position, the last slot (-1) catches every code point past the largest letter
+        positions = {c: i for i, letters in enumerate(entries) for c in letters}
+        self.lookup = np.full(max(map(ord, positions), default=0) + 2, -1, dtype=np.int64)
+        self.lookup[[ord(c) for c in positions]] = list(positions.values())
+        self.letters = np.array([ord(letters[0]) for letters in entries], dtype="<u4")  # grid position -> code point
+
+    @property
+    def full(self):
+        """Whether every row is complete, so every (row, column) holds a letter."""
+        return self.rows * self.side == len(self.entries)
+
+    def get_coordinates(self, char):
+        return self.coordinates[char]
+
+    def get_char(self, row, column):
+        return self.entries[row * self.side + column][0]
+
+    def positions(self, points):
+        """Grid positions of an array of code points, or None if one of them is not in the square."""
+        index = self.lookup[np.minimum(points, len(self.lookup) - 1)]
+        return None if (index < 0).any() else index
+
+
+@functools.lru_cache(maxsize=MAX_SQUARES)
+def key_square(alphabet, key=None, family="Polybius"):
+    """The shared `KeySquare` of an alphabet (a tuple of letter entries or a string) and key."""
+    return KeySquare(SQUARE_FAMILIES[family](alphabet, key))
+
+
+def _code_points(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+
+
+def _text(points):
+    return np.ascontiguousarray(points, dtype="<u4").tobytes().decode("utf-32-le")
+
+
+def _interleave(first, second):
+    return np.stack([first, second], axis=1).ravel()
+
+
+def _playfair_pairs(text):
+    # secretpy's digraph split: an x goes between doubled letters of a pair, and after a last letter left on its own
+    pairs = []
+    i = 1
+    while i < len(text):
+        pairs.append(text[i - 1])
+        if text[i - 1] == text[i]:
+            pairs.append(PLAYFAIR_PADDING)
+            i += 1
+        else:
+            pairs.append(text[i])
+            i += 2
+    if i == len(text):
+        pairs.append(text[i - 1])
+        pairs.append(PLAYFAIR_PADDING)
+    return "".join(pairs)
+
+
+def _playfair(alphabet, text, key, encrypt):
+    square = key_square(alphabet, key)
+    if encrypt:
+        text = _playfair_pairs(text)
+    elif not text:
+        return None  # secretpy fails on it
+    positions = square.positions(_code_points(text))
+    if positions is None:
+        return None
+    step = 1 if encrypt else -1
+    row_a, column_a = np.divmod(positions[0 : len(positions) - 1 : 2], square.side)
+    row_b, column_b = np.divmod(positions[1::2], square.side)
+    same_row = row_a == row_b
+    same_column = ~same_row & (column_a == column_b)
+    rectangle = ~same_row & ~same_column
+    # Same row: one column along, same column: one row along, otherwise the other corners of the rectangle
+    new_column_a = np.where(same_row, (column_a + step) % square.side, np.where(rectangle, column_b, column_a))
+    new_column_b = np.where(same_row, (column_b + step) % square.side, np.where(rectangle, column_a, column_b))
+    new_row_a = np.where(same_column, (row_a + step) % square.rows, row_a)
+    new_row_b = np.where(same_column, (row_b + step) % square.rows, row_b)
+    first = square.letters[new_row_a * square.side + new_column_a]
+    second = square.letters[new_row_b * square.side + new_column_b]
+    keep = np.ones(len(second), dtype=bool)
+    if not encrypt:
+        # Drops the x between two same letters and the one at the very end
+        padding = second == ord(PLAYFAIR_PADDING)
+        keep[:-1] = ~(padding[:-1] & (first[:-1] == first[1:]))
+        keep[-1] = not padding[-1]
+    letters = _interleave(first, second)
+    return _text(letters[_interleave(np.ones(len(first), dtype=bool), keep)])
+
+
+def _split_digraphs(alphabet, text):
+    # Even and odd letters, the odd ones padded with the alphabet's last letter like TwoSquare and FourSquare do
+    points = _code_points(text)
+    odd = points[1::2]
+    if len(points) % 2:
+        odd = np.append(odd, np.uint32(ord(alphabet[-1][0])))
+    return points[0::2], odd
+
+
+def _two_square(alphabet, text, key, encrypt):
+    first_square, second_square = key_square(alphabet, key[0]), key_square(alphabet, key[1])
+    even, odd = _split_digraphs(alphabet, text)
+    even, odd = first_square.positions(even), second_square.positions(odd)
+    if even is None or odd is None:
+        return None
+    row_1, column_1 = np.divmod(even, first_square.side)
+    row_2, column_2 = np.divmod(odd, second_square.side)
+    same_column = column_1 == column_2
+    row_1, row_2 = np.where(same_column, row_2, row_1), np.where(same_column, row_1, row_2)
+    first = first_square.letters[row_1 * first_square.side + column_2]
+    second = second_square.letters[row_2 * second_square.side + column_1]
+    return _text(_interleave(first, second))
+
+
+def _four_square(alphabet, text, key, encrypt):
+    keyed = key_square(alphabet, key[0]), key_square(alphabet, key[1])
+    plain = key_square(alphabet)
+    # Letters are read from the plain squares and written from the keyed ones to encrypt, the other way around to decrypt
+    (read_even, read_odd), (write_even, write_odd) = ((plain, plain), keyed) if encrypt else (keyed, (plain, plain))
+    even, odd = _split_digraphs(alphabet, text)
+    even, odd = read_even.positions(even), read_odd.positions(odd)
+    if even is None or odd is None:
+        return None
+    row_even, column_even = np.divmod(even, plain.side)
+    row_odd, column_odd = np.divmod(odd, plain.side)
+    first = write_even.letters[row_even * plain.side + column_odd]
+    second = write_odd.letters[row_odd * plain.side + column_even]
+    return _text(_interleave(first, second))
+
+
+def _three_square(alphabet, text, key, encrypt):
+    if encrypt:
+        return None  # secretpy picks random letters
+    first_square, second_square, third_square = (key_square(alphabet, letters) for letters in key)
+    points = _code_points(text)
+    end = len(points) - len(points) % 3
+    # Every triple is read as (a letter of square 1, one of square 3, one of square 2)
+    left = first_square.positions(points[0:end:3])
+    middle = third_square.positions(points[1:end:3])
+    right = second_square.positions(points[2:end:3])
+    if left is None or middle is None or right is None:
+        return None
+    side = first_square.side
+    row_middle, column_middle = np.divmod(middle, side)
+    first = first_square.letters[row_middle * side + left % side]
+    second = second_square.letters[right // side * side + column_middle]
+    return _text(_interleave(first, second))
+
+
+CRYPTS = {"Playfair": _playfair, "TwoSquare": _two_square, "FourSquare": _four_square, "ThreeSquare": _three_square}
+
+
+def crypt(name, text, alphabet, key, encrypt):
+    """The secretpy `encrypt`/`decrypt` result of a square cipher, or None when the caller has to fall back to secretpy."""
+    if name not in CRYPTS or not alphabet:
+        return None
+    try:
+        if not key_square(alphabet).full:
+            return None  # secretpy reads past the last letter on a ragged square
+        return CRYPTS[name](alphabet, text, key, encrypt)
+    except (KeyError, ValueError, TypeError, IndexError, UnicodeEncodeError):
+        return None  # Keys and alphabets secretpy rejects, or unhashable ones the squares cannot be cached for
@@ -0,0 +1,624 @@
+import os
+import math
+import struct
+import itertools
+import threading
+from collections import OrderedDict, namedtuple
+from importlib import metadata
+
+import cv2
+import numpy as np
+import stegano
+import torch
+
+# Batched re-implementation of `stegano.lsb.hide`/`stegano.lsb.reveal` working directly on [B,H,W,C] tensors.
+# The payload layout is the same one Stegano writes, so images stay interchangeable with the library:
+# - Payload is the byte-length prefix "<n>:" followed by the message encoded to bytes, 8 bits per byte, MSB first.
+# - Bits are padded with zeros to a multiple of 3 and written 3 at a time into the R, G, B LSBs of consecutive pixels
+#   (row-major, the order of the "None"/identity generator). Alpha is never touched.
+# For more information, check https://github.com/cedricbonhomme/Stegano/blob/master/stegano/lsb/lsb.py
+
+# With a generator, pixel k of the payload goes to flat pixel index generator[k] instead of k (stegano computes
+# col = x % width, row = x // width, which is the same thing), so generators reduce to an index array that can be
+# computed once and reused for every frame.
+
+ENCODINGS = ("UTF-8", "UTF-32LE")
+PREFIX_WINDOW = 32  # bytes read to find the "<n>:" prefix, far more digits than any image can hold
+
+# Generator index cache. Sequences only depend on (generator, m) and the image size, so they are materialized once
+# and reused across frames and queue items. Anything bigger than SPILL_THRESHOLD positions is written to CACHE_DIR and
+# memory-mapped from there, which also keeps it around across ComfyUI restarts. The directory is per user and private
+# (0o700, owned by us, or nothing is spilled), file names carry the format and Stegano versions so an upgrade never
+# serves old sequences, and every file is checked to be a valid index array for its image before it is used.
+CACHE_DIR = os.environ.get(
+    "ARG_TOOLKIT_CACHE_DIR",
+    os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(os.path.join("~", ".cache")), "comfyui-arg-toolkit", "lsb_positions"
+    ),
+)
+POSITIONS_VERSION = 2
+try:
+    STEGANO_VERSION = metadata.version("stegano")
+except metadata.PackageNotFoundError:
+    STEGANO_VERSION = "unknown"
+SPILL_THRESHOLD = 1 << 16
+MAX_CACHED_SEQUENCES = 32
+SEEDED_GENERATORS = ("LFSR", "ackermann", "ackermann_naive")  # the ones that take `m`
+
+_BIT_SHIFTS = torch.arange(7, -1, -1, dtype=torch.uint8)
+
+
+def payload_bits(message, encoding="UTF-8"):
+    """Returns the payload as a [N,3] uint8 tensor of bits, one row per pixel."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    if not message:
+        raise ValueError("Message length is zero, there is nothing to hide.")
+    return _framed_bits(message.encode(encoding))
+
+
+def _framed_bits(body):
+    # "<n>:" + body, MSB first, zero padded to whole pixels
+    data = torch.frombuffer(bytearray(f"{len(body)}:".encode("ascii") + body), dtype=torch.uint8)
+    bits = ((data.unsqueeze(-1) >> _BIT_SHIFTS) & 1).flatten()
+    padding = (-bits.numel()) % 3
+    if padding:
+        bits = torch.cat([bits, bits.new_zeros(padding)])
+    return bits.view(-1, 3)
+
+
+_positions_cache = OrderedDict()
+_positions_lock = threading.Lock()
+
+
+def _sieve(limit):
+    is_prime = np.ones(limit, dtype=bool)
+    is_prime[: min(limit, 2)] = False
+    for p in range(2, math.isqrt(max(limit - 1, 0)) + 1):
+        if is_prime[p]:
+            is_prime[p * p :: p] = False
+    return is_prime
+
+
+def _generate_sequence(generator_type, m, limit, count):
+    """First `count` values of the generator that fall inside [0, limit), and whether the generator left that range."""
+    if generator_type in ("None", "identity"):
+        values = np.arange(min(count, limit), dtype=np.int64)
+        return values, count >= limit
+    if generator_type == "triangular_numbers":
+        k = np.arange(count, dtype=np.int64)
+        values = k * (k + 1) // 2
+        inside = values < limit
+        return values[inside], not inside.all()
+    if generator_type in ("eratosthenes", "composite"):
+        # Both are ascending, so every prime (or composite >= 4) below the pixel count is the complete usable sequence.
+        is_prime = _sieve(limit)
+        if generator_type == "composite":
+            is_prime = ~is_prime
+            is_prime[: min(limit, 4)] = False
+        values = np.flatnonzero(is_prime)
+        return values[:count].astype(np.int64), len(values) <= count
+    if generator_type in ("ackermann_fast", "ackermann_slow"):
+        raise ValueError(f"'{generator_type}' returns a single number, not a sequence. Use 'ackermann' or 'ackermann_naive' instead.")
+    if generator_type == "ackermann_naive":
+        # Same values as `ackermann`, without recursing once per unit of the result.
+        generator = stegano.lsb.generators.ackermann(m=m)
+    elif generator_type in SEEDED_GENERATORS:
+        generator = getattr(stegano.lsb.generators, generator_type)(m=m)
+    else:
+        generator = getattr(stegano.lsb.generators, generator_type)()
+    values = []
+    for value in generator:
+        if value < 0 or value >= limit:
+            return np.array(values, dtype=np.int64), True
+        values.append(value)
+        if len(values) == count:
+            break
+    return np.array(values, dtype=np.int64), False
+
+
+def _cache_dir():
+    # CACHE_DIR once it exists as a private directory of this user, None if it cannot be (nothing is spilled then)
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        info = os.stat(CACHE_DIR)
+    except OSError:
+        return None
+    if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+        return None
+    return CACHE_DIR
+
+
+def _spill_path(directory, key):
+    name = "_".join(str(part) for part in (f"v{POSITIONS_VERSION}", f"stegano{STEGANO_VERSION}") + key)
+    return os.path.join(directory, name + ".npy")
+
+
+def _valid_positions(positions, key):
+    # Flat pixel indices inside the key's image, with the -1 end marker only in last place
+    pixels = key[2] * key[3]
+    if positions.dtype != np.int64 or positions.ndim != 1:
+        return False
+    return not len(positions) or (positions[:-1].min(initial=0) >= 0 and positions[-1] >= -1 and positions.max() < pixels)
+
+
+def _store_positions(key, positions):
+    directory = _cache_dir() if len(positions) > SPILL_THRESHOLD else None
+    if directory is not None:
+        path = _spill_path(directory, key)
+        try:
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                np.save(f, positions)
+            os.replace(temp_path, path)
+            positions = np.load(path, mmap_mode="r")
+        except OSError:
+            pass  # Read-only or full disk, keep it in memory instead
+    _positions_cache[key] = positions
+    _positions_cache.move_to_end(key)
+    while len(_positions_cache) > MAX_CACHED_SEQUENCES:
+        _positions_cache.popitem(last=False)
+    return positions
+
+
+def _cached_positions(key):
+    positions = _positions_cache.get(key)
+    if positions is None:
+        directory = _cache_dir()
+        if directory is None or not os.path.exists(_spill_path(directory, key)):
+            return None
+        try:
+            positions = np.load(_spill_path(directory, key), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if not _valid_positions(positions, key):
+            return None  # Regenerated and written over
+        _positions_cache[key] = positions
+    _positions_cache.move_to_end(key)
+    return positions
+
+
+def generator_positions(generator_type, m, height, width, count):
+    """Flat pixel indices (int64) of the first `count` pixels a Stegano generator visits in a `height` x `width` image.
+
+    Fewer than `count` are returned when the generator walks off the image first. Cached entries end with -1 once the
+    generator is known to leave the image, and are regenerated with geometric growth when a longer prefix is needed.
+    """
+    key = (generator_type, m if generator_type in SEEDED_GENERATORS else None, height, width)
+    with _positions_lock:
+        positions = _cached_positions(key)
+        exhausted = positions is not None and len(positions) > 0 and positions[-1] == -1
+        available = 0 if positions is None else len(positions) - exhausted
+        if available < count and not exhausted:
+            target = max(count, 2 * available)
+            values, exhausted = _generate_sequence(generator_type, m, height * width, target)
+            if exhausted:
+                values = np.append(values, -1)
+            positions = _store_positions(key, values)
+            available = len(positions) - exhausted
+    return np.array(positions[: min(count, available)], dtype=np.int64)
+
+
+def _pixel_index(generator_type, m, height, width, count):
+    # None means "the first `count` pixels", which is a plain slice rather than a gather.
+    if generator_type in ("None", "identity"):
+        return None if count <= height * width else np.arange(height * width)
+    return generator_positions(generator_type, m, height, width, count)
+
+
+def shi_tomasi_positions(frame, max_corners=100, quality=0.01, min_distance=10.0):
+    """Flat pixel indices of the Shi-Tomasi corners of one uint8 [H,W,C] frame, straight from memory.
+
+    Same parameters and the same OpenCV call as `stegano.lsb.generators.shi_tomashi`, which would otherwise need the frame
+    written out as a PNG and read back (lossless, so skipping the round trip gives identical corners).
+    """
+    rgb = np.ascontiguousarray(frame[..., :3].cpu().numpy())
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    corners = cv2.goodFeaturesToTrack(gray, max_corners, quality, min_distance)
+    if corners is None:
+        return np.empty(0, dtype=np.int64)
+    corners = np.intp(corners).reshape(-1, 2)
+    return (corners[:, 1] * frame.shape[1] + corners[:, 0]).astype(np.int64)
+
+
+def payload_pixels(byte_count):
+    """Pixels `hide` writes for a message of `byte_count` bytes: the "<n>:" prefix plus the message, 3 bits per pixel."""
+    return math.ceil((len(str(byte_count)) + 1 + byte_count) * 8 / 3)
+
+
+def max_message_bytes(pixels):
+    """Longest message (in encoded bytes) that fits in `pixels` payload pixels, 0 if not even one byte does."""
+    available = pixels * 3 // 8
+    best = 0
+    for digits in range(1, len(str(available)) + 1):
+        # Messages of `digits` digits long lengths all carry the same prefix overhead
+        length = min(available - digits - 1, 10**digits - 1)
+        if length >= 10 ** (digits - 1):
+            best = max(best, length)
+    return best
+
+
+def capacity_pixels(generator_type, m, height, width, limit=None):
+    """Payload pixels a generator offers in a `height` x `width` frame, without touching any pixel. Not for Shi-Tomasi.
+
+    Closed forms where the sequence has one, otherwise the (cached) generator positions, looking at most `limit` pixels ahead.
+    LFSR cycles through 2^k - 1 states, past that it only overwrites its own earlier pixels.
+    """
+    total = height * width
+    limit = total if limit is None else min(limit, total)
+    if generator_type in ("None", "identity"):
+        return limit
+    if generator_type == "triangular_numbers":
+        return min(limit, (math.isqrt(8 * (total - 1) + 1) - 1) // 2 + 1 if total else 0)
+    if generator_type in ("eratosthenes", "composite"):
+        primes = int(_sieve(total).sum())
+        return min(limit, primes if generator_type == "eratosthenes" else max(total - 2 - primes, 0))
+    if generator_type == "LFSR":
+        period = 2 ** (m.bit_length() - 1) - 1
+        if period < total:  # Every state is a pixel of the frame
+            return min(limit, period)
+    return len(generator_positions(generator_type, m, height, width, limit))
+
+
+def check_capacity(message, encoding, generator_type, m, height, width):
+    """Raises before any pixel is written if `message` does not fit a `height` x `width` frame with this generator."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    if not message:
+        raise ValueError("Message length is zero, there is nothing to hide.")
+    byte_count = len(message.encode(encoding))
+    needed = payload_pixels(byte_count)
+    available = capacity_pixels(generator_type, m, height, width, limit=needed)
+    if available < needed:
+        raise ValueError(
+            f"The message you want to hide is too long: {byte_count} bytes, the '{generator_type}' generator fits "
+            f"{max_message_bytes(capacity_pixels(generator_type, m, height, width))} bytes in a {width}x{height} image."
+        )
+
+
+def _embed(pixels, index, bits):
+    # pixels: [B, H*W, C] view that gets written in place, index: flat pixel indices or None for a straight run.
+    if (pixels.shape[1] if index is None else len(index)) < bits.shape[0]:
+        raise ValueError(f"The message you want to hide is too long: {bits.shape[0] * 3 // 8} bytes for {pixels.shape[1]} pixels.")
+    if index is None:
+        target = pixels[:, : bits.shape[0], :3]
+        target.copy_((target & 0xFE) | bits)
+        return
+    index = index[: bits.shape[0]]
+    if len(np.unique(index)) < len(index):
+        # Generators like LFSR revisit pixels. Stegano writes them in order, so the last visit wins.
+        last_visit = len(index) - 1 - np.unique(index[::-1], return_index=True)[1]
+        index, bits = index[last_visit], bits[torch.from_numpy(last_visit).to(bits.device)]
+    index = torch.from_numpy(index).to(pixels.device)
+    selected = pixels.index_select(1, index)
+    selected[..., :3] = (selected[..., :3] & 0xFE) | bits
+    pixels.index_copy_(1, index, selected)
+
+
+def hide(frames, message, encoding="UTF-8", generator_type="None", m=1, out=None):
+    """Hides `message` in every frame of a uint8 [B,H,W,C] batch, returns a new tensor or `out` (which may be `frames` itself).
+
+    Every generator except Shi-Tomasi visits the same pixels in every frame, so the whole batch is written in one pass.
+    """
+    bits = payload_bits(message, encoding).to(frames.device)
+    B, H, W, C = frames.shape
+    if out is None:
+        out = frames.clone(memory_format=torch.contiguous_format)
+    elif out is not frames:
+        out.copy_(frames)
+    pixels = out.view(B, H * W, C)
+    if generator_type == "shi_tomashi":
+        # Corners of every frame are found up front, so a frame with too few fails before anything is written
+        corners = [shi_tomasi_positions(frames[i]) for i in range(B)]
+        shortest = min(range(B), key=lambda i: len(corners[i]), default=None)
+        if shortest is not None and len(corners[shortest]) < bits.shape[0]:
+            raise ValueError(
+                f"The message you want to hide is too long: frame {shortest} only has {len(corners[shortest])} corners "
+                f"for {bits.shape[0]} pixels of payload."
+            )
+        for i in range(B):
+            _embed(pixels[i : i + 1], corners[i], bits)
+    else:
+        _embed(pixels, _pixel_index(generator_type, m, H, W, bits.shape[0]), bits)
+    return out
+
+
+def _pack_bytes(channels, byte_count):
+    # channels: [B, N] uint8 of colour components in payload order, only the first byte_count * 8 LSBs are read.
+    bits = (channels[:, : byte_count * 8] & 1).view(channels.shape[0], byte_count, 8)
+    return (bits << _BIT_SHIFTS.to(channels.device)).sum(dim=-1, dtype=torch.uint8).cpu().numpy()
+
+
+def _parse_prefix(head):
+    # Mirrors `stegano.tools.Revealer`: everything before the first ":" has to be a decimal length.
+    separator = head.find(b":")
+    if separator <= 0 or not head[:separator].isdigit():
+        raise IndexError("Impossible to detect message.")
+    return separator + 1, int(head[:separator])
+
+
+def _extract_bytes(pixels, pixel_index):
+    # pixel_index(count) gives the flat indices of the first `count` pixels to read, or None for a straight run.
+    B = pixels.shape[0]
+
+    def read_bytes(byte_count):
+        pixel_count = math.ceil(byte_count * 8 / 3)
+        index = pixel_index(pixel_count)
+        if index is None:
+            channels = pixels[:, :pixel_count, :3]
+        else:
+            channels = pixels.index_select(1, torch.from_numpy(index).to(pixels.device))[..., :3]
+        channels = channels.reshape(B, -1)
+        return _pack_bytes(channels, min(byte_count, channels.shape[1] // 8))
+
+    head = read_bytes(PREFIX_WINDOW)
+    spans = [_parse_prefix(head[i].tobytes()) for i in range(B)]
+    needed = max(start + length for start, length in spans)
+    body = read_bytes(needed)
+    if body.shape[1] < needed:
+        raise IndexError("Impossible to detect message.")
+
+    return [body[i, start : start + length].tobytes() for i, (start, length) in enumerate(spans)]
+
+
+def _extract(pixels, pixel_index, encoding):
+    messages = []
+    for payload in _extract_bytes(pixels, pixel_index):
+        try:
+            messages.append(payload.decode(encoding))
+        except UnicodeDecodeError as e:
+            raise IndexError("Impossible to detect message.") from e
+    return messages
+
+
+def reveal(frames, encoding="UTF-8", generator_type="None", m=1):
+    """Reads the hidden message of every frame in a uint8 [B,H,W,C] batch, returns a list of strings."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    B, H, W, C = frames.shape
+    pixels = frames.reshape(B, H * W, C)
+    if generator_type == "shi_tomashi":
+        messages = []
+        for i in range(B):
+            corners = shi_tomasi_positions(frames[i])
+            messages += _extract(pixels[i : i + 1], lambda count: corners[:count], encoding)
+        return messages
+    return _extract(pixels, lambda count: _pixel_index(generator_type, m, H, W, count), encoding)
+
+
+# Sharded payloads: one message split over the frames of a batch instead of repeated in every frame.
+# Every frame still holds a regular "<n>:" framed payload, whose body is a shard header followed by a slice of the encoded
+# message. The header carries the absolute offset, so shards can arrive (and be written into the result) in any order.
+SHARD_MAGIC = b"ARGS"
+SHARD_HEADER = struct.Struct(">4sIIQQ")  # magic, shard index, shard count, offset, total message bytes
+
+
+def _frame_index_fn(frames, generator_type, m, i):
+    # pixel_index function for frame i alone, see `_extract_bytes`
+    H, W = frames.shape[1], frames.shape[2]
+    if generator_type == "shi_tomashi":
+        corners = shi_tomasi_positions(frames[i])
+        return lambda count: corners[:count]
+    return lambda count: _pixel_index(generator_type, m, H, W, count)
+
+
+def iter_shards(data, capacities):
+    """Yields (frame index, shard body) for `data` spread over frames that hold `capacities[i]` framed bytes each.
+
+    Frames are filled in order, so the fewest possible frames are touched. Raises before yielding anything if the whole batch
+    cannot hold the data.
+    """
+    sizes = [max(capacity - SHARD_HEADER.size, 0) for capacity in capacities]
+    if sum(sizes) < len(data):
+        raise ValueError(
+            f"The message you want to hide is too long: {len(data)} bytes, the batch holds {sum(sizes)} bytes when sharded "
+            f"over {len(capacities)} frames."
+        )
+    plan, offset = [], 0
+    for i, size in enumerate(sizes):
+        if offset >= len(data):
+            break
+        if size:
+            plan.append((i, offset, min(size, len(data) - offset)))
+            offset += plan[-1][2]
+    view = memoryview(data)
+    for index, (i, offset, size) in enumerate(plan):
+        yield i, SHARD_HEADER.pack(SHARD_MAGIC, index, len(plan), offset, len(data)) + view[offset : offset + size].tobytes()
+
+
+def hide_sharded(frames, message, encoding="UTF-8", generator_type="None", m=1, out=None):
+    """Hides one `message` spread over the frames of a uint8 [B,H,W,C] batch, returns a new tensor or `out`.
+
+    Frames are written one shard at a time, so only one frame worth of payload bits exists at any point. Frames past the last
+    shard are left as they are.
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    if not message:
+        raise ValueError("Message length is zero, there is nothing to hide.")
+    B, H, W, C = frames.shape
+    if generator_type == "shi_tomashi":
+        corners = [shi_tomasi_positions(frames[i]) for i in range(B)]
+        capacities = [max_message_bytes(len(positions)) for positions in corners]
+    else:
+        capacities = [max_message_bytes(capacity_pixels(generator_type, m, H, W))] * B
+    shards = iter_shards(message.encode(encoding), capacities)
+    first = next(shards)  # raises here if it does not fit, before anything is written
+    if out is None:
+        out = frames.clone(memory_format=torch.contiguous_format)
+    elif out is not frames:
+        out.copy_(frames)
+    pixels = out.view(B, H * W, C)
+    for i, body in itertools.chain([first], shards):
+        bits = _framed_bits(body).to(frames.device)
+        index = corners[i] if generator_type == "shi_tomashi" else _pixel_index(generator_type, m, H, W, bits.shape[0])
+        _embed(pixels[i : i + 1], index, bits)
+    return out
+
+
+class ShardAssembler:
+    """Puts a sharded message back together, one shard at a time and in any order."""
+
+    def __init__(self):
+        self.count = None
+        self.data = None
+        self.received = set()
+
+    @property
+    def complete(self):
+        return self.count is not None and len(self.received) == self.count
+
+    def add(self, body):
+        """Adds one shard body, returns False (and ignores it) if it is not a shard of this message."""
+        if len(body) < SHARD_HEADER.size:
+            return False
+        magic, index, count, offset, total = SHARD_HEADER.unpack_from(body)
+        chunk = body[SHARD_HEADER.size :]
+        if magic != SHARD_MAGIC or index >= count or offset + len(chunk) > total:
+            return False
+        if self.count is None:
+            self.count, self.data = count, bytearray(total)
+        elif count != self.count or total != len(self.data):
+            return False
+        self.data[offset : offset + len(chunk)] = chunk
+        self.received.add(index)
+        return True
+
+    def message(self, encoding="UTF-8"):
+        if not self.complete:
+            raise IndexError("Impossible to detect message.")
+        try:
+            return self.data.decode(encoding)
+        except UnicodeDecodeError as e:
+            raise IndexError("Impossible to detect message.") from e
+
+
+def reveal_sharded(frames, encoding="UTF-8", generator_type="None", m=1):
+    """Reassembles a message written by `hide_sharded`, reading frames in order and stopping once every shard is in."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    B, H, W, C = frames.shape
+    pixels = frames.reshape(B, H * W, C)
+    assembler = ShardAssembler()
+    for i in range(B):
+        try:
+            body = _extract_bytes(pixels[i : i + 1], _frame_index_fn(frames, generator_type, m, i))[0]
+        except IndexError:
+            continue  # Frames past the last shard carry nothing
+        assembler.add(body)
+        if assembler.complete:
+            break
+    return assembler.message(encoding)
+
+
+# Decode sweep: tries a list of (generator, m) pairs against every frame to find how a payload was hidden.
+# The LSBs are read out of the frames once into a bit plane that every attempt indexes. An attempt first reads only the
+# "<n>:" prefix window, and frames without a valid prefix are dropped before any body is read.
+SweepCandidate = namedtuple("SweepCandidate", ["score", "generator_type", "m", "encoding", "message"])
+
+LFSR_SIZES = range(2, 32)  # register sizes Stegano has feedback polynomials for
+MAX_ACKERMANN_M = 4  # ackermann(5) needs A(4, 65533) for its second value, which never finishes
+
+
+def sweep_attempts(generators, m_min=1, m_max=1):
+    """(generator, m) pairs worth trying for `generators` with m in [m_min, m_max], without duplicate sequences.
+
+    Only LFSR and ackermann depend on m: LFSR through its bit length alone, ackermann up to MAX_ACKERMANN_M.
+    Generators returning a single number (ackermann_fast/slow) and aliases (identity, ackermann_naive) are skipped.
+    """
+    attempts = []
+    for generator_type in generators:
+        if generator_type in ("identity", "ackermann_naive", "ackermann_fast", "ackermann_slow"):
+            continue
+        if generator_type == "LFSR":
+            for size in LFSR_SIZES:
+                m = max(m_min, 1 << size)
+                if m <= m_max and m.bit_length() - 1 == size:
+                    attempts.append((generator_type, m))
+        elif generator_type == "ackermann":
+            attempts += [(generator_type, m) for m in range(m_min, min(m_max, MAX_ACKERMANN_M) + 1)]
+        else:
+            attempts.append((generator_type, 1))
+    return attempts
+
+
+def text_score(message):
+    """Share of printable characters (whitespace included) in `message`, 0 for an empty one."""
+    if not message:
+        return 0.0
+    return sum(char.isprintable() or char in "\t\n\r" for char in message) / len(message)
+
+
+def _read_plane(plane, index, byte_count):
+    # plane: [B, H*W, 3] LSBs, index: flat pixel indices or None for a straight run -> [B, <= byte_count] numpy bytes
+    pixel_count = math.ceil(byte_count * 8 / 3)
+    if index is None:
+        channels = plane[:, :pixel_count]
+    else:
+        channels = plane.index_select(1, torch.from_numpy(index[:pixel_count]).to(plane.device))
+    channels = channels.reshape(plane.shape[0], -1)
+    return _pack_bytes(channels, min(byte_count, channels.shape[1] // 8))
+
+
+def _sweep_attempt(plane, index_fn, encodings):
+    # Returns {row of plane: [(encoding, message), ...]} for the rows holding a decodable payload
+    head = _read_plane(plane, index_fn(math.ceil(PREFIX_WINDOW * 8 / 3)), PREFIX_WINDOW)
+    spans = {}
+    for row in range(plane.shape[0]):
+        try:
+            spans[row] = _parse_prefix(head[row].tobytes())
+        except IndexError:
+            continue
+    if not spans:
+        return {}
+    rows = list(spans)
+    needed = max(start + length for start, length in spans.values())
+    body = _read_plane(plane[rows], index_fn(math.ceil(needed * 8 / 3)), needed)
+    found = {}
+    for i, row in enumerate(rows):
+        start, length = spans[row]
+        if start + length > body.shape[1]:
+            continue  # The prefix promises more than the generator can hold
+        payload = body[i, start : start + length].tobytes()
+        for encoding in encodings:
+            try:
+                found.setdefault(row, []).append((encoding, payload.decode(encoding)))
+            except UnicodeDecodeError:
+                continue
+    return found
+
+
+def sweep(frames, attempts, encodings=ENCODINGS, stop_on_first=False):
+    """Tries every (generator, m) of `attempts` on every frame of a uint8 [B,H,W,C] batch.
+
+    Returns one list of `SweepCandidate` per frame, best first. With `stop_on_first`, a frame is dropped from the sweep as soon
+    as one attempt decodes it to fully printable text.
+    """
+    B, H, W, C = frames.shape
+    plane = (frames[..., :3] & 1).reshape(B, H * W, 3)
+    candidates = [[] for _ in range(B)]
+    active = list(range(B))
+    corners = {}
+    for generator_type, m in attempts:
+        if not active:
+            break
+        if generator_type == "shi_tomashi":
+            groups = [([i], lambda count, i=i: corners[i][:count]) for i in active]
+            for i in active:
+                if i not in corners:
+                    corners[i] = shi_tomasi_positions(frames[i])
+        else:
+            groups = [(active, lambda count: _pixel_index(generator_type, m, H, W, count))]
+        for frame_indices, index_fn in groups:
+            try:
+                found = _sweep_attempt(plane[frame_indices], index_fn, encodings)
+            except (ValueError, KeyError, RecursionError):
+                continue  # Generators that cannot run with this m (LFSR without a polynomial, ...)
+            for row, decoded in found.items():
+                for encoding, message in decoded:
+                    candidates[frame_indices[row]].append(SweepCandidate(text_score(message), generator_type, m, encoding, message))
+        if stop_on_first:
+            active = [i for i in active if not any(candidate.score == 1 for candidate in candidates[i])]
+    for frame_candidates in candidates:
+        frame_candidates.sort(key=lambda candidate: (-candidate.score, -len(candidate.message)))
+    return candidates
@@ -1,292 +1,541 @@
 # This implementation is lifted from https://github.com/Aayush9029/encodeDecode, which is left abandoned since 2020. This will attempt to roll that implementation in while implementing more languages that can be supported within reason (so no Chinese telegraph code for Chinese, unfortunately).
+import functools
 import unicodedata
+from types import MappingProxyType
+
+# The code tables are made using Wikipedia as the reference. See https://en.wikipedia.org/wiki/Morse_code_for_non-Latin_alphabets and https://en.wikipedia.org/wiki/Morse_code#Letters,_numbers,_punctuation,_prosigns_for_Morse_code_and_non-Latin_variants for more information.
+# They are read-only module-level tables shared by every node, and what a run needs from them is derived once per
+# language (and dot/dash symbols) and cached:
+# - `encode_table`: a `str.translate` table from every letter to its code plus the separating space, so a whole text is
+#   encoded in one pass. Whitespace outside the table becomes an empty code (a word gap), anything else is dropped.
+# - `decode_table`: code -> letter, the first letter of the table winning where several share a code.
+# - `decode_tree`: the same codes as a binary dot/dash trie, which `decode_stream` walks one symbol at a time. Decoding
+#   takes an iterable of text chunks and yields the decoded text as it goes, so a transcript of any length is decoded in
+#   one pass without being held in memory, with the same result as decoding it as one string.
+
+LATIN_CODES = MappingProxyType(
+    {
+        "A": ".-",
+        "B": "-...",
+        "C": "-.-.",
+        "D": "-..",
+        "E": ".",
+        "F": "..-.",
+        "G": "--.",
+        "H": "....",
+        "I": "..",
+        "J": ".---",
+        "K": "-.-",
+        "L": ".-..",
+        "M": "--",
+        "N": "-.",
+        "O": "---",
+        "P": ".--.",
+        "Q": "--.-",
+        "R": ".-.",
+        "S": "...",
+        "T": "-",
+        "U": "..-",
+        "V": "...-",
+        "W": ".--",
+        "X": "-..-",
+        "Y": "-.--",
+        "Z": "--..",
+        "0": "-----",
+        "1": ".----",
+        "2": "..---",
+        "3": "...--",
+        "4": "....-",
+        "5": ".....",
+        "6": "-....",
+        "7": "--...",
+        "8": "---..",
+        "9": "----.",
+        ".": ".-.-.-",
+        ",": "--..--",
+        "?": "..--..",
+        "/": "-..-.",
+        "-": "-....-",
+        "(": "-.--.",
+        ")": "-.--.-",
+        " ": " ",
+    }
+)
+
+RUSSIAN_CODES = MappingProxyType(
+    {
+        "А": ".-",
+        "Б": "-...",
+        "В": ".--",
+        "Г": "--.",
+        "Д": "-..",
+        "Е": ".",
+        "Ж": "...-",
+        "З": "--..",
+        "И": "..",
+        "Й": ".---",
+        "К": "-.-",
+        "Л": ".-..",
+        "М": "--",
+        "Н": "-.",
+        "О": "---",
+        "П": ".--.",
+        "Р": ".-.",
+        "С": "...",
+        "Т": "-",
+        "У": "..-",
+        "Ф": "..-.",
+        "Х": "....",
+        "Ц": "-.-.",
+        "Ч": "---.",
+        "Ш": "----",
+        "Щ": "--.-",
+        "Ы": "-.--",
+        "Ь": "-..-",
+        "Э": "..-..",
+        "Ю": "..--",
+        "Я": ".-.-",
+        "Ї": ".---.",
+        "0": "-----",
+        "1": ".----",
+        "2": "..---",
+        "3": "...--",
+        "4": "....-",
+        "5": ".....",
+        "6": "-....",
+        "7": "--...",
+        "8": "---..",
+        "9": "----.",
+        ".": ".-.-.-",
+        ",": "--..--",
+        "?": "..--..",
+        "/": "-..-.",
+        "-": "-....-",
+        "(": "-.--.",
+        ")": "-.--.-",
+        " ": " ",
+    }
+)
+
+ARABIC_CODES = MappingProxyType(
+    {
+        "ا": ".-",
+        "ب": "-...",
+        "ت": "-",
+        "ث": "-.-.",
+        "ج": ".---",
+        "ح": "....",
+        "خ": "---",
+        "د": "-..",
+        "ذ": "--..",
+        "ر": ".-.",
+        "ز": "---.",
+        "س": "...",
+        "ش": "----",
+        "ص": "-..-",
+        "ض": "...-",
+        "ط": "..-",
+        "ظ": "-.--",
+        "ع": ".-.-",
+        "غ": "--.",
+        "ف": "..-.",
+        "ق": "--.-",
+        "ك": "-.-",
+        "ل": ".-..",
+        "م": "--",
+        "ن": "-.",
+        "ه": "..",
+        "و": ".--",
+        "ي": "..--",
+        "٠": "-----",
+        "١": ".----",
+        "٢": "..---",
+        "٣": "...--",
+        "٤": "....-",
+        "٥": ".....",
+        "٦": "-....",
+        "٧": "--...",
+        "٨": "---..",
+        "٩": "----.",
+        "؟": "..--..",
+    }
+)
+
+HEBREW_CODES = MappingProxyType(
+    {
+        "א": ".-",
+        "ב": "-...",
+        "ג": "--.",
+        "ד": "-..",
+        "ה": "---",
+        "ו": ".",
+        "ז": "--..",
+        "ח": "....",
+        "ט": "..-",
+        "י": "..",
+        "כ": "-.-",
+        "ל": ".-..",
+        "מ": "--",
+        "נ": "-.",
+        "ס": "-.-.",
+        "ע": ".---",
+        "פ": ".--.",
+        "צ": ".--",
+        "ק": "--.-",
+        "ר": ".-.",
+        "ש": "...",
+        "ת": "-",
+        "ך": "-.-",
+        "ם": "--",
+        "ן": "-.",
+        "ף": ".--.",
+        "ץ": ".--",
+    }
+)
+
+GREEK_CODES = MappingProxyType(
+    {
+        "Α": ".-",
+        "Β": "-...",
+        "Γ": "--.",
+        "Δ": "-..",
+        "Ε": ".",
+        "Ζ": "--..",
+        "Η": "....",
+        "Θ": "-.-.",
+        "Ι": "..",
+        "Κ": "-.-",
+        "Λ": ".-..",
+        "Μ": "--",
+        "Ν": "-.",
+        "Ξ": "-..-",
+        "Ο": "---",
+        "Π": ".--.",
+        "Ρ": ".-.",
+        "Σ": "...",
+        "Τ": "-",
+        "Υ": "-.--",
+        "Φ": "..-.",
+        "Χ": "----",
+        "Ψ": "--.-",
+        "Ω": ".--",
+    }
+)
+
+KOREAN_CODES = MappingProxyType(
+    {
+        "ㄱ": ".-..",
+        "ㄴ": "..-.",
+        "ㄷ": "-...",
+        "ㄹ": "...-",
+        "ㅁ": "--",
+        "ㅂ": ".--",
+        "ㅅ": "--.",
+        "ㅇ": "-.-",
+        "ㅈ": ".--.",
+        "ㅊ": "-.-.",
+        "ㅋ": "-..-",
+        "ㅌ": "--..",
+        "ㅍ": "---",
+        "ㅎ": ".---",
+        "ㅏ": ".",
+        "ㅑ": "..",
+        "ㅓ": "-",
+        "ㅕ": "...",
+        "ㅗ": ".-",
+        "ㅛ": "-.",
+        "ㅜ": "....",
+        "ㅠ": ".-.",
+        "ㅡ": "-..",
+        "ㅣ": "..-",
+        "ㅐ": "--.-",
+        "ㅔ": "-.--",
+    }
+)
+
+JAPANESE_CODES = MappingProxyType(
+    {
+        "ア": "--.--",
+        "イ": ".-",
+        "ウ": "..-",
+        "エ": "-.---",
+        "オ": ".-...",
+        "カ": ".-..",
+        "キ": "-.-..",
+        "ク": "...-",
+        "ケ": "-.--",
+        "コ": "----",
+        "サ": "-.-.-",
+        "シ": "--.-.",
+        "ス": "---.-",
+        "セ": ".---.",
+        "ソ": "---.",
+        "タ": "-.",
+        "チ": "..-.",
+        "ツ": ".--.",
+        "テ": ".-.--",
+        "ト": "..-..",
+        "ナ": ".-.",
+        "ニ": "-.-.",
+        "ヌ": "....",
+        "ネ": "--.-",
+        "ノ": "..--",
+        "ハ": "-...",
+        "ヒ": "--..-",
+        "フ": "--..",
+        "ヘ": ".",
+        "ホ": "-..",
+        "マ": "-..-",
+        "ミ": "..-.-",
+        "ム": "-",
+        "メ": "-...-",
+        "モ": "-..-.",
+        "ヤ": ".--",
+        "ユ": "-..--",
+        "ヨ": "--",
+        "ラ": "...",
+        "リ": "--.",
+        "ル": "-.--.",
+        "レ": "---",
+        "ロ": ".-.-",
+        "ワ": "-.-",
+        "ヰ": ".-..-",
+        "ヱ": ".--..",
+        "ヲ": ".---",
+        "ン": ".-.-.",
+        "゛": "..",
+        "゜": "..--.",
+        "ー": ".--.-",
+        "。": ".-.-..",
+        "、": ".-.-.-",
+        "（": "-.--.-",
+        "）": ".-..-.",
+    }
+)
+
+LANGUAGE_CODES = MappingProxyType(
+    {
+        "latin": LATIN_CODES,
+        "russian": RUSSIAN_CODES,
+        "arabic": ARABIC_CODES,
+        "hebrew": HEBREW_CODES,
+        "greek": GREEK_CODES,
+        "korean": KOREAN_CODES,
+        "japanese-wabun": JAPANESE_CODES,
+    }
+)
+
+# Hangul jamo in syllable block order: choseong (initial), jungseong (medial) and jongseong (final, none first)
+CHOSEONG = (
+    "ㄱ",
+    "ㄲ",
+    "ㄴ",
+    "ㄷ",
+    "ㄸ",
+    "ㄹ",
+    "ㅁ",
+    "ㅂ",
+    "ㅃ",
+    "ㅅ",
+    "ㅆ",
+    "ㅇ",
+    "ㅈ",
+    "ㅉ",
+    "ㅊ",
+    "ㅋ",
+    "ㅌ",
+    "ㅍ",
+    "ㅎ",
+)
+JUNGSEONG = (
+    "ㅏ",
+    "ㅐ",
+    "ㅑ",
+    "ㅒ",
+    "ㅓ",
+    "ㅔ",
+    "ㅕ",
+    "ㅖ",
+    "ㅗ",
+    "ㅘ",
+    "ㅙ",
+    "ㅚ",
+    "ㅛ",
+    "ㅜ",
+    "ㅝ",
+    "ㅞ",
+    "ㅟ",
+    "ㅠ",
+    "ㅡ",
+    "ㅢ",
+    "ㅣ",
+)
+JONGSEONG = (
+    "",
+    "ㄱ",
+    "ㄲ",
+    "ㄳ",
+    "ㄴ",
+    "ㄵ",
+    "ㄶ",
+    "ㄷ",
+    "ㄹ",
+    "ㄺ",
+    "ㄻ",
+    "ㄼ",
+    "ㄽ",
+    "ㄾ",
+    "ㄿ",
+    "ㅀ",
+    "ㅁ",
+    "ㅂ",
+    "ㅄ",
+    "ㅅ",
+    "ㅆ",
+    "ㅇ",
+    "ㅈ",
+    "ㅊ",
+    "ㅋ",
+    "ㅌ",
+    "ㅍ",
+    "ㅎ",
+)
+
+HANGUL_FIRST = ord("가")
+HANGUL_LAST = ord("힣")
+
+# Every character `str.isspace` accepts sits below U+3001
+WHITESPACE = "".join(char for char in map(chr, range(0x3001)) if char.isspace())
+
+
+class _DropMissing(dict):
+    # A `str.translate` table that deletes the characters it has no entry for, instead of keeping them
+    def __missing__(self, key):
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def encode_table(language, dot=".", dash="-"):
+    """`str.translate` table encoding a language's (pre-processed) text, every code followed by a separating space."""
+    table = _DropMissing(dict.fromkeys(map(ord, WHITESPACE), " "))  # Word separator
+    for char, code in LANGUAGE_CODES[language].items():
+        table[ord(char)] = code.replace(".", dot).replace("-", dash) + " "
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def decode_table(language):
+    """Code -> letter for a language."""
+    letters = {}
+    for char, code in LANGUAGE_CODES[language].items():
+        letters.setdefault(code, char)
+    return MappingProxyType(letters)
+
+
+@functools.lru_cache(maxsize=None)
+def decode_tree(language):
+    """A language's codes as a binary trie in a flat tuple: the root is node 1, node n's dot and dash children are 2n and
+    2n + 1, and every node holds the letter its code decodes to (or None)."""
+    codes = {code: letter for code, letter in decode_table(language).items() if code and not set(code) - set(".-")}
+    letters = [None] * (2 << max(map(len, codes)))
+    for code, letter in codes.items():
+        node = 1
+        for symbol in code:
+            node = 2 * node + (symbol == "-")
+        letters[node] = letter
+    return tuple(letters)
+
+
+def decode_stream(chunks, language, dot=".", dash="-"):
+    """Decodes Morse code read from an iterable of text chunks (down to single symbols), yielding decoded text per chunk.
+
+    Codes are split on single spaces, and `dot`/`dash` (as well as `.` and `-`) are read as the code's symbols. An
+    unknown code is dropped and an empty one is a word gap, several gaps in a row making one. Leading and trailing
+    whitespace is ignored, so only a run of whitespace is ever held back, until the next chunk shows whether it ends the text.
+    """
+    letters = decode_tree(language)
+    dead = len(letters)  # Nodes from here on are codes that decode to nothing
+    bits = {".": 0, "-": 1, dash: 1, dot: 0}
+    # Decoded letters normalize one by one, so every chunk is normalized on its own
+    finish = normalize_japanese if language == "japanese-wabun" else str
+    node, empty, gap = 1, True, True  # The current code's node, whether it is still empty, and whether a gap can follow
+    started = False
+    pending = []
+    for chunk in chunks:
+        text = chunk.rstrip()
+        if not started:
+            text = text.lstrip()
+        if not text:
+            if started:
+                pending.append(chunk)
+            continue
+        started = True
+        text = "".join(pending) + text
+        pending = [chunk[len(chunk.rstrip()) :]]
+        output = []
+        for char in text:
+            if char == " ":
+                if empty:
+                    if gap:
+                        output.append(" ")
+                        gap = False
+                elif node < dead and letters[node] is not None:
+                    output.append(letters[node])
+                    gap = True
+                node, empty = 1, True
+            else:
+                empty = False
+                if node < dead:
+                    bit = bits.get(char)
+                    node = dead if bit is None else 2 * node + bit
+        if output:
+            yield finish("".join(output))
+    if not started:
+        yield " "  # An empty text is a single empty code
+    elif node < dead and letters[node] is not None:
+        yield finish(letters[node])
+
+
+def strip_accents(s):
+    return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
+
+
+def hiragana_to_katakana(s):
+    return "".join([chr(ord(char) + 96) if "\u3040" <= char <= "\u309f" else char for char in s])
+
+
+def normalize_japanese(s):
+    # Normalize width and convert hiragana → katakana
+    s = unicodedata.normalize("NFKC", s)
+    return hiragana_to_katakana(s)
+
+
+def decompose_hangul(text):
+    decomposed_text = []
+    for char in text:
+        if HANGUL_FIRST <= ord(char) <= HANGUL_LAST:
+            char_code = ord(char) - HANGUL_FIRST
+            choseong_index = char_code // (len(JUNGSEONG) * len(JONGSEONG))
+            jungseong_index = (char_code % (len(JUNGSEONG) * len(JONGSEONG))) // len(JONGSEONG)
+            jongseong_index = char_code % len(JONGSEONG)
+
+            decomposed_text.append(CHOSEONG[choseong_index])
+            decomposed_text.append(JUNGSEONG[jungseong_index])
+            if jongseong_index > 0:
+                decomposed_text.append(JONGSEONG[jongseong_index])
+        else:
+            decomposed_text.append(char)
+    return "".join(decomposed_text)
 
 
 class MorseCode:
-    def __init__(self):
-        """
-        This dictionary is made using Wikipedia as the reference. See https://en.wikipedia.org/wiki/Morse_code_for_non-Latin_alphabets and https://en.wikipedia.org/wiki/Morse_code#Letters,_numbers,_punctuation,_prosigns_for_Morse_code_and_non-Latin_variants for more information.
-        """
-        self.latin_codes = {
-            "A": ".-",
-            "B": "-...",
-            "C": "-.-.",
-            "D": "-..",
-            "E": ".",
-            "F": "..-.",
-            "G": "--.",
-            "H": "....",
-            "I": "..",
-            "J": ".---",
-            "K": "-.-",
-            "L": ".-..",
-            "M": "--",
-            "N": "-.",
-            "O": "---",
-            "P": ".--.",
-            "Q": "--.-",
-            "R": ".-.",
-            "S": "...",
-            "T": "-",
-            "U": "..-",
-            "V": "...-",
-            "W": ".--",
-            "X": "-..-",
-            "Y": "-.--",
-            "Z": "--..",
-            "0": "-----",
-            "1": ".----",
-            "2": "..---",
-            "3": "...--",
-            "4": "....-",
-            "5": ".....",
-            "6": "-....",
-            "7": "--...",
-            "8": "---..",
-            "9": "----.",
-            ".": ".-.-.-",
-            ",": "--..--",
-            "?": "..--..",
-            "/": "-..-.",
-            "-": "-....-",
-            "(": "-.--.",
-            ")": "-.--.-",
-            " ": " ",
-        }
-        self.russian_codes = {
-            "А": ".-",
-            "Б": "-...",
-            "В": ".--",
-            "Г": "--.",
-            "Д": "-..",
-            "Е": ".",
-            "Ж": "...-",
-            "З": "--..",
-            "И": "..",
-            "Й": ".---",
-            "К": "-.-",
-            "Л": ".-..",
-            "М": "--",
-            "Н": "-.",
-            "О": "---",
-            "П": ".--.",
-            "Р": ".-.",
-            "С": "...",
-            "Т": "-",
-            "У": "..-",
-            "Ф": "..-.",
-            "Х": "....",
-            "Ц": "-.-.",
-            "Ч": "---.",
-            "Ш": "----",
-            "Щ": "--.-",
-            "Ы": "-.--",
-            "Ь": "-..-",
-            "Э": "..-..",
-            "Ю": "..--",
-            "Я": ".-.-",
-            "Ї": ".---.",
-            "0": "-----",
-            "1": ".----",
-            "2": "..---",
-            "3": "...--",
-            "4": "....-",
-            "5": ".....",
-            "6": "-....",
-            "7": "--...",
-            "8": "---..",
-            "9": "----.",
-            ".": ".-.-.-",
-            ",": "--..--",
-            "?": "..--..",
-            "/": "-..-.",
-            "-": "-....-",
-            "(": "-.--.",
-            ")": "-.--.-",
-            " ": " ",
-        }
-        self.arabic_codes = {
-            "ا": ".-",
-            "ب": "-...",
-            "ت": "-",
-            "ث": "-.-.",
-            "ج": ".---",
-            "ح": "....",
-            "خ": "---",
-            "د": "-..",
-            "ذ": "--..",
-            "ر": ".-.",
-            "ز": "---.",
-            "س": "...",
-            "ش": "----",
-            "ص": "-..-",
-            "ض": "...-",
-            "ط": "..-",
-            "ظ": "-.--",
-            "ع": ".-.-",
-            "غ": "--.",
-            "ف": "..-.",
-            "ق": "--.-",
-            "ك": "-.-",
-            "ل": ".-..",
-            "م": "--",
-            "ن": "-.",
-            "ه": "..",
-            "و": ".--",
-            "ي": "..--",
-            "٠": "-----",
-            "١": ".----",
-            "٢": "..---",
-            "٣": "...--",
-            "٤": "....-",
-            "٥": ".....",
-            "٦": "-....",
-            "٧": "--...",
-            "٨": "---..",
-            "٩": "----.",
-            "؟": "..--..",
-        }
-        self.hebrew_codes = {
-            "א": ".-",
-            "ב": "-...",
-            "ג": "--.",
-            "ד": "-..",
-            "ה": "---",
-            "ו": ".",
-            "ז": "--..",
-            "ח": "....",
-            "ט": "..-",
-            "י": "..",
-            "כ": "-.-",
-            "ל": ".-..",
-            "מ": "--",
-            "נ": "-.",
-            "ס": "-.-.",
-            "ע": ".---",
-            "פ": ".--.",
-            "צ": ".--",
-            "ק": "--.-",
-            "ר": ".-.",
-            "ש": "...",
-            "ת": "-",
-            "ך": "-.-",
-            "ם": "--",
-            "ן": "-.",
-            "ף": ".--.",
-            "ץ": ".--",
-        }
-        self.greek_codes = {
-            "Α": ".-",
-            "Β": "-...",
-            "Γ": "--.",
-            "Δ": "-..",
-            "Ε": ".",
-            "Ζ": "--..",
-            "Η": "....",
-            "Θ": "-.-.",
-            "Ι": "..",
-            "Κ": "-.-",
-            "Λ": ".-..",
-            "Μ": "--",
-            "Ν": "-.",
-            "Ξ": "-..-",
-            "Ο": "---",
-            "Π": ".--.",
-            "Ρ": ".-.",
-            "Σ": "...",
-            "Τ": "-",
-            "Υ": "-.--",
-            "Φ": "..-.",
-            "Χ": "----",
-            "Ψ": "--.-",
-            "Ω": ".--",
-        }
-        self.korean_codes = {
-            "ㄱ": ".-..",
-            "ㄴ": "..-.",
-            "ㄷ": "-...",
-            "ㄹ": "...-",
-            "ㅁ": "--",
-            "ㅂ": ".--",
-            "ㅅ": "--.",
-            "ㅇ": "-.-",
-            "ㅈ": ".--.",
-            "ㅊ": "-.-.",
-            "ㅋ": "-..-",
-            "ㅌ": "--..",
-            "ㅍ": "---",
-            "ㅎ": ".---",
-            "ㅏ": ".",
-            "ㅑ": "..",
-            "ㅓ": "-",
-            "ㅕ": "...",
-            "ㅗ": ".-",
-            "ㅛ": "-.",
-            "ㅜ": "....",
-            "ㅠ": ".-.",
-            "ㅡ": "-..",
-            "ㅣ": "..-",
-            "ㅐ": "--.-",
-            "ㅔ": "-.--",
-        }
-        self.japanese_codes = {
-            "ア": "--.--",
-            "イ": ".-",
-            "ウ": "..-",
-            "エ": "-.---",
-            "オ": ".-...",
-            "カ": ".-..",
-            "キ": "-.-..",
-            "ク": "...-",
-            "ケ": "-.--",
-            "コ": "----",
-            "サ": "-.-.-",
-            "シ": "--.-.",
-            "ス": "---.-",
-            "セ": ".---.",
-            "ソ": "---.",
-            "タ": "-.",
-            "チ": "..-.",
-            "ツ": ".--.",
-            "テ": ".-.--",
-            "ト": "..-..",
-            "ナ": ".-.",
-            "ニ": "-.-.",
-            "ヌ": "....",
-            "ネ": "--.-",
-            "ノ": "..--",
-            "ハ": "-...",
-            "ヒ": "--..-",
-            "フ": "--..",
-            "ヘ": ".",
-            "ホ": "-..",
-            "マ": "-..-",
-            "ミ": "..-.-",
-            "ム": "-",
-            "メ": "-...-",
-            "モ": "-..-.",
-            "ヤ": ".--",
-            "ユ": "-..--",
-            "ヨ": "--",
-            "ラ": "...",
-            "リ": "--.",
-            "ル": "-.--.",
-            "レ": "---",
-            "ロ": ".-.-",
-            "ワ": "-.-",
-            "ヰ": ".-..-",
-            "ヱ": ".--..",
-            "ヲ": ".---",
-            "ン": ".-.-.",
-            "゛": "..",
-            "゜": "..--.",
-            "ー": ".--.-",
-            "。": ".-.-..",
-            "、": ".-.-.-",
-            "（": "-.--.-",
-            "）": ".-..-.",
-        }
-        pass
+    latin_codes = LATIN_CODES
+    russian_codes = RUSSIAN_CODES
+    arabic_codes = ARABIC_CODES
+    hebrew_codes = HEBREW_CODES
+    greek_codes = GREEK_CODES
+    korean_codes = KOREAN_CODES
+    japanese_codes = JAPANESE_CODES
 
     CATEGORY = "ARG Toolkit/Utilities/Converter"
 
@@ -372,133 +621,6 @@ class MorseCode:
         return norm.replace(".", dot_out).replace("-", dash_out)
 
     def MorseCode(self, text, mode, language, dot, dash):
-        language_table = {
-            "latin": self.latin_codes,
-            "russian": self.russian_codes,
-            "arabic": self.arabic_codes,
-            "hebrew": self.hebrew_codes,
-            "greek": self.greek_codes,
-            "korean": self.korean_codes,
-            "japanese-wabun": self.japanese_codes,
-        }
-        codes = language_table[language]
-
-        def strip_accents(s):
-            return "".join(c for c in unicodedata.normalize("NFD", s) if unicodedata.category(c) != "Mn")
-
-        def hiragana_to_katakana(s):
-            return "".join([chr(ord(char) + 96) if "\u3040" <= char <= "\u309f" else char for char in s])
-
-        def normalize_japanese(s):
-            # Normalize width and convert hiragana → katakana
-            s = unicodedata.normalize("NFKC", s)
-            return hiragana_to_katakana(s)
-
-        def decompose_hangul(text):
-            decomposed_text = []
-            # Choseong (initial)
-            CHOSEONG = [
-                "ㄱ",
-                "ㄲ",
-                "ㄴ",
-                "ㄷ",
-                "ㄸ",
-                "ㄹ",
-                "ㅁ",
-                "ㅂ",
-                "ㅃ",
-                "ㅅ",
-                "ㅆ",
-                "ㅇ",
-                "ㅈ",
-                "ㅉ",
-                "ㅊ",
-                "ㅋ",
-                "ㅌ",
-                "ㅍ",
-                "ㅎ",
-            ]
-            # Jungseong (medial)
-            JUNGSEONG = [
-                "ㅏ",
-                "ㅐ",
-                "ㅑ",
-                "ㅒ",
-                "ㅓ",
-                "ㅔ",
-                "ㅕ",
-                "ㅖ",
-                "ㅗ",
-                "ㅘ",
-                "ㅙ",
-                "ㅚ",
-                "ㅛ",
-                "ㅜ",
-                "ㅝ",
-                "ㅞ",
-                "ㅟ",
-                "ㅠ",
-                "ㅡ",
-                "ㅢ",
-                "ㅣ",
-            ]
-            # Jongseong (final)
-            JONGSEONG = [
-                "",
-                "ㄱ",
-                "ㄲ",
-                "ㄳ",
-                "ㄴ",
-                "ㄵ",
-                "ㄶ",
-                "ㄷ",
-                "ㄹ",
-                "ㄺ",
-                "ㄻ",
-                "ㄼ",
-                "ㄽ",
-                "ㄾ",
-                "ㄿ",
-                "ㅀ",
-                "ㅁ",
-                "ㅂ",
-                "ㅄ",
-                "ㅅ",
-                "ㅆ",
-                "ㅇ",
-                "ㅈ",
-                "ㅊ",
-                "ㅋ",
-                "ㅌ",
-                "ㅍ",
-                "ㅎ",
-            ]
-
-            for char in text:
-                if "가" <= char <= "힣":
-                    char_code = ord(char) - ord("가")
-                    choseong_index = char_code // (21 * 28)
-                    jungseong_index = (char_code % (21 * 28)) // 28
-                    jongseong_index = char_code % 28
-
-                    decomposed_text.append(CHOSEONG[choseong_index])
-                    decomposed_text.append(JUNGSEONG[jungseong_index])
-                    if jongseong_index > 0:
-                        decomposed_text.append(JONGSEONG[jongseong_index])
-                else:
-                    decomposed_text.append(char)
-            return "".join(decomposed_text)
-
-        # Reverse lookup for decoding
-        rev_codes = {}
-        for k, v in codes.items():
-            if v not in rev_codes:
-                rev_codes[v] = k
-
-        # Normalize input Morse (map arbitrary symbols → '.' and '-')
-        def normalize(morse_str):
-            return "".join("." if ch == dot else "-" if ch == dash else ch for ch in morse_str)
-
         # Encode
         if mode:  # encode
             if language == "japanese-wabun":
@@ -509,29 +631,10 @@ class MorseCode:
                 text = decompose_hangul(text)
             else:
                 text = text.upper()
-            result = []
-            for char in text:
-                if char in codes:
-                    morse = codes[char].replace(".", dot).replace("-", dash)
-                    result.append(morse)
-                elif char.isspace():
-                    result.append("")  # word separator
-            return (" ".join(result),)
+            return (text.translate(encode_table(language, dot, dash))[:-1],)  # Without the last code's separator
         # Decode
         else:
-            words = text.strip().split(" ")
-            result = []
-            for code in words:
-                norm = normalize(code)
-                if norm in rev_codes:
-                    result.append(rev_codes[norm])
-                elif code == "":
-                    if not result or result[-1] != " ":
-                        result.append(" ")  # preserve spaces
-            output = "".join(result)
-            if language == "japanese-wabun":
-                output = normalize_japanese(output)
-            return (output,)
+            return ("".join(decode_stream((text,), language, dot, dash)),)
 
 
 NODE_CLASS_MAPPINGS = {"MorseCode": MorseCode}
@@ -0,0 +1,181 @@
+import functools
+import os
+
+import numpy as np
+from secretpy import alphabets as al
+
+# N-gram language models for rating candidate plaintexts, one table per (alphabet, n) for the alphabets of secretpy.
+# A table holds the log10 probability of every possible n-gram of the alphabet's letters, indexed by the n-gram's letter
+# indexes read as a base-len(alphabet) number. Probabilities are quantized to one byte each (256 levels between the floor
+# given to unseen n-grams and the most frequent one), which keeps English quadgrams (26^4 entries) under half a megabyte.
+# All tables live in one binary file in src/data, memory-mapped once per process: pages are only read when a table is used,
+# and forked frame_pool workers share them with the parent.
+#
+# File layout (little-endian): MAGIC, then a uint32 version and table count, then one DIRECTORY entry per table, then the
+# tables themselves as raw uint8 arrays at the offsets of their entries.
+# The shipped tables were built with `build_table` by src/data/build_ngrams.py, from the documentation of a Debian 12.12
+# system (manpages 6.03-2, vim-runtime 2:9.0.1378-2+deb12u2):
+# - ENGLISH (3- and 4-grams): /usr/share/man/man1..man8, /usr/share/common-licenses and vimtutor's tutor.
+# - GERMAN, RUSSIAN, SPANISH, ITALIAN, POLISH, DUTCH, SWEDISH, DANISH (3-grams): the /usr/share/man/<code> translations
+#   and vimtutor's tutor.<code>.utf-8.
+# The script lists the exact files and text clean-up, and checks every corpus against the letter count and SHA-256 the
+# shipped file came from.
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "ngrams.bin")
+MAGIC = b"ARGNGRAM"
+VERSION = 1
+DIRECTORY = np.dtype([("alphabet", "S16"), ("n", "<u4"), ("letters", "<u4"), ("offset", "<u8"), ("floor", "<f8"), ("step", "<f8")])
+FLOOR_COUNT = 0.01  # count given to n-grams never seen in the corpus
+
+
+@functools.lru_cache(maxsize=64)
+def _lookup(alphabet):
+    # Code point -> alphabet index, -1 for everything else (the last slot catches every code point past the largest letter)
+    indexes = {c: i for i, letters in enumerate(alphabet) for c in letters}
+    lookup = np.full(max(map(ord, indexes)) + 2, -1, dtype=np.int64)
+    lookup[[ord(c) for c in indexes]] = list(indexes.values())
+    return lookup
+
+
+def encode(text, alphabet=al.ENGLISH):
+    """Alphabet indexes (int64) of the letters of `text`, lower-cased, anything else dropped."""
+    lookup = _lookup(alphabet)
+    points = np.frombuffer(text.lower().encode("utf-32-le", "surrogatepass"), dtype="<u4")
+    index = lookup[np.minimum(points, len(lookup) - 1)]
+    return index[index >= 0]
+
+
+class NgramTable:
+    """The n-gram log probabilities of one alphabet, read from a uint8 array as `floor + step * code`."""
+
+    def __init__(self, alphabet_name, n, codes, floor, step):
+        self.alphabet_name = alphabet_name
+        self.alphabet = getattr(al, alphabet_name)
+        self.n = n
+        self.codes = codes
+        self.floor = floor
+        self.step = step
+        if len(codes) != len(self.alphabet) ** n:
+            raise ValueError(f"The {alphabet_name} {n}-gram table does not match secretpy's {alphabet_name} alphabet.")
+
+    def log_probabilities(self):
+        return self.floor + self.step * self.codes.astype(np.float64)
+
+    def _codes(self, indexes):
+        # Table codes of every n-gram along the last axis of an int array of alphabet indexes
+        length = indexes.shape[-1] - self.n + 1
+        ngrams = np.zeros(indexes.shape[:-1] + (max(length, 0),), dtype=np.int64)
+        for i in range(self.n):
+            ngrams *= len(self.alphabet)
+            ngrams += indexes[..., i : i + length]
+        return self.codes[ngrams]
+
+    def score_indexes(self, indexes):
+        """Mean n-gram log10 probability of every row of an int [K, L] array of alphabet indexes, as a [K] float64 array.
+
+        Rows shorter than n have no n-grams and score the floor.
+        """
+        indexes = np.asarray(indexes)
+        if indexes.shape[-1] < self.n:
+            return np.full(indexes.shape[:-1], self.floor)
+        return self.floor + self.step * self._codes(indexes).mean(axis=-1)
+
+    def score(self, texts):
+        """Mean n-gram log10 probability of the letters of each text of `texts`, as a float64 array.
+
+        All texts go through one pass: their letters are concatenated, n-grams running from one text into the next are left
+        out, and the rest are summed per text with one bincount.
+        """
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        encoded = [encode(text, self.alphabet) for text in texts]
+        lengths = np.array([len(letters) for letters in encoded], dtype=np.int64)
+        counts = np.maximum(lengths - self.n + 1, 0)
+        scores = np.full(len(texts), self.floor)
+        letters = np.concatenate(encoded) if encoded else np.empty(0, dtype=np.int64)
+        if not counts.any():
+            return scores
+        codes = self._codes(letters)
+        owner = np.repeat(np.arange(len(texts)), lengths)[: len(codes)]  # text each n-gram starts in
+        valid = np.arange(len(codes)) + self.n <= np.cumsum(lengths)[owner]
+        sums = np.bincount(owner[valid], weights=codes[valid], minlength=len(texts))
+        scored = counts > 0
+        scores[scored] = self.floor + self.step * sums[scored] / counts[scored]
+        return scores
+
+
+@functools.lru_cache(maxsize=None)
+def load(path=DATA_PATH):
+    """The tables of an n-gram file as {(alphabet name, n): NgramTable}, memory-mapped and cached per process."""
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    if bytes(data[: len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not an n-gram table file.")
+    version, count = np.frombuffer(data, dtype="<u4", count=2, offset=len(MAGIC)).tolist()
+    if version != VERSION:
+        raise ValueError(f"{path} is version {version} of the n-gram table format, expected {VERSION}.")
+    directory = np.frombuffer(data, dtype=DIRECTORY, count=count, offset=len(MAGIC) + 8)
+    tables = {}
+    for entry in directory:
+        name, n = entry["alphabet"].decode("ascii"), int(entry["n"])
+        codes = data[int(entry["offset"]) : int(entry["offset"]) + int(entry["letters"]) ** n]
+        tables[name, n] = NgramTable(name, n, codes, float(entry["floor"]), float(entry["step"]))
+    return tables
+
+
+def languages(path=DATA_PATH):
+    """The alphabet names that have at least one table."""
+    return sorted({name for name, _ in load(path)})
+
+
+def get_table(alphabet_name="ENGLISH", n=None, path=DATA_PATH):
+    """The `n`-gram table of a secretpy alphabet, or its longest n-grams when `n` is None. Raises KeyError when missing."""
+    tables = load(path)
+    alphabet_name = alphabet_name.upper()
+    if n is None:
+        sizes = [size for name, size in tables if name == alphabet_name]
+        if not sizes:
+            raise KeyError(f"No n-gram table for the {alphabet_name} alphabet, available: {', '.join(languages(path))}.")
+        n = max(sizes)
+    if (alphabet_name, n) not in tables:
+        raise KeyError(f"No {n}-gram table for the {alphabet_name} alphabet.")
+    return tables[alphabet_name, n]
+
+
+def score(texts, alphabet_name="ENGLISH", n=None):
+    """Mean n-gram log10 probability of each text, higher is more like the language. See `NgramTable.score`."""
+    return get_table(alphabet_name, n).score(texts)
+
+
+def build_table(text, alphabet_name, n):
+    """Counts the n-grams of the letters of `text` and quantizes their log10 probabilities to (codes, floor, step).
+
+    Everything but the alphabet's letters is dropped first, so n-grams run across word boundaries like they do in ciphertext.
+    """
+    alphabet = getattr(al, alphabet_name)
+    letters = encode(text, alphabet)
+    counts = np.zeros(len(alphabet) ** n, dtype=np.float64)
+    if len(letters) >= n:
+        ngrams = np.zeros(len(letters) - n + 1, dtype=np.int64)
+        for i in range(n):
+            ngrams = ngrams * len(alphabet) + letters[i : i + len(ngrams)]
+        counts += np.bincount(ngrams, minlength=len(counts))
+    log_probabilities = np.log10(np.maximum(counts, FLOOR_COUNT) / max(counts.sum(), 1))
+    floor = float(log_probabilities.min())
+    step = max(float(log_probabilities.max()) - floor, 1e-12) / 255
+    codes = np.rint((log_probabilities - floor) / step).astype(np.uint8)
+    return codes, floor, step
+
+
+def write_tables(tables, path=DATA_PATH):
+    """Writes {(alphabet name, n): (codes, floor, step)} to an n-gram file."""
+    directory = np.zeros(len(tables), dtype=DIRECTORY)
+    offset = len(MAGIC) + 8 + directory.nbytes
+    for i, ((name, n), (codes, floor, step)) in enumerate(sorted(tables.items())):
+        directory[i] = (name.encode("ascii"), n, len(getattr(al, name)), offset, floor, step)
+        offset += len(codes)
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(np.array([VERSION, len(tables)], dtype="<u4").tobytes())
+        file.write(directory.tobytes())
+        for _, (codes, _, _) in sorted(tables.items()):
+            file.write(np.asarray(codes, dtype=np.uint8).tobytes())
+    load.cache_clear()
@@ -0,0 +1,102 @@
+import torch
+
+# Batched LSB steganalysis over uint8 [B,H,W,C] frames, so likely carriers can be picked out before trying every decoder.
+# - Chi-square attack (Westfeld & Pfitzmann, "Attacks on Steganographic Systems", 1999): LSB replacement evens out the counts
+#   of each pair of values 2k/2k+1. The test runs on growing prefixes of the frame in pixel order, since Stegano writes its
+#   payload from the first pixel on (or along a generator, which still starts near the top).
+# - RS analysis (Fridrich, Goljan & Du, "Reliable Detection of LSB Steganography in Color and Grayscale Images", 2001):
+#   compares how flipping LSBs changes the smoothness of small pixel groups, and estimates the share of pixels whose LSB was
+#   replaced, wherever they are in the frame.
+# Only the R, G, B channels are looked at, alpha is never written by the LSB nodes.
+
+SEGMENTS = 20  # chi-square prefixes at 5%, 10%, ..., 100% of the frame
+MIN_EXPECTED = 5  # value pairs expected less often than this are left out of the chi-square sum
+RS_MASK = (0, 1, 1, 0)
+CHUNK_PIXELS = 1 << 24
+
+
+def _chunks(frames):
+    per_chunk = max(1, CHUNK_PIXELS // max(frames.shape[1] * frames.shape[2], 1))
+    return torch.split(frames[..., :3], per_chunk)
+
+
+def _chi_square(frames, segments):
+    B = frames.shape[0]
+    values = frames.reshape(B, -1).long()
+    # Histogram of every (frame, segment, value) at once, then cumulative over segments to get the prefixes
+    segment = torch.arange(values.shape[1], device=values.device) * segments // values.shape[1]
+    keys = (torch.arange(B, device=values.device)[:, None] * segments + segment) * 256 + values
+    histograms = torch.bincount(keys.flatten(), minlength=B * segments * 256).view(B, segments, 128, 2).double()
+    histograms = histograms.cumsum(dim=1)
+    expected = histograms.sum(dim=-1) / 2
+    used = expected >= MIN_EXPECTED
+    statistic = torch.where(used, (histograms[..., 0] - expected) ** 2 / expected.clamp(min=1), 0).sum(dim=-1)
+    degrees = (used.sum(dim=-1) - 1).clamp(min=1).double()
+    # Probability that the pair counts are this even by chance alone (the survival function of chi-square)
+    return torch.special.gammaincc(degrees / 2, statistic / 2)
+
+
+def chi_square(frames, segments=SEGMENTS):
+    """Returns a [B, segments] float64 tensor, the chi-square embedding probability of the first 1/segments, 2/segments, ...
+    of each frame's colour samples (row-major). Values close to 1 mean the LSBs of that prefix look replaced."""
+    return torch.cat([_chi_square(chunk, segments) for chunk in _chunks(frames)])
+
+
+def payload_estimate(probabilities, threshold=0.5):
+    """Share of the frame (from the start) whose chi-square probability stays over `threshold`, from `chi_square` output."""
+    over = probabilities > threshold
+    # Length of the leading run of prefixes over the threshold
+    run = torch.cumprod(over.double(), dim=-1).sum(dim=-1)
+    return run / probabilities.shape[-1]
+
+
+def _flip(values, direction):
+    # F1 swaps 2k <-> 2k+1, F-1 swaps 2k-1 <-> 2k (i.e. F1 shifted by one), F0 is the identity
+    if direction == 1:
+        return values ^ 1
+    if direction == -1:
+        return ((values + 1) ^ 1) - 1
+    return values
+
+
+def _smoothness(groups):
+    return (groups[..., 1:] - groups[..., :-1]).abs().sum(dim=-1)
+
+
+def _rs_counts(groups, mask):
+    # groups: [B,C,N,n] int16 -> [B,C,4] shares of (R_M, S_M, R_-M, S_-M)
+    base = _smoothness(groups)
+    counts = []
+    for sign in (1, -1):
+        flipped = torch.stack([_flip(groups[..., i], sign * m) for i, m in enumerate(mask)], dim=-1)
+        changed = _smoothness(flipped)
+        counts += [(changed > base).double().mean(dim=-1), (changed < base).double().mean(dim=-1)]
+    return torch.stack(counts, dim=-1)
+
+
+def _rs_analysis(frames, mask):
+    B, H, W, C = frames.shape
+    n = len(mask)
+    # Non-overlapping horizontal groups of n pixels per channel
+    groups = frames[:, :, : W // n * n].to(torch.int16).permute(0, 3, 1, 2).reshape(B, C, -1, n)
+    regular = _rs_counts(groups, mask)
+    inverted = _rs_counts(groups ^ 1, mask)  # the same counts with every LSB flipped
+    d0 = regular[..., 0] - regular[..., 1]
+    d1 = inverted[..., 0] - inverted[..., 1]
+    dm0 = regular[..., 2] - regular[..., 3]
+    dm1 = inverted[..., 2] - inverted[..., 3]
+    # 2(d1 + d0) z^2 + (d-0 - d-1 - d1 - 3 d0) z + d0 - d-0 = 0, the root with the smaller magnitude gives p = z / (z - 1/2)
+    a = 2 * (d1 + d0)
+    b = dm0 - dm1 - d1 - 3 * d0
+    c = d0 - dm0
+    root = torch.sqrt((b**2 - 4 * a * c).clamp(min=0))
+    candidates = torch.stack([(-b + root) / (2 * a), (-b - root) / (2 * a)], dim=-1)
+    z = candidates.gather(-1, candidates.abs().argmin(dim=-1, keepdim=True)).squeeze(-1)
+    z = torch.where(a.abs() > 1e-12, z, -c / torch.where(b.abs() > 1e-12, b, torch.ones_like(b)))
+    estimate = torch.nan_to_num(z / (z - 0.5), nan=0.0).clamp(0, 1)
+    return estimate.mean(dim=-1)
+
+
+def rs_analysis(frames, mask=RS_MASK):
+    """Returns a [B] float64 tensor, the RS estimate of the share of colour samples whose LSB was replaced in each frame."""
+    return torch.cat([_rs_analysis(chunk, mask) for chunk in _chunks(frames)])
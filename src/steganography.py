@@ -1,34 +1,65 @@
-import os
-import sys
 import inspect
 import textwrap
 
 import stegano
 import imwatermark
 import torch
-from PIL import Image
-import numpy as np
-
-# folder_path.py solver, just so the complaints will stop.
-current = os.path.dirname(os.path.realpath(__file__))
-while True:
-    candidate = os.path.join(current, "folder_paths.py")
-    if os.path.exists(candidate):
-        target_dir = current
-        break
-    parent = os.path.dirname(current)
-    if parent == current:
-        raise FileNotFoundError("folder_paths.py not found in any parent directories")
-    current = parent
-sys.path.insert(0, target_dir)
-
-import folder_paths  # This import is handled by the solver above looking for it inside the parent directories. This will most likely hit the one from base ComfyUI, assuming no other nodes or .py file carry this namespace.
+
+from . import frame_pool
+from . import image_convert
+from . import lsb_engine
+from . import steganalysis
+from . import watermark_engine
 
 # Every node is inspired heavily by their reference implementations in their GitHub repository, with changes made to best use PyTorch as possible as it's the main way ComfyUI stores data
 # For more information, check https://docs.comfy.org/custom-nodes/backend/images_and_masks#images
 
 # TODO: Deduplicate this entire file and convert it to a more reasonable standard, like the rest of the nodes.
 
+# Available Stegano generators, minus the ones that are broken in Stegano itself
+GENERATORS = ["None"] + [
+    name
+    for name, _ in inspect.getmembers(stegano.lsb.generators, inspect.isfunction)
+    if name not in ["carmichael", "fermat", "fibonacci", "log_gen", "mersenne"]
+]
+
+# Optional inputs of every node here that can split its batch over worker processes, see frame_pool.py
+POOL_INPUTS = {
+    "workers": (
+        "INT",
+        {
+            "default": 1,
+            "min": 1,
+            "max": frame_pool.MAX_WORKERS,
+            "step": 1,
+            "display": "number",
+            "tooltip": "Worker processes to split the batch over. 1 keeps all the work in the ComfyUI process.",
+        },
+    ),
+    "chunk_size": (
+        "INT",
+        {
+            "default": 0,
+            "min": 0,
+            "step": 1,
+            "display": "number",
+            "tooltip": "Frames handed to a worker at a time. 0 splits the batch evenly over the workers.",
+        },
+    ),
+}
+
+
+def watermark_content(message, types, encoding_format):
+    """Turns the node's message string into what `imwatermark.WatermarkEncoder.set_watermark` expects for `types`."""
+    if types == "bytes":  # Wants watermark bytes
+        return message.encode(encoding_format)
+    elif types == "b16":  # Also wants watermark bytes, but needs to convert to hex first
+        return message.encode(encoding_format).hex().upper().encode(encoding_format)
+    elif types == "bits":  # Wants bit list
+        return [int(bit) for byte in message.encode(encoding_format) for bit in f"{byte:08b}"]
+    else:  # Wants string
+        return message
+
 
 class Stegano_LSB_Encode:
     def __init__(self):
@@ -76,21 +107,7 @@ class Stegano_LSB_Encode:
                         "tooltip": "The secondary number used when accessing certain generators. Needed for: Ackermann (Slow, Fast).",
                     },
                 ),
-                "generator_type": (
-                    ["None"]
-                    + [
-                        name
-                        for name, _ in inspect.getmembers(stegano.lsb.generators, inspect.isfunction)
-                        if name
-                        not in [
-                            "carmichael",
-                            "fermat",
-                            "fibonacci",
-                            "log_gen",
-                            "mersenne",
-                        ]
-                    ],
-                ),  # Extracts the available generators to use with Stegano
+                "generator_type": (GENERATORS,),
                 "encoding": (
                     ["UTF-8", "UTF-32LE"],
                     {
@@ -98,40 +115,36 @@ class Stegano_LSB_Encode:
                         "tooltip": "Chooses the encoding format for the message. Only allows standard UTF-8 or a version with UTF-32LE",
                     },
                 ),
-            }
+            },
+            "optional": {
+                "payload_mode": (
+                    ["repeat", "shard"],
+                    {
+                        "default": "repeat",
+                        "tooltip": textwrap.dedent("""How the message is laid out over the batch:
+                    - repeat: Every frame holds the whole message, readable one frame at a time with Stegano.
+                    - shard: The message is split over as few frames as it fits in, with a sequence header in each. Runs in-process.
+                    """),
+                    },
+                ),
+                **POOL_INPUTS,
+            },
         }
 
     RETURN_TYPES = ("IMAGE",)
     FUNCTION = "encode_stego"
 
-    def encode_stego(self, images, message, m, n, generator_type, encoding):
-        B, H, W, C = images.shape
-        output_images = []
-        for i in range(B):
-            img_tensor = images[i]  # [H,W,C]
-            if img_tensor.dtype == torch.float32:
-                img_np = (img_tensor.numpy() * 255).astype(np.uint8)
-            else:
-                img_np = img_tensor.numpy()
-            img_pil = Image.fromarray(img_np)
-            if generator_type == "None":
-                generator_type = None
-            else:
-                generator_func = getattr(stegano.lsb.generators, generator_type)
-            if generator_type in ["LFSR", "ackermann", "ackermann_naive"]:
-                generator_type = generator_func(m=m)
-            elif generator_type in ["ackermann_fast", "ackermann_slow"]:
-                generator_type = generator_func(m=m, n=n)
-            elif generator_type == "shi_tomashi":
-                temp_dir = folder_paths.get_temp_directory()
-                temp_path = os.path.join(temp_dir, f"image_{i}.png")
-                img_pil.save(temp_path)
-                generator_type = generator_func(temp_path)
-            img_pil = stegano.lsb.hide(img_pil, message, generator_type, encoding=encoding)
-            img_np_out = np.array(img_pil)
-            img_tensor_out = torch.from_numpy(img_np_out).float() / 255.0
-            output_images.append(img_tensor_out)
-        return (torch.stack(output_images, dim=0),)
+    def encode_stego(self, images, message, m, n, generator_type, encoding, payload_mode="repeat", workers=1, chunk_size=0):
+        if payload_mode == "shard":  # Checks the whole batch's capacity before writing the first shard
+            frames = image_convert.to_uint8(images)
+            return (image_convert.to_float(lsb_engine.hide_sharded(frames, message, encoding, generator_type, m, out=frames)),)
+        if generator_type != "shi_tomashi":  # Corners depend on the pixels, `hide` checks those up front itself
+            lsb_engine.check_capacity(message, encoding, generator_type, m, images.shape[1], images.shape[2])
+        frames = image_convert.to_uint8(images)
+        frame_pool.map_frames(
+            lsb_engine.hide, frames, message, encoding, generator_type, m, workers=workers, chunk_size=chunk_size, out=frames
+        )
+        return (image_convert.to_float(frames),)
 
 
 class Stegano_LSB_Decode:
@@ -172,21 +185,7 @@ class Stegano_LSB_Decode:
                         "tooltip": "The secondary number used when accessing certain generators. Needed for: Ackermann (Fast, Slow).",
                     },
                 ),
-                "generator_type": (
-                    ["None"]
-                    + [
-                        name
-                        for name, _ in inspect.getmembers(stegano.lsb.generators, inspect.isfunction)
-                        if name
-                        not in [
-                            "carmichael",
-                            "fermat",
-                            "fibonacci",
-                            "log_gen",
-                            "mersenne",
-                        ]
-                    ],
-                ),
+                "generator_type": (GENERATORS,),
                 "encoding": (
                     ["UTF-8", "UTF-32LE"],
                     {
@@ -194,37 +193,31 @@ class Stegano_LSB_Decode:
                         "tooltip": "Chooses the encoding format for the message. Only allows standard UTF-8 or a version with UTF-32LE",
                     },
                 ),
-            }
+            },
+            "optional": {
+                "payload_mode": (
+                    ["repeat", "shard"],
+                    {
+                        "default": "repeat",
+                        "tooltip": textwrap.dedent("""How the message is laid out over the batch:
+                    - repeat: Every frame holds the whole message, readable one frame at a time with Stegano.
+                    - shard: The message is split over as few frames as it fits in, with a sequence header in each. Runs in-process.
+                    """),
+                    },
+                ),
+                **POOL_INPUTS,
+            },
         }
 
     RETURN_TYPES = ("STRING",)
     FUNCTION = "decode_stego"
 
-    def decode_stego(self, images, m, n, generator_type, encoding):
-        B, H, W, C = images.shape
-        final_output = []
-        for i in range(B):
-            img_tensor = images[i]  # [H,W,C]
-            if img_tensor.dtype == torch.float32:
-                img_np = (img_tensor.numpy() * 255).astype(np.uint8)
-            else:
-                img_np = img_tensor.numpy()
-            img_pil = Image.fromarray(img_np)
-            if generator_type == "None":
-                generator_type = None
-            else:
-                generator_func = getattr(stegano.lsb.generators, generator_type)
-            if generator_type in ["LFSR", "ackermann", "ackermann_naive"]:
-                generator_type = generator_func(m=m)
-            elif generator_type in ["ackermann_fast", "ackermann_slow"]:
-                generator_type = generator_func(m=m, n=n)
-            elif generator_type == "shi_tomashi":
-                temp_dir = folder_paths.get_temp_directory()
-                temp_path = os.path.join(temp_dir, f"image_{i}.png")
-                img_pil.save(temp_path)
-                generator_type = generator_func(temp_path)
-            final_output.append(stegano.lsb.reveal(img_pil, generator_type, encoding=encoding))
-        return ("".join(final_output),)
+    def decode_stego(self, images, m, n, generator_type, encoding, payload_mode="repeat", workers=1, chunk_size=0):
+        frames = image_convert.to_uint8(images)
+        if payload_mode == "shard":
+            return (lsb_engine.reveal_sharded(frames, encoding, generator_type, m),)
+        chunks = frame_pool.map_chunks(lsb_engine.reveal, frames, encoding, generator_type, m, workers=workers, chunk_size=chunk_size)
+        return ("".join(message for messages in chunks for message in messages),)
 
 
 class IMWatermarkEncode:
@@ -299,7 +292,15 @@ class IMWatermarkEncode:
                         "multiline": False,
                         "tooltip": 'If, for some reason, your chosen encoding format is not available in the dropdown, select "Other" in encoding_format and type in your encoding format here. Supports all format written in Python\'s `encoding` module.',
                     },
-                )
+                ),
+                "keep_model_loaded": (
+                    "BOOLEAN",
+                    {
+                        "default": True,
+                        "tooltip": "rivaGan only. Keeps the model sessions in memory for the next run, turn off to free them afterwards.",
+                    },
+                ),
+                **POOL_INPUTS,
             },
         }
 
@@ -311,30 +312,25 @@ class IMWatermarkEncode:
             encoding_format = other_encoding_format
         return encoding_format
 
-    def encode_imwatermark(self, images, message, algorithm, types, encoding_format, other_encoding_format):
-        B, H, W, C = images.shape
-        output_images = []
+    def release_model(self, keep_model_loaded, workers):
+        if not keep_model_loaded:
+            watermark_engine.evict_rivagan()
+            if workers > 1:  # Workers hold their own sessions
+                frame_pool.shutdown()
+
+    def encode_imwatermark(
+        self, images, message, algorithm, types, encoding_format, other_encoding_format, keep_model_loaded=True, workers=1, chunk_size=0
+    ):
         encoding_format = self.encoding_selector(encoding_format, other_encoding_format)
+        bits = watermark_engine.watermark_bits(types, watermark_content(message, types, encoding_format)).tolist()
+        watermark_engine.check_watermark(images.shape[1], images.shape[2], len(bits), algorithm)
+        frames = image_convert.to_uint8(images)
         if algorithm == "rivaGan":
-            imwatermark.WatermarkEncoder().loadModel()
-        if types == "bytes":  # Wants watermark bytes
-            encoded_message = message.encode(encoding_format)
-        elif types == "b16":  # Also wants watermark bytes, but needs to convert to hex first
-            encoded_message = message.encode(encoding_format).hex().upper().encode(encoding_format)
-        elif types == "bits":  # Wants bit list
-            encoded_message = [int(bit) for byte in message.encode(encoding_format) for bit in f"{byte:08b}"]
-        else:  # Wants string
-            encoded_message = message
-        encoder = imwatermark.WatermarkEncoder()
-        encoder.set_watermark(types, encoded_message)
-        for i in range(B):
-            img_tensor = images[i]  # [H,W,C]
-            img_np = (img_tensor.numpy() * 255).astype(np.uint8)
-            img_pil = np.array(Image.fromarray(img_np))[:, :, ::-1]
-            encoded_np = np.array(encoder.encode(img_pil, algorithm))[:, :, ::-1]
-            img_tensor_out = torch.from_numpy(encoded_np.copy()).float() / 255.0
-            output_images.append(img_tensor_out)
-        return (torch.stack(output_images, dim=0),)
+            frame_pool.map_frames(watermark_engine.rivagan_encode, frames, bits, workers=workers, chunk_size=chunk_size, out=frames)
+            self.release_model(keep_model_loaded, workers)
+        else:
+            frame_pool.map_frames(watermark_engine.encode, frames, bits, algorithm, workers=workers, chunk_size=chunk_size, out=frames)
+        return (image_convert.to_float(frames),)
 
 
 class IMWatermarkDecode:
@@ -412,7 +408,15 @@ class IMWatermarkDecode:
                         "multiline": False,
                         "tooltip": 'If, for some reason, your chosen encoding format is not available in the dropdown, select "Other" in encoding_format and type in your encoding format here. Supports all format written in Python\'s `encoding` module.',
                     },
-                )
+                ),
+                "keep_model_loaded": (
+                    "BOOLEAN",
+                    {
+                        "default": True,
+                        "tooltip": "rivaGan only. Keeps the model sessions in memory for the next run, turn off to free them afterwards.",
+                    },
+                ),
+                **POOL_INPUTS,
             },
         }
 
@@ -424,8 +428,15 @@ class IMWatermarkDecode:
             encoding_format = other_encoding_format
         return encoding_format
 
-    def decode_imwatermark(self, images, length, algorithm, types, encoding_format, other_encoding_format):
-        B, H, W, C = images.shape
+    def release_model(self, keep_model_loaded, workers):
+        if not keep_model_loaded:
+            watermark_engine.evict_rivagan()
+            if workers > 1:  # Workers hold their own sessions
+                frame_pool.shutdown()
+
+    def decode_imwatermark(
+        self, images, length, algorithm, types, encoding_format, other_encoding_format, keep_model_loaded=True, workers=1, chunk_size=0
+    ):
         final_output = []
         encoding_format = self.encoding_selector(encoding_format, other_encoding_format)
         if types in ["bytes", "bits", "b16"]:  # Bit-related types
@@ -441,14 +452,16 @@ class IMWatermarkDecode:
                 length = length
             decoder = imwatermark.WatermarkDecoder(types, length)
         else:
+            length = 128 if types == "uuid" else 32
             decoder = imwatermark.WatermarkDecoder(types)
+        frames = image_convert.to_uint8(images)
         if algorithm == "rivaGan":
-            imwatermark.WatermarkDecoder().loadModel()
-        for i in range(B):
-            img_tensor = images[i]  # [H,W,C]
-            img_np = (img_tensor.numpy() * 255).astype(np.uint8)
-            img_pil = np.array(Image.fromarray(img_np))[:, :, ::-1]
-            decoded_bit = decoder.decode(img_pil, algorithm)
+            chunks = frame_pool.map_chunks(watermark_engine.rivagan_decode, frames, length, workers=workers, chunk_size=chunk_size)
+            self.release_model(keep_model_loaded, workers)
+        else:
+            chunks = frame_pool.map_chunks(watermark_engine.decode, frames, length, algorithm, workers=workers, chunk_size=chunk_size)
+        for frame_bits in torch.cat(chunks).numpy():
+            decoded_bit = decoder.reconstruct(frame_bits)
             if types == "bytes":  # Returns watermark bytes
                 try:
                     decoded_str = decoded_bit.decode(encoding_format)
@@ -473,6 +486,204 @@ class IMWatermarkDecode:
         return ("".join(final_output),)
 
 
+class SteganoCapacityPlanner:
+    def __init__(self):
+        pass
+
+    CATEGORY = "ARG Toolkit/Steganography"
+    DESCRIPTION = textwrap.dedent("""Checks whether a message fits before encoding it, without touching any pixel.
+    Reports the LSB capacity of every frame for the chosen generator and the watermark length in bits for the chosen algorithm.
+    Only the Shi-Tomasi generator has to look at the frames, since its pixels are the corners of each one.
+    """)
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE", {}),
+                "message": (
+                    "STRING",
+                    {
+                        "default": "Hello World!",
+                        "multiline": True,
+                        "placeholder": "Input your message here...",
+                    },
+                ),
+                "m": (
+                    "INT",
+                    {
+                        "default": 1,
+                        "min": 1,
+                        "step": 1,
+                        "display": "number",
+                        "tooltip": "The primary number used when accessing certain generators. Needed for: LFSR, Ackermann (all variants).",
+                    },
+                ),
+                "generator_type": (GENERATORS,),
+                "encoding": (
+                    ["UTF-8", "UTF-32LE"],
+                    {"default": "UTF-8", "tooltip": "Encoding of the message for the LSB nodes."},
+                ),
+                "algorithm": (["dwtDct", "dwtDctSvd", "rivaGan"], {"tooltip": "Invisible watermark algorithm to check against."}),
+                "types": (["bytes", "b16", "bits", "uuid", "ipv4"], {"tooltip": "Invisible watermark type of the message."}),
+                "encoding_format": (
+                    ["utf-8", "utf-16", "utf-32", "ascii", "latin-1", "cp1252", "utf-8-sig"],
+                    {"tooltip": "Encoding of the message for the watermark nodes."},
+                ),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "INT", "BOOLEAN", "INT", "BOOLEAN")
+    RETURN_NAMES = ("report", "lsb_capacity_bytes", "lsb_fits", "watermark_bits", "watermark_fits")
+    FUNCTION = "plan"
+
+    def plan(self, images, message, m, generator_type, encoding, algorithm, types, encoding_format):
+        B, H, W, C = images.shape
+        message_bytes = len(message.encode(encoding))
+        if generator_type == "shi_tomashi":
+            frames = image_convert.to_uint8(images)
+            pixels = [len(lsb_engine.shi_tomasi_positions(frames[i])) for i in range(B)]
+        else:
+            pixels = [lsb_engine.capacity_pixels(generator_type, m, H, W)] * B
+        capacities = [lsb_engine.max_message_bytes(count) for count in pixels]
+        lsb_capacity = min(capacities, default=0)
+        lsb_fits = B > 0 and 0 < message_bytes <= lsb_capacity
+
+        report = [
+            f"LSB ({generator_type}, {encoding}): message is {message_bytes} bytes, {lsb_engine.payload_pixels(message_bytes)} pixels"
+        ]
+        for i, (count, capacity) in enumerate(zip(pixels, capacities)):
+            report.append(f"  frame {i}: {count} pixels, up to {capacity} bytes{'' if message_bytes <= capacity else ' (too long)'}")
+
+        watermark_bits = 0
+        try:
+            watermark_bits = len(watermark_engine.watermark_bits(types, watermark_content(message, types, encoding_format)))
+            watermark_engine.check_watermark(H, W, watermark_bits, algorithm)
+            watermark_fits, reason = True, "fits"
+        except Exception as e:  # Anything the encoder would raise on, including messages that are not a valid uuid/ipv4
+            watermark_fits, reason = False, f"{type(e).__name__}: {e}"
+        report.append(
+            f"Watermark ({algorithm}, {types}): {watermark_bits} bits, {watermark_engine.block_count(H, W)} blocks per frame, {reason}"
+        )
+        return ("\n".join(report), lsb_capacity, lsb_fits, watermark_bits, watermark_fits)
+
+
+class SteganoLSBAnalysis:
+    def __init__(self):
+        pass
+
+    CATEGORY = "ARG Toolkit/Steganography"
+    DESCRIPTION = textwrap.dedent("""Scores every frame of the batch for LSB replacement, to pick out the frames worth running the LSB decoder on.
+    - Chi-square attack: share of the frame, from the first pixel on, whose pairs of values (2k, 2k+1) are suspiciously even. Catches Stegano's sequential payloads.
+    - RS analysis: estimated share of colour samples whose LSB was replaced, wherever they are in the frame.
+    Both scores go from 0 (clean) to 1 (every LSB replaced). Frames where either score reaches the threshold are returned as candidates, one image per frame, so when none does the nodes downstream of `candidates` are skipped.
+    """)
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE", {}),
+                "threshold": (
+                    "FLOAT",
+                    {
+                        "default": 0.2,
+                        "min": 0.0,
+                        "max": 1.0,
+                        "step": 0.01,
+                        "tooltip": "Score at which a frame counts as a candidate. Clean photos usually stay under 0.1 on both scores.",
+                    },
+                ),
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "FLOAT", "FLOAT", "IMAGE")
+    RETURN_NAMES = ("report", "chi_square", "rs_estimate", "candidates")
+    OUTPUT_IS_LIST = (False, True, True, True)
+    FUNCTION = "analyze"
+
+    def analyze(self, images, threshold):
+        frames = image_convert.to_uint8(images)
+        chi_square = steganalysis.payload_estimate(steganalysis.chi_square(frames))
+        rs_estimate = steganalysis.rs_analysis(frames)
+        flagged = torch.maximum(chi_square, rs_estimate) >= threshold
+
+        report = [f"{int(flagged.sum())} of {frames.shape[0]} frames at or over {threshold}"]
+        for i, (chi, rs, hit) in enumerate(zip(chi_square.tolist(), rs_estimate.tolist(), flagged.tolist())):
+            report.append(f"  frame {i}: chi-square {chi:.2f}, RS {rs:.2f}{' (candidate)' if hit else ''}")
+        # A list of single frames rather than a batch, an empty batch would break most IMAGE nodes
+        candidates = [images[i : i + 1] for i in flagged.nonzero().flatten().tolist()]
+        return ("\n".join(report), chi_square.tolist(), rs_estimate.tolist(), candidates)
+
+
+class SteganoLSBSweep:
+    def __init__(self):
+        pass
+
+    CATEGORY = "ARG Toolkit/Steganography"
+    DESCRIPTION = textwrap.dedent("""Tries every LSB generator (and a range of m for the ones that take it) on every frame, and ranks what decodes.
+    The LSBs are read once per batch, and each attempt stops at the length prefix unless it is valid, so a full sweep costs far less than one Stegano LSB Decode per guess.
+    Candidates are ranked by how much of the decoded text is printable.
+    """)
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE", {}),
+                "generator_type": (["all"] + GENERATORS, {"default": "all", "tooltip": "Generator to try, or all of them."}),
+                "m_min": (
+                    "INT",
+                    {"default": 1, "min": 1, "step": 1, "display": "number", "tooltip": "Smallest m tried for LFSR and Ackermann."},
+                ),
+                "m_max": (
+                    "INT",
+                    {
+                        "default": 1024,
+                        "min": 1,
+                        "step": 1,
+                        "display": "number",
+                        "tooltip": "Largest m tried for LFSR and Ackermann. LFSR only depends on the bit length of m, Ackermann stops at 4.",
+                    },
+                ),
+                "encoding": (["all", "UTF-8", "UTF-32LE"], {"default": "all", "tooltip": "Encoding to decode payloads with."}),
+                "top_k": (
+                    "INT",
+                    {"default": 5, "min": 1, "step": 1, "display": "number", "tooltip": "Candidates listed per frame."},
+                ),
+                "stop_on_first": (
+                    "BOOLEAN",
+                    {"default": True, "tooltip": "Stop sweeping a frame once an attempt decodes it to fully printable text."},
+                ),
+            },
+            "optional": {
+                **POOL_INPUTS,
+            },
+        }
+
+    RETURN_TYPES = ("STRING", "STRING")
+    RETURN_NAMES = ("report", "best")
+    FUNCTION = "sweep"
+
+    def sweep(self, images, generator_type, m_min, m_max, encoding, top_k, stop_on_first, workers=1, chunk_size=0):
+        generators = [name for name in GENERATORS if name != "None"] if generator_type == "all" else [generator_type]
+        attempts = lsb_engine.sweep_attempts(generators, m_min, m_max)
+        encodings = lsb_engine.ENCODINGS if encoding == "all" else (encoding,)
+        frames = image_convert.to_uint8(images)
+        chunks = frame_pool.map_chunks(lsb_engine.sweep, frames, attempts, encodings, stop_on_first, workers=workers, chunk_size=chunk_size)
+        candidates = [frame_candidates for chunk in chunks for frame_candidates in chunk]
+
+        report = [f"{len(attempts)} generator settings tried on {len(candidates)} frames"]
+        for i, frame_candidates in enumerate(candidates):
+            report.append(f"frame {i}: {len(frame_candidates)} candidates")
+            for candidate in frame_candidates[:top_k]:
+                report.append(
+                    f"  {candidate.score:.2f} {candidate.generator_type} (m={candidate.m}, {candidate.encoding}): {candidate.message!r}"
+                )
+        ranked = sorted((c for frame_candidates in candidates for c in frame_candidates[:1]), key=lambda c: -c.score)
+        return ("\n".join(report), ranked[0].message if ranked else "")
+
+
 # A dictionary that contains all nodes you want to export with their names
 # NOTE: names should be globally unique
 NODE_CLASS_MAPPINGS = {
@@ -480,6 +691,9 @@ NODE_CLASS_MAPPINGS = {
     "SteganoLSBDecode": Stegano_LSB_Decode,
     "IMWatermarkEncode": IMWatermarkEncode,
     "IMWatermarkDecode": IMWatermarkDecode,
+    "SteganoCapacityPlanner": SteganoCapacityPlanner,
+    "SteganoLSBAnalysis": SteganoLSBAnalysis,
+    "SteganoLSBSweep": SteganoLSBSweep,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
@@ -487,4 +701,7 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "SteganoLSBDecode": "Stegano LSB Decode",
     "IMWatermarkEncode": "Invisible Watermark Encode",
     "IMWatermarkDecode": "Invisible Watermark Decode",
+    "SteganoCapacityPlanner": "Steganography Capacity Planner",
+    "SteganoLSBAnalysis": "Stegano LSB Analysis",
+    "SteganoLSBSweep": "Stegano LSB Decode Sweep",
 }
@@ -0,0 +1,100 @@
+import functools
+
+import numpy as np
+
+# Index permutations for the transposition ciphers, with output identical to secretpy. All four only move letters around,
+# and where a letter goes only depends on the key and the text length:
+# - Scytale: letters are read off by their position modulo the key.
+# - Zigzag: letters are read off rail by rail, a letter's rail coming from its position in the zigzag's period.
+# - ColTrans: letters are read off column by column, the columns ordered by their key letter (ties keep key order).
+# - MyszkowskiTransposition: the same, but columns under the same key letter are read off together, row by row.
+# So every (cipher, key, length) is one permutation, built once with a stable argsort and cached. Encrypting gathers the
+# text's code points through it, decrypting scatters them back. `crypt` returns None for anything it cannot take (keys
+# secretpy rejects or handles in its own odd way, key letters outside the alphabet), and the caller runs secretpy itself.
+
+MAX_PERMUTATIONS = 256
+
+TRANSPOSITION_CIPHERS = ("ColTrans", "MyszkowskiTransposition", "Scytale", "Zigzag")
+
+
+@functools.lru_cache(maxsize=MAX_PERMUTATIONS)
+def key_ranks(alphabet, key, shared):
+    """Reading order of the key's columns, by the alphabet index of their letter. With `shared`, equal letters share a rank."""
+    indexes = {c: i for i, letters in enumerate(alphabet) for c in letters}
+    letters = [indexes[char] for char in key]
+    if shared:
+        return tuple(sorted(set(letters)).index(letter) for letter in letters)
+    order = sorted(range(len(letters)), key=letters.__getitem__)
+    ranks = [0] * len(letters)
+    for rank, column in enumerate(order):
+        ranks[column] = rank
+    return tuple(ranks)
+
+
+def _rail(positions, rails):
+    cycle = positions % (2 * (rails - 1))
+    return np.minimum(cycle, 2 * (rails - 1) - cycle)
+
+
+@functools.lru_cache(maxsize=MAX_PERMUTATIONS)
+def permutation(name, key, length):
+    """Encryption gather order: letter i of the ciphertext is letter `permutation[i]` of the plaintext.
+
+    `key` is the Scytale or Zigzag number, or the `key_ranks` of a ColTrans or Myszkowski key.
+    """
+    positions = np.arange(length)
+    if name == "Scytale":
+        order = positions % key
+    elif name == "Zigzag":
+        order = _rail(positions, key)
+    else:
+        # Rows within columns of the same rank come out in position order, which a stable sort keeps
+        order = np.array(key)[positions % len(key)]
+    result = np.argsort(order, kind="stable")
+    result.flags.writeable = False  # Shared through the cache
+    return result
+
+
+def cipher_key(name, alphabet, key):
+    """The `permutation` key of a node's key, or None when secretpy has to run it."""
+    if name in ("Scytale", "Zigzag"):
+        return key if isinstance(key, int) and key >= (1 if name == "Scytale" else 2) else None
+    if not key or not alphabet:
+        return None
+    return key_ranks(alphabet, key, name == "MyszkowskiTransposition")
+
+
+def _code_points(text):
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+
+
+def crypt(name, text, alphabet, key, encrypt):
+    """The secretpy `encrypt`/`decrypt` result of a transposition cipher, or None when the caller has to fall back to it."""
+    if name not in TRANSPOSITION_CIPHERS:
+        return None
+    try:
+        key = cipher_key(name, alphabet, key)
+        points = _code_points(text)
+    except (KeyError, TypeError, UnicodeEncodeError):
+        return None
+    if key is None or not len(points):
+        return None  # Empty texts are left to secretpy, which fails on some of them
+    order = permutation(name, key, len(points))
+    if encrypt:
+        result = points[order]
+    else:
+        result = np.empty_like(points)
+        result[order] = points
+    return result.tobytes().decode("utf-32-le")
+
+
+def decrypt_indexes(name, indexes, keys):
+    """Decryptions of an int array (alphabet indexes or code points) under every `permutation` key of `keys`, as [K, L].
+
+    Meant for key searches: a whole rail count or column order range comes out as one array for `NgramTable.score_indexes`.
+    """
+    indexes = np.asarray(indexes)
+    result = np.empty((len(keys), len(indexes)), dtype=indexes.dtype)
+    rows = np.arange(len(keys))[:, None]
+    result[rows, np.stack([permutation(name, key, len(indexes)) for key in keys])] = indexes
+    return result
@@ -0,0 +1,296 @@
+import os
+import threading
+
+import cv2
+import imwatermark
+import numpy as np
+import torch
+
+from .image_convert import bgr_view
+
+# Batched re-implementation of invisible-watermark's `dwtDct` and `dwtDctSvd` algorithms working on [B,H,W,C] uint8 tensors.
+# Each frame goes through the same steps as `imwatermark.maxDct.EmbedMaxDct`/`imwatermark.dwtDctSvd.EmbedDwtDctSvd`:
+# - RGB -> YUV (OpenCV, so the uint8 rounding is identical), cropped to a multiple of 4 in both directions.
+# - One level Haar DWT of every channel with a non-zero scale, then the approximation band is cut into 4x4 blocks.
+# - Block k of a frame (row-major) carries watermark bit k % wmLen, quantized with `(v // scale + 0.25 + 0.5 * bit) * scale`.
+# - Decoding averages every block's vote for a bit over the frame and thresholds it at 127/255.
+# For more information, check https://github.com/ShieldMnt/invisible-watermark/tree/main/imwatermark
+
+# The Haar transforms below do the exact same floating point operations as pywt (two taps, one product each, summed), so the
+# coefficients, and with them the decoded bits, come out bit-identical. dwtDctSvd only ever touches the largest singular value
+# of the (orthonormal) DCT of a block, and an orthonormal transform does not change singular values or the rank-1 update
+# along them, so the DCT round trip cancels out and the update is applied to the wavelet block directly.
+
+SCALES = {"dwtDct": (0, 36, 36), "dwtDctSvd": (0, 36, 0)}  # per Y, U, V channel, same defaults as the library
+BLOCK = 4
+MIN_PIXELS = 256 * 256
+CHUNK_PIXELS = 1 << 24  # frames are transformed in float64, so very long batches are processed a few frames at a time
+
+_HAAR = 0.7071067811865476  # pywt.Wavelet("haar").dec_lo[0]
+
+# RivaGAN ONNX sessions, loaded on first use and shared by every node and thread of the process (`InferenceSession.run` is
+# thread-safe). The library keeps them on `RivaWatermark` and reloads through a fresh encoder each queue item, this cache can
+# be warmed up ahead of time and evicted to give the memory back.
+RIVAGAN_MODEL_DIR = os.path.dirname(os.path.abspath(imwatermark.__file__))
+RIVAGAN_BITS = 32
+RIVAGAN_THRESHOLD = 0.52
+
+_rivagan_sessions = {}
+_rivagan_lock = threading.Lock()
+
+
+def watermark_bits(wm_type, content):
+    """Watermark bits (0/1 float64 tensor) exactly as `imwatermark.WatermarkEncoder.set_watermark` lays them out."""
+    encoder = imwatermark.WatermarkEncoder()
+    encoder.set_watermark(wm_type, content)
+    # The encoder only exposes the length publicly, but the bit list is what the algorithms embed.
+    return torch.tensor([int(bit) for bit in encoder._watermarks], dtype=torch.float64)
+
+
+def _check_size(frames, method):
+    if method not in SCALES and method != "rivaGan":
+        raise NameError(f"{method} is not supported")
+    if frames.shape[1] * frames.shape[2] < MIN_PIXELS:
+        raise RuntimeError("image too small, should be larger than 256x256")
+
+
+def block_count(height, width):
+    """4x4 approximation band blocks per channel of a frame, i.e. how many votes the watermark bits get split over."""
+    return (height // 4 * 4 // 2 // BLOCK) * (width // 4 * 4 // 2 // BLOCK)
+
+
+def check_watermark(height, width, wm_length, method):
+    """Raises before any pixel work if `height` x `width` frames cannot carry `wm_length` bits with `method`."""
+    if method not in SCALES and method != "rivaGan":
+        raise NameError(f"{method} is not supported")
+    if height * width < MIN_PIXELS:
+        raise RuntimeError("image too small, should be larger than 256x256")
+    if wm_length <= 0:
+        raise ValueError("The watermark is empty, there is nothing to embed.")
+    if method == "rivaGan":
+        _check_rivagan_length(wm_length)
+    elif wm_length > block_count(height, width):
+        # The library would embed it anyway, the bits past the last block just always decode as 0
+        raise ValueError(
+            f"The watermark is too long: {wm_length} bits for {block_count(height, width)} blocks in a {width}x{height} image."
+        )
+
+
+def _convert(frames, code):
+    # Colour conversion is per pixel, so the whole batch goes through OpenCV as one tall image.
+    B, H, W, _ = frames.shape
+    pixels = frames[..., :3].contiguous().cpu().numpy().reshape(B * H, W, 3)
+    return torch.from_numpy(cv2.cvtColor(pixels, code).reshape(B, H, W, 3))
+
+
+def _dwt(x, dim):
+    pairs = x.unfold(dim, 2, 2)
+    even, odd = pairs[..., 0] * _HAAR, pairs[..., 1] * _HAAR
+    return even + odd, even - odd
+
+
+def _idwt(approximation, detail, dim):
+    a, d = approximation * _HAAR, detail * _HAAR
+    return torch.stack([a + d, a - d], dim=dim + 1).flatten(dim, dim + 1)
+
+
+def _dwt2(planes):
+    # planes: [B,H,W] float64 -> (aa, da, ad, dd), i.e. pywt's (cA, (cH, cV, cD)) for every frame at once.
+    low, high = _dwt(planes, 1)
+    aa, ad = _dwt(low, 2)
+    da, dd = _dwt(high, 2)
+    return aa, da, ad, dd
+
+
+def _idwt2(aa, da, ad, dd):
+    return _idwt(_idwt(aa, ad, 2), _idwt(da, dd, 2), 1)
+
+
+def _block_view(bands):
+    # [B,h,w] -> [B,rows,cols,4,4] view over the whole blocks only, the leftover edge is never touched by the library either.
+    B, h, w = bands.shape
+    rows, cols = h // BLOCK, w // BLOCK
+    blocks = bands[:, : rows * BLOCK, : cols * BLOCK].unflatten(2, (cols, BLOCK)).unflatten(1, (rows, BLOCK))
+    return blocks.permute(0, 1, 3, 2, 4)
+
+
+def _quantize(value, bits, scale):
+    return (torch.div(value, scale, rounding_mode="floor") + 0.25 + 0.5 * bits) * scale
+
+
+def _max_coefficient(blocks):
+    # Largest magnitude coefficient of each block, skipping the first one (argmax keeps the first of ties, like numpy).
+    flat = blocks.flatten(-2)
+    position = flat[..., 1:].abs().argmax(-1, keepdim=True) + 1
+    return flat, position
+
+
+def _embed_blocks(blocks, bits, scale, method):
+    # blocks: [B,N,4,4] float64, bits: [N] -> watermarked blocks
+    if method == "dwtDct":
+        flat, position = _max_coefficient(blocks)
+        value = flat.gather(-1, position).squeeze(-1)
+        quantized = _quantize(value.abs(), bits, scale)
+        flat = flat.scatter(-1, position, torch.where(value >= 0, quantized, -quantized).unsqueeze(-1))
+        return flat.unflatten(-1, (BLOCK, BLOCK))
+    u, s, vh = torch.linalg.svd(blocks)
+    delta = _quantize(s[..., 0], bits, scale) - s[..., 0]
+    return blocks + delta[..., None, None] * (u[..., :, :1] @ vh[..., :1, :])
+
+
+def _infer_blocks(blocks, scale, method):
+    # blocks: [B,N,4,4] float64 -> [B,N] votes (0/1)
+    if method == "dwtDct":
+        flat, position = _max_coefficient(blocks)
+        value = flat.gather(-1, position).squeeze(-1).abs()
+    else:
+        value = torch.linalg.svdvals(blocks)[..., 0]
+    return (torch.remainder(value, scale) > 0.5 * scale).double()
+
+
+def _chunks(frames):
+    per_chunk = max(1, CHUNK_PIXELS // (frames.shape[1] * frames.shape[2]))
+    return torch.split(frames, per_chunk)
+
+
+def _output(frames, out):
+    if out is None:
+        return frames.clone()
+    if out is not frames:
+        out.copy_(frames)
+    return out
+
+
+def encode(frames, bits, method="dwtDct", out=None):
+    """Embeds `bits` (see `watermark_bits`) into every frame of a uint8 [B,H,W,C] tensor, returns a new uint8 tensor or `out`.
+
+    Output is the same as running `WatermarkEncoder.encode` on each frame (in BGR) and flipping the result back to RGB.
+    Alpha, if any, is copied over untouched. `out` may be `frames` itself, every chunk is read before it gets overwritten.
+    """
+    _check_size(frames, method)
+    bits = torch.as_tensor(bits, dtype=torch.float64)
+    rows, cols = frames.shape[1] // 4 * 4, frames.shape[2] // 4 * 4
+    output = _output(frames, out)
+    start = 0
+    for chunk in _chunks(frames):
+        yuv = _convert(chunk, cv2.COLOR_RGB2YUV)
+        for channel, scale in enumerate(SCALES[method][:2]):
+            if scale <= 0:
+                continue
+            aa, da, ad, dd = _dwt2(yuv[:, :rows, :cols, channel].double())
+            blocks = _block_view(aa)
+            count = blocks.shape[1] * blocks.shape[2]
+            block_bits = bits[torch.arange(count) % len(bits)]
+            embedded = _embed_blocks(blocks.flatten(1, 2), block_bits, scale, method)
+            blocks.copy_(embedded.unflatten(1, blocks.shape[1:3]))
+            # The library hands the detail bands to idwt2 as (cV, cH, cD) instead of (cH, cV, cD), which transposes every 2x2
+            # pixel square of the channel. Kept as-is so the output stays identical. Casting mirrors numpy's (truncate, wrap).
+            planes = _idwt2(aa, ad, da, dd)
+            yuv[:, :rows, :cols, channel] = (planes.to(torch.int64) & 0xFF).to(torch.uint8)
+        output[start : start + len(chunk), ..., :3] = _convert(yuv, cv2.COLOR_YUV2RGB).to(output.device)
+        start += len(chunk)
+    return output
+
+
+def decode(frames, wm_length, method="dwtDct"):
+    """Extracts `wm_length` watermark bits from every frame of a uint8 [B,H,W,C] tensor, returns a [B, wm_length] bool tensor.
+
+    Same bits as `WatermarkDecoder.decode` returns before `reconstruct`, so feed each row to `WatermarkDecoder.reconstruct`.
+    """
+    _check_size(frames, method)
+    rows, cols = frames.shape[1] // 4 * 4, frames.shape[2] // 4 * 4
+    results = []
+    for chunk in _chunks(frames):
+        yuv = _convert(chunk, cv2.COLOR_RGB2YUV)
+        votes = torch.zeros(len(chunk), wm_length, dtype=torch.float64)
+        counts = torch.zeros(wm_length, dtype=torch.float64)
+        for channel, scale in enumerate(SCALES[method][:2]):
+            if scale <= 0:
+                continue
+            low, _ = _dwt(yuv[:, :rows, :cols, channel].double(), 1)
+            aa, _ = _dwt(low, 2)
+            blocks = _block_view(aa).flatten(1, 2)
+            bit_index = torch.arange(blocks.shape[1]) % wm_length
+            votes.index_add_(1, bit_index, _infer_blocks(blocks, scale, method))
+            counts += torch.bincount(bit_index, minlength=wm_length)
+        # Bits without a single block average to NaN in the library and come out as 0, which is what 0/0 does here as well.
+        results.append(votes / counts * 255 > 127)
+    return torch.cat(results)
+
+
+def _load_rivagan_session(kind):
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError("RivaGAN requires onnxruntime to be installed. You can install it with pip: `pip install onnxruntime`.") from e
+    return onnxruntime.InferenceSession(os.path.join(RIVAGAN_MODEL_DIR, f"rivagan_{kind}.onnx"))
+
+
+def rivagan_session(kind):
+    """Cached RivaGAN "encoder" or "decoder" session, loaded once per process on first use."""
+    session = _rivagan_sessions.get(kind)
+    if session is None:
+        with _rivagan_lock:
+            session = _rivagan_sessions.get(kind)
+            if session is None:
+                session = _rivagan_sessions[kind] = _load_rivagan_session(kind)
+    return session
+
+
+def warm_up_rivagan():
+    """Loads both sessions and runs them once on a blank frame, so the first queue item does not pay for it."""
+    frame = torch.zeros(1, 256, 256, 3, dtype=torch.uint8)
+    rivagan_decode(rivagan_encode(frame, [0] * RIVAGAN_BITS), RIVAGAN_BITS)
+
+
+def evict_rivagan():
+    """Drops the cached sessions, the next RivaGAN call loads them again."""
+    with _rivagan_lock:
+        _rivagan_sessions.clear()
+
+
+def _reset_rivagan_after_fork():
+    # ONNX Runtime sessions (and a lock some other thread may have held) do not survive a fork, so workers load their own.
+    global _rivagan_lock
+    _rivagan_lock = threading.Lock()
+    _rivagan_sessions.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_rivagan_after_fork)
+
+
+def _rivagan_input(frame):
+    # uint8 [H,W,C] RGB -> float32 [1,3,1,H,W] BGR in [-1, 1], the same preprocessing as `RivaWatermark`
+    pixels = bgr_view(frame).astype(np.float32)
+    pixels /= 127.5
+    pixels -= 1.0
+    return np.ascontiguousarray(pixels.transpose(2, 0, 1)[None, :, None])
+
+
+def _check_rivagan_length(wm_length):
+    if wm_length != RIVAGAN_BITS:
+        raise RuntimeError("rivaGan only supports 32 bits watermarks now.")
+
+
+def rivagan_encode(frames, bits, out=None):
+    """RivaGAN version of `encode`. The ONNX model takes one frame at a time, so this is a plain loop over the batch."""
+    _check_size(frames, "rivaGan")
+    _check_rivagan_length(len(bits))
+    session = rivagan_session("encoder")
+    data = np.array([bits], dtype=np.float32)
+    output = _output(frames, out)
+    for i in range(frames.shape[0]):
+        encoded = torch.from_numpy(session.run(None, {"frame": _rivagan_input(frames[i]), "data": data})[0])
+        # Written through a BGR view of the output frame, so the model's BGR result lands in RGB order without a flip copy
+        bgr_view(output[i])[...] = ((encoded.clamp(-1.0, 1.0)[0, :, 0].permute(1, 2, 0) + 1.0) * 127.5).to(torch.uint8).numpy()
+    return output
+
+
+def rivagan_decode(frames, wm_length):
+    """RivaGAN version of `decode`, one frame at a time."""
+    _check_size(frames, "rivaGan")
+    _check_rivagan_length(wm_length)
+    session = rivagan_session("decoder")
+    bits = [torch.from_numpy(session.run(None, {"frame": _rivagan_input(frames[i])})[0][0]) > RIVAGAN_THRESHOLD for i in range(len(frames))]
+    return torch.stack(bits)
@@ -0,0 +1,101 @@
+import os
+import sys
+import math
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# The process pool behind frame_pool.py and the cipher nodes' `workers` inputs, kept apart from the frame code so nodes
+# that only fan out plain tasks (the ciphers) never import torch or OpenCV.
+# Workers are forked so they inherit the already imported package (ComfyUI imports custom nodes from a path, a freshly spawned
+# interpreter could not import them by name, and forkserver/spawn children would rerun ComfyUI's main script to rebuild
+# __main__). Fork is only used on Linux: macOS can crash in a forked child of a threaded process (its system frameworks are not
+# fork-safe), and Windows has no fork. Everywhere else everything runs in-process instead.
+# The pool only ever grows: a smaller `workers` request reuses the bigger pool and keeps that many tasks in flight, so switching
+# between nodes with different settings never re-forks.
+
+# The `workers` widgets' upper bound is fixed so saved workflows load the same on every machine, requests are clamped to the
+# cores of the machine that runs them
+MAX_WORKERS = 64
+CPU_COUNT = os.cpu_count() or 1
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def can_fork():
+    return sys.platform.startswith("linux") and "fork" in multiprocessing.get_all_start_methods()
+
+
+def usable_workers(workers):
+    return min(workers, CPU_COUNT)
+
+
+def _init_worker():
+    # The pool is the parallelism, one thread per worker avoids oversubscribing the cores. Only the libraries the parent
+    # already loaded need it, the others were never imported into the fork.
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(1)
+    if "cv2" in sys.modules:
+        sys.modules["cv2"].setNumThreads(1)
+
+
+def get_executor(workers):
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers < workers:
+            if _executor is not None:
+                _executor.shutdown(wait=True)
+            _executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"), initializer=_init_worker)
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown():
+    """Stops the worker processes, the next fan-out starts a fresh pool."""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor, _executor_workers = None, 0
+
+
+def chunk_bounds(count, workers, chunk_size=0):
+    """(start, end) frame ranges in batch order. A chunk size of 0 splits the batch evenly over the workers."""
+    if chunk_size <= 0:
+        chunk_size = math.ceil(count / max(workers, 1))
+    chunk_size = max(chunk_size, 1)
+    return [(start, min(start + chunk_size, count)) for start in range(0, count, chunk_size)]
+
+
+def run(func, tasks, workers):
+    """Runs `func(*task)` for every task of `tasks` on the pool, at most `workers` at a time, and returns the results in task
+    order, so output order never depends on timing. Drops a broken pool.
+    """
+    executor = get_executor(workers)
+    futures, running = [], set()
+    try:
+        for task in tasks:
+            if len(running) >= workers:
+                running = wait(running, return_when=FIRST_COMPLETED).not_done
+            futures.append(executor.submit(func, *task))
+            running.add(futures[-1])
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        shutdown()
+        raise
+
+
+def map_tasks(func, tasks, workers=1):
+    """Runs `func(*task)` for every task of `tasks` on the worker pool and returns the results in task order.
+
+    For work that is not a frame batch (arguments and results are pickled). Runs in-process like the frame functions when
+    there is one worker, one task or no fork.
+    """
+    tasks = list(tasks)
+    workers = usable_workers(workers)
+    if workers <= 1 or len(tasks) <= 1 or not can_fork():
+        return [func(*task) for task in tasks]
+    return run(func, tasks, workers)
@@ -1,4 +1,21 @@
+import os
+import tempfile
+
+import numpy as np
+import secretpy
+from secretpy import alphabets as al
+from secretpy.ciphers.polybius_square import PolybiusSquare
+
+from src import cipher_tables
 from src import ciphers
+from src import cryptanalysis
+from src import fractionation
+from src import key_search
+from src import key_squares
+from src import ngram_model
+from src import transpositions
+from src.formatting_mask import FormattingMask
+
 
 # Test suite for ciphers.py
 class TestCiphers:
@@ -19,6 +36,22 @@ class TestCiphers:
         decrypted_text = caesar_cipher.caesar(encrypted_text[0], alphabet, key, False, False)
         assert decrypted_text[0] == text.lower().replace(" ", "")
 
+    def test_affine_cipher(self):
+        affine_cipher = ciphers.Affine()
+        text = "Hello World"
+        alphabet = "ENGLISH"
+        encrypted_text = affine_cipher.affine(text, alphabet, 7, 8, True, False)
+        assert encrypted_text[0] == secretpy.Affine().encrypt("helloworld", (7, 8), al.ENGLISH)
+        decrypted_text = affine_cipher.affine(encrypted_text[0], alphabet, 7, 8, False, False)
+        assert decrypted_text[0] == text.lower().replace(" ", "")
+        for key_1 in (2, 13, 26):
+            try:
+                affine_cipher.affine(text, alphabet, key_1, 8, True, False)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"Key #1 {key_1} should have been rejected")
+
     def test_vigenere_cipher(self):
         vigenere_cipher = ciphers.Vigenere()
         text = "Hello World"
@@ -68,8 +101,8 @@ class TestCiphers:
         rot13_cipher = ciphers.Rot13()
         text = "Hello World"
         alphabet = "ENGLISH"
-        encrypted_text = rot13_cipher.rot13(text, alphabet, 13, True, False)
-        decrypted_text = rot13_cipher.rot13(encrypted_text[0], alphabet, 13, False, False)
+        encrypted_text = rot13_cipher.rot13(text, alphabet, True, False)
+        decrypted_text = rot13_cipher.rot13(encrypted_text[0], alphabet, False, False)
         assert decrypted_text[0] == text.lower().replace(" ", "")
 
     def test_scytale_cipher(self):
@@ -140,3 +173,450 @@ class TestCiphers:
         encrypted_text = zigzag_cipher.zigzag(text, key, True, False)
         decrypted_text = zigzag_cipher.zigzag(encrypted_text[0], key, False, False)
         assert decrypted_text[0] == text.lower().replace(" ", "")
+
+
+# Test suite for the list mode of the cipher nodes
+class TestCipherLists:
+    texts = ["Hello World!", "Attack at dawn.", "", "The quick brown fox"]
+
+    def test_matches_single_runs(self):
+        vigenere = ciphers.Vigenere()
+        assert vigenere.FUNCTION == "run_list" and vigenere.CIPHER_FUNCTION == "vigenere"
+        result = vigenere.run_list(text=self.texts, alphabet=["ENGLISH"], key=["lemon"], mode=[True], keep_formatting=[True])
+        assert result == ([vigenere.vigenere(text, "ENGLISH", "lemon", True, True)[0] for text in self.texts],)
+
+    def test_inputs_line_up(self):
+        caesar = ciphers.Caesar()
+        # Shorter lists repeat their last item
+        result = caesar.run_list(text=["abc", "abc", "abc"], alphabet=["ENGLISH"], key=[1, 2], mode=[True, False], keep_formatting=[False])
+        assert result == (["bcd", "yza", "yza"],)
+
+    def test_rot_nodes(self):
+        texts = ["Hello World! 12345", "Attack at 0600."]
+        expected = {
+            "Rot13": ["Uryyb Jbeyq! 12345", "Nggnpx ng 0600."],
+            "Rot5": ["Hello World! 67890", "Attack at 5155."],
+            "Rot18": ["Uryyb Jbeyq! 67890", "Nggnpx ng 5155."],
+        }
+        for name, encrypted in expected.items():
+            node = getattr(ciphers, name)()
+            assert node.run_list(text=texts, alphabet=["ENGLISH"], mode=[True], keep_formatting=[True]) == (encrypted,)
+            assert node.run_list(text=encrypted, alphabet=["ENGLISH"], mode=[False], keep_formatting=[True]) == (texts,)
+        # Rot47 runs on the lower-cased letters like every other node, so it only has to match its single runs
+        rot47 = ciphers.Rot47()
+        encrypted = rot47.run_list(text=texts, alphabet=["ENGLISH"], mode=[True], keep_formatting=[True])[0]
+        assert encrypted == [rot47.rot47(text, "ENGLISH", True, True)[0] for text in texts]
+
+    def test_workers(self):
+        texts = [f"Message number {i}" for i in range(20)]
+        playfair = ciphers.Playfair()
+        inputs = dict(text=texts, alphabet=["ENGLISH_SQUARE_IJ"], key=["monarchy"], mode=[True], keep_formatting=[True])
+        assert playfair.run_list(**inputs, workers=[2]) == playfair.run_list(**inputs)
+
+    def test_errors(self):
+        try:
+            ciphers.Caesar().run_list(text=["Hello Wörld"], alphabet=["ENGLISH"], key=[3], mode=[True], keep_formatting=[False])
+        except Exception:
+            pass
+        else:
+            raise AssertionError("Letters outside the alphabet should still raise through secretpy")
+
+
+# Test suite for the compiled substitution tables
+class TestCipherTables:
+    text = "thequickbrownfoxjumpsoverthelazydog" * 3
+    keys = {
+        "Caesar": 29,
+        "Atbash": None,
+        "Affine": (7, 8),
+        "Keyword": "kryptos",
+        "SimpleSubstitution": "qwertyuiopasdfghjklzxcvbnm",
+        "Rot5": None,
+        "Rot13": None,
+        "Rot18": None,
+        "Rot47": None,
+        "Vigenere": "lemon",
+        "Beaufort": "fortify",
+        "Gronsfeld": (3, 1, 4, 1, 5),
+        "Porta": "porta",
+    }
+
+    def test_matches_secretpy(self):
+        for name, key in self.keys.items():
+            text = {"Rot5": "0123456789" * 3, "Rot47": "Hello, World! 123"}.get(name, self.text)
+            for alphabet in [al.ENGLISH, al.ENGLISH_SQUARE_IJ]:
+                if name in ("SimpleSubstitution", "Rot13") and len(alphabet) != 26:
+                    continue
+                for encrypt in [True, False]:
+                    cipher = getattr(secretpy, name)()
+                    try:
+                        expected = (cipher.encrypt if encrypt else cipher.decrypt)(text, key, alphabet)
+                    except Exception:
+                        expected = None  # secretpy raises, so the node has to fall back to it
+                    assert cipher_tables.crypt(name, text, alphabet, key, encrypt) == expected, (name, alphabet, encrypt)
+
+    def test_falls_back_on_unknown_characters(self):
+        assert cipher_tables.crypt("Caesar", "hello!", al.ENGLISH, 3, True) is None
+        assert cipher_tables.crypt("Vigenere", "héllo", al.ENGLISH, "key", True) is None
+        assert cipher_tables.crypt("Vigenere", "hello", al.ENGLISH, "k3y", True) is None  # key letter outside the alphabet
+        assert cipher_tables.crypt("ColTrans", "hello", al.ENGLISH, "key", True) is None  # not a substitution cipher
+
+    def test_tables_are_cached(self):
+        cipher_tables.compile_cipher.cache_clear()
+        for _ in range(3):
+            cipher_tables.crypt("Vigenere", self.text, al.ENGLISH, "lemon", True)
+        assert cipher_tables.compile_cipher.cache_info().hits == 2
+
+    def test_node_output_unchanged(self):
+        vigenere = ciphers.Vigenere()
+        assert vigenere.vigenere("Hello, World!", "ENGLISH", "KEY", True, True) == ("Rijvs, Uyvjn!",)
+        try:
+            ciphers.Caesar().caesar("Hello Wörld", "ENGLISH", 3, True, False)
+        except Exception:
+            pass
+        else:
+            raise AssertionError("Letters outside the alphabet should still raise through secretpy")
+
+
+# Test suite for the shared alphabets and key squares
+class TestKeySquares:
+    text = "thequickbrownfoxumpsoverthelazydogg"
+    keys = {
+        "Playfair": "monarchy",
+        "TwoSquare": ("example", "keyword"),
+        "FourSquare": ("example", "keyword"),
+        "ThreeSquare": ("example", "keyword", "third"),
+    }
+
+    def test_matches_secretpy(self):
+        for name, key in self.keys.items():
+            for alphabet in [al.ENGLISH_SQUARE_IJ, al.ENGLISH_SQUARE_OQ]:
+                for text in [self.text, self.text[:-1], "balloon"]:
+                    for encrypt in [True, False]:
+                        if name == "ThreeSquare" and encrypt:
+                            continue  # Random letters, secretpy runs it
+                        cipher = getattr(secretpy, name)()
+                        expected = (cipher.encrypt if encrypt else cipher.decrypt)(text, key, alphabet)
+                        assert key_squares.crypt(name, text, alphabet, key, encrypt) == expected, (name, text, encrypt)
+
+    def test_falls_back(self):
+        assert key_squares.crypt("Playfair", "hello!", al.ENGLISH_SQUARE_IJ, "key", True) is None
+        assert key_squares.crypt("Playfair", "hello", al.ENGLISH, "key", True) is None  # 26 letters leave a ragged square
+        assert key_squares.crypt("ThreeSquare", "hello", al.ENGLISH_SQUARE_IJ, ("a", "b", "c"), True) is None
+        assert key_squares.crypt("Vigenere", "hello", al.ENGLISH_SQUARE_IJ, "key", True) is None
+
+    def test_shared(self):
+        node = ciphers.Polybius()
+        assert node.alphabet_checker("english_square_ij") is ciphers.Playfair().alphabet_checker("ENGLISH_SQUARE_IJ ")
+        assert node.alphabet_checker("ENGLISH", as_tuple=False) == al.ENGLISH
+        assert node.alphabet_checker("abc") == ("a", "b", "c")
+        assert node.alphabet_checker("  ") is None
+        square = key_squares.key_square(al.ENGLISH_SQUARE_IJ, "monarchy")
+        assert square is key_squares.key_square(al.ENGLISH_SQUARE_IJ, "monarchy")
+        reference = PolybiusSquare(al.ENGLISH_SQUARE_IJ, "monarchy")
+        for c in "abcdefghijklmnopqrstuvwxyz":
+            assert square.get_coordinates(c) == reference.get_coordinates(c)
+            assert square.get_char(*square.get_coordinates(c)) == reference.get_char(*reference.get_coordinates(c))
+
+    def test_node_output_unchanged(self):
+        encrypted = ciphers.Playfair().playfair("Hide the gold!", "ENGLISH_SQUARE_IJ", "Playfair", True, False)[0]
+        assert encrypted == secretpy.Playfair().encrypt("hidethegold", "playfair", al.ENGLISH_SQUARE_IJ)
+        assert ciphers.Playfair().playfair(encrypted, "ENGLISH_SQUARE_IJ", "Playfair", False, False) == ("hidethegold",)
+
+
+# Test suite for the transposition permutations
+class TestTranspositions:
+    text = "wearediscoveredfleeatonce"
+    keys = {
+        "ColTrans": ["zebras", "aab", "k"],
+        "MyszkowskiTransposition": ["tomato", "aab", "k"],
+        "Scytale": [1, 4, 7, 40],
+        "Zigzag": [2, 3, 5, 40],
+    }
+    secretpy_names = {"ColTrans": "ColumnarTransposition"}
+
+    def test_matches_secretpy(self):
+        for name, keys in self.keys.items():
+            cipher = getattr(secretpy, self.secretpy_names.get(name, name))()
+            for key in keys:
+                for text in [self.text, self.text[:-3], "a"]:
+                    encrypted = transpositions.crypt(name, text, al.ENGLISH, key, True)
+                    assert encrypted == cipher.encrypt(text, key, al.ENGLISH), (name, key, text)
+                    assert transpositions.crypt(name, encrypted, al.ENGLISH, key, False) == text
+                    assert cipher.decrypt(encrypted, key, al.ENGLISH) == text
+
+    def test_falls_back(self):
+        assert transpositions.crypt("Zigzag", self.text, None, 1, True) is None  # secretpy slices with a step of 0
+        assert transpositions.crypt("ColTrans", self.text, al.ENGLISH, "k3y", True) is None
+        assert transpositions.crypt("ColTrans", self.text, al.ENGLISH, "", True) is None
+        assert transpositions.crypt("Caesar", self.text, al.ENGLISH, 3, True) is None
+
+    def test_permutations_are_cached(self):
+        transpositions.permutation.cache_clear()
+        for _ in range(3):
+            transpositions.crypt("Zigzag", self.text, None, 3, True)
+            transpositions.crypt("Zigzag", self.text, None, 3, False)
+        assert transpositions.permutation.cache_info().misses == 1
+
+    def test_rail_count_search(self):
+        text = "It was the best of times, it was the worst of times, it was the age of wisdom, it was the age of foolishness"
+        encrypted = ciphers.Zigzag().zigzag(text, 6, True, False)[0]
+        rails = list(range(2, 12))
+        plaintexts = transpositions.decrypt_indexes("Zigzag", ngram_model.encode(encrypted), rails)
+        assert rails[int(np.argmax(ngram_model.get_table().score_indexes(plaintexts)))] == 6
+
+
+# Test suite for the fractionating cipher coordinate engine
+class TestFractionation:
+    text = "thequickbrownfoxumpsoverthelazydog"
+    cases = [
+        ("Polybius", al.ENGLISH_SQUARE_IJ, "keyword"),
+        ("Bifid", al.ENGLISH_SQUARE_IJ, 5),
+        ("Bifid", al.ENGLISH_SQUARE_IJ, 0),
+        ("Trifid", "abcdefghijklmnopqrstuvwxyz.", 7),
+        ("ADFGX", al.ENGLISH_SQUARE_IJ, "cargo"),
+        ("ADFGVX", None, "privacy"),
+        ("Nihilist", al.ENGLISH_SQUARE_IJ, "russian"),
+    ]
+
+    def test_matches_secretpy(self):
+        for name, alphabet, key in self.cases:
+            cipher = getattr(secretpy, name)()
+            for text in [self.text, self.text[:-1]]:
+                encrypted = fractionation.crypt(name, text, alphabet, key, True)
+                assert encrypted == cipher.encrypt(text, key, alphabet), (name, key, text)
+                decrypted = fractionation.crypt(name, encrypted, alphabet, key, False)
+                assert decrypted == cipher.decrypt(encrypted, key, alphabet), (name, key, text)
+
+    def test_falls_back(self):
+        assert fractionation.crypt("Bifid", "hello!", al.ENGLISH_SQUARE_IJ, 5, True) is None
+        assert fractionation.crypt("Trifid", "hello", al.ENGLISH, 5, True) is None  # secretpy wants 27 letters
+        assert fractionation.crypt("Polybius", "1234560", al.ENGLISH_SQUARE_IJ, "", False) is None  # 0 is row -1 to secretpy
+        assert fractionation.crypt("ADFGX", "hello", al.ENGLISH, "key", True) is None  # a 6x6 square has no ADFGX header
+        assert fractionation.crypt("Nihilist", "44 x", al.ENGLISH_SQUARE_IJ, "key", False) is None
+        assert fractionation.crypt("Playfair", "hello", al.ENGLISH_SQUARE_IJ, "key", True) is None
+
+    def test_node_output_unchanged(self):
+        adfgx = ciphers.ADFGX()
+        encrypted = adfgx.adfgx("Attack at once", "ENGLISH_SQUARE_IJ", "Cargo", True, False)[0]
+        assert encrypted == secretpy.ADFGX().encrypt("attackatonce", "cargo", al.ENGLISH_SQUARE_IJ)
+        assert adfgx.adfgx(encrypted, "ENGLISH_SQUARE_IJ", "Cargo", False, False) == ("attackatonce",)
+        nihilist = ciphers.Nihilist()
+        expected = secretpy.Nihilist().encrypt("dynamite", "russian", "".join(al.ENGLISH_SQUARE_IJ))  # The node joins the alphabet
+        assert nihilist.nihilist("Dynamite", "ENGLISH_SQUARE_IJ", "Russian", True, False) == (expected,)
+
+
+# Test suite for the formatting masks
+class TestFormattingMask:
+    def test_cleaned_text(self):
+        mask = FormattingMask("Hello, World! 123")
+        assert mask.cleaned == "helloworld"
+        assert mask.positions.tolist() == [0, 1, 2, 3, 4, 7, 8, 9, 10, 11]
+        assert mask.upper.tolist() == [True, False, False, False, False, True, False, False, False, False]
+        assert FormattingMask("Ab.c d", allowed_chars="abc.").cleaned == "ab.c"
+
+    def test_restore(self):
+        mask = FormattingMask("Hello, World!")
+        assert mask.restore("uryybjbeyq") == "Uryyb, Jbeyq!"
+        assert mask.restore("abc") == "Abc, !"  # letters past the result are wiped
+        assert mask.restore("abcdefghijxyz", mode=True) == "Abcde, Fghij!xyz"
+        assert mask.restore("abcdefghijxyz", mode=False) == "Abcde, Fghij!"
+
+    def test_multi_character_case_mappings(self):
+        mask = FormattingMask("Straße Ok")
+        assert mask.restore("ßtraßeok") == "SStraße Ok"
+        assert FormattingMask("AB").restore("abß", mode=True) == "ABSS"
+
+
+# Test suite for the cipher pipeline
+class TestCipherPipeline:
+    text = "Hello, World! Attack at dawn."
+
+    def test_matches_chained_nodes(self):
+        expected = ciphers.Vigenere().vigenere(self.text, "ENGLISH", "lemon", True, False)[0]
+        expected = ciphers.Caesar().caesar(expected, "ENGLISH", 3, True, False)[0]
+        expected = ciphers.Atbash().atbash(expected, "ENGLISH", False, False)[0]
+        expected = ciphers.Porta().porta(expected, "ENGLISH", "key", True, False)[0]
+        result, plan = ciphers.CipherPipeline().run_pipeline(self.text, "Vigenere key=lemon\nCaesar 3\nAtbash decrypt\nPorta key", False)
+        assert result == expected
+        assert plan == "1: Vigenere + Caesar + Atbash + Porta"
+
+    def test_round_trip_with_transposition(self):
+        pipeline = ciphers.CipherPipeline()
+        encrypted, plan = pipeline.run_pipeline(self.text, "Vigenere key=lemon\nColTrans key=zebras\nRot13", True)
+        assert plan == "1: Vigenere\n2: ColTrans\n3: Rot13"
+        decrypted, _ = pipeline.run_pipeline(encrypted, "Rot13 decrypt\nColTrans zebras decrypt\nVigenere lemon decrypt", True)
+        assert decrypted == self.text
+
+    def test_affine_stage(self):
+        expected = ciphers.Affine().affine(self.text, "ENGLISH", 5, 8, True, True)[0]
+        result, plan = ciphers.CipherPipeline().run_pipeline(self.text, "Affine key_1=5 key_2=8", True)
+        assert result == expected and plan == "1: Affine"
+        assert ciphers.CipherPipeline().run_pipeline(result, "Affine key_1=5 key_2=8 decrypt", True)[0] == self.text
+        # The node's defaults
+        assert (
+            ciphers.CipherPipeline().run_pipeline(self.text, "Affine", True)[0]
+            == ciphers.Affine().affine(self.text, "ENGLISH", 7, 8, True, True)[0]
+        )
+
+    def test_table_composition(self):
+        vigenere = cipher_tables.compiled("Vigenere", al.ENGLISH, "ab", True)
+        beaufort = cipher_tables.compiled("Beaufort", al.ENGLISH, "xyz", True)
+        fused = vigenere.then(beaufort)
+        assert fused.period == 6
+        text = "thequickbrownfoxjumpsoverthelazydog"
+        assert fused.apply(text) == beaufort.apply(vigenere.apply(text))
+        assert vigenere.then(beaufort, max_period=5) is None
+
+    def test_bad_stages(self):
+        for stages in ["", "Enigma key=abc", "Caesar shift=3"]:
+            try:
+                ciphers.CipherPipeline().run_pipeline(self.text, stages, True)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"Stages {stages!r} should have been rejected")
+
+
+# Test suite for the key-space brute-forcer
+class TestCipherBruteForce:
+    text = "It was the best of times, it was the worst of times, it was the age of wisdom, it was the age of foolishness, it was the epoch of belief!"
+
+    def test_caesar_and_affine(self):
+        node = ciphers.CipherBruteForce()
+        encrypted = ciphers.Caesar().caesar(self.text, "ENGLISH", 3, True, True)[0]
+        plaintexts, report, best = node.brute_force(encrypted, "ENGLISH", "all", 12, 3, True)
+        assert best == self.text and plaintexts[0] == best and len(plaintexts) == 3
+        assert report.splitlines()[0].endswith("Caesar key=3")
+        encrypted = secretpy.Affine().encrypt(FormattingMask(self.text).cleaned, (5, 8), al.ENGLISH)
+        _, report, best = node.brute_force(encrypted, "ENGLISH", "Affine", 12, 1, False)
+        assert best == FormattingMask(self.text).cleaned
+        assert report.endswith("Affine key_1=5 key_2=8")
+
+    def test_vigenere(self):
+        encrypted = ciphers.Vigenere().vigenere(self.text, "ENGLISH", "lemon", True, True)[0]
+        ciphertext = ngram_model.encode(encrypted)
+        assert cryptanalysis.vigenere_periods(ciphertext, ngram_model.get_table(), 12)[0] == 5
+        _, report, best = ciphers.CipherBruteForce().brute_force(encrypted, "ENGLISH", "Vigenere", 12, 5, True, workers=2)
+        assert best == self.text
+        assert report.splitlines()[0].endswith("Vigenere key=lemon")
+
+    def test_candidates_are_distinct(self):
+        encrypted = ciphers.Caesar().caesar(self.text, "ENGLISH", 7, True, False)[0]
+        plaintexts, _, _ = ciphers.CipherBruteForce().brute_force(encrypted, "ENGLISH", "all", 12, 50, False)
+        assert len(set(plaintexts)) == len(plaintexts) == 50
+
+    def test_short_text(self):
+        _, report, best = ciphers.CipherBruteForce().brute_force("Uryyb Jbeyq!", "ENGLISH", "all", 12, 1, True)
+        assert best == "Hello World!" and report.endswith("Caesar key=13")
+
+    def test_report_keys_run_in_pipeline(self):
+        plaintexts, report, _ = ciphers.CipherBruteForce().brute_force("Uryyb Jbeyq!", "ENGLISH", "all", 12, 10, True)
+        for plaintext, line in zip(plaintexts, report.splitlines()):
+            _, _, stage = line.split(" ", 2)
+            assert ciphers.CipherPipeline().run_pipeline("Uryyb Jbeyq!", stage + " decrypt", True)[0] == plaintext
+
+
+# Test suite for the n-gram tables
+class TestNgramModel:
+    def test_tables(self):
+        assert {"ENGLISH", "GERMAN", "RUSSIAN"} <= set(ngram_model.languages())
+        assert ngram_model.get_table().n == 4
+        assert ngram_model.get_table("english", 3).n == 3
+        assert ngram_model.get_table() is ngram_model.get_table("ENGLISH", 4)
+        try:
+            ngram_model.get_table("BINARY")
+        except KeyError:
+            pass
+        else:
+            raise AssertionError("An alphabet without tables should raise KeyError")
+
+    def test_score_ranks_language_first(self):
+        english, gibberish = ngram_model.score(["Attack at dawn, hold the bridge", "Nggnpx ng qnja, ubyq gur oevqtr"])
+        assert english > gibberish
+        german = ngram_model.score(["Der schnelle braune Fuchs springt über den faulen Hund"] * 2, "GERMAN")
+        assert german[0] == german[1] > ngram_model.score(["The quick brown fox jumps over the lazy dog"], "GERMAN")[0]
+
+    def test_batch_matches_single_texts(self):
+        texts = ["Hello World", "", "ab", "It was the best of times", "Uryyb Jbeyq"]
+        batch = ngram_model.score(texts)
+        assert all(batch[i] == ngram_model.score(text)[0] for i, text in enumerate(texts))
+        table = ngram_model.get_table()
+        assert batch[1] == batch[2] == table.floor  # no quadgram to score
+        rows = np.stack([ngram_model.encode("helloworld"), ngram_model.encode("uryybjbeyq")])
+        assert np.allclose(table.score_indexes(rows), batch[[0, 4]])
+
+    def test_round_trip(self):
+        text = "the quick brown fox jumps over the lazy dog " * 20
+        tables = {("ENGLISH", 2): ngram_model.build_table(text, "ENGLISH", 2), ("GERMAN", 1): ngram_model.build_table(text, "GERMAN", 1)}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "ngrams.bin")
+            ngram_model.write_tables(tables, path)
+            table = ngram_model.get_table("ENGLISH", path=path)
+            assert table.n == 2 and np.array_equal(table.codes, tables["ENGLISH", 2][0])
+            assert table.score("the")[0] > table.score("qz")[0]
+            assert ngram_model.languages(path) == ["ENGLISH", "GERMAN"]
+
+
+# Test suite for the annealing key search
+class TestCipherSolver:
+    text = (
+        "It was the best of times, it was the worst of times, it was the age of wisdom, it was the age of foolishness, "
+        "it was the epoch of belief, it was the epoch of incredulity, it was the season of Light, it was the season of Darkness, "
+        "it was the spring of hope, it was the winter of despair, we had everything before us, we had nothing before us."
+    )
+
+    def test_substitution(self):
+        node = ciphers.CipherSolver()
+        encrypted = ciphers.SimpleSubstitution().simplesubstitution(self.text, "ENGLISH", "qwertyuiopasdfghjklzxcvbnm", True, True)[0]
+        # A fixed number of restarts searches the same keys on any machine, whatever the time budget
+        plaintext, key, report = node.solve(encrypted, "SimpleSubstitution", "ENGLISH", "", 0.1, 0, True, restarts=6)
+        assert plaintext == self.text
+        assert report.startswith("SimpleSubstitution key=")
+        # Letters the text never uses can end up anywhere in the key, all the others have to be right
+        used = set(FormattingMask(self.text).cleaned)
+        assert all(k == q for k, q, letter in zip(key, "qwertyuiopasdfghjklzxcvbnm", al.ENGLISH) if letter in used)
+
+    def test_keyword(self):
+        assert key_search.shortest_keyword(key_search.keyed_alphabet("kryptos", al.ENGLISH), al.ENGLISH) == "kryptos"
+        assert key_search.shortest_keyword(al.ENGLISH, al.ENGLISH) == ""
+        encrypted = ciphers.Keyword().keyword(self.text, "ENGLISH", "kryptos", True, True)[0]
+        plaintext, _, _ = ciphers.CipherSolver().solve(encrypted, "Keyword", "ENGLISH", "", 0.1, 0, True, restarts=6)
+        assert plaintext == self.text
+
+    def test_playfair_kernel_matches_secretpy(self):
+        square = al.ENGLISH_SQUARE_IJ
+        letters = [entry[0] for entry in square]
+        key = "".join(np.random.default_rng(0).permutation(letters))
+        encrypted = secretpy.Playfair().encrypt(FormattingMask(self.text).cleaned.replace("j", "i"), key, square)
+        ciphertext = ngram_model.encode(encrypted, square)
+        playfair = key_search.PlayfairSquare(5, ngram_model.encode("".join(letters)))
+        grid = np.array([letters.index(c) for c in key])
+        decrypted = "".join(letters[i] for i in playfair.decrypt(grid, ciphertext[0::2], ciphertext[1::2]).ravel())
+        # The kernel keeps secretpy's padding x's, so encrypting its output again gives the ciphertext back
+        assert secretpy.Playfair().encrypt(decrypted, key, square) == encrypted
+        near = grid.copy()
+        near[[0, 1]] = near[[1, 0]]
+        table = ngram_model.get_table()
+        rng = np.random.default_rng(0)
+        score, found = key_search.anneal_playfair(ciphertext, table, playfair, near, 2000, rng)
+        assert np.array_equal(found, grid)
+        assert np.isclose(score, key_search.Plaintext(table, playfair.plaintext(grid, ciphertext[0::2], ciphertext[1::2])).score)
+
+    def test_playfair_search(self):
+        encrypted = ciphers.Playfair().playfair(self.text, "ENGLISH_SQUARE_IJ", "monarchy", True, False)[0]
+        playfair_moves = key_search.PLAYFAIR_MOVES
+        try:
+            key_search.PLAYFAIR_MOVES = 2000  # One short restart, the search itself is tested on the kernel above
+            plaintext, key, report = ciphers.CipherSolver().solve(encrypted, "Playfair", "ENGLISH", "", 0.1, 0, False, restarts=1)
+            assert ciphers.CipherSolver().solve(encrypted, "Playfair", "ENGLISH", "", 0.1, 0, False, restarts=1)[1] == key
+        finally:
+            key_search.PLAYFAIR_MOVES = playfair_moves
+        assert sorted(key) == sorted(entry[0] for entry in al.ENGLISH_SQUARE_IJ)
+        assert plaintext == ciphers.Playfair().playfair(encrypted, "ENGLISH_SQUARE_IJ", key, False, False)[0]
+        try:
+            ciphers.CipherSolver().solve(encrypted[:-1], "Playfair", "ENGLISH", "", 0.1, 0, False, restarts=1)
+        except ValueError as e:
+            assert "needs an even number" in str(e)
+        else:
+            raise AssertionError("An odd number of letters cannot be Playfair ciphertext")
@@ -1,6 +1,7 @@
 import unicodedata
 from src import morse_code
 
+
 # Test suite for morse_code.py
 class TestMorseCode:
     def setup_method(self):
@@ -59,3 +60,40 @@ class TestMorseCode:
         encoded_text = self.morse_code.MorseCode(text, True, "latin", dot, dash)
         decoded_text = self.morse_code.MorseCode(encoded_text[0], False, "latin", dot, dash)
         assert decoded_text[0].lower() == text.lower()
+
+    def test_exact_encoding(self):
+        encoded_text = self.morse_code.MorseCode("SOS, sos!\tok", True, "latin", ".", "-")
+        assert encoded_text == ("... --- ... --..--   ... --- ...  --- -.-",)
+        assert self.morse_code.MorseCode("a~b", True, "latin", "*", "_") == ("*_ _***",)
+        assert self.morse_code.MorseCode("~~", True, "latin", ".", "-") == ("",)
+
+    def test_shared_tables(self):
+        assert morse_code.MorseCode().latin_codes is morse_code.MorseCode().latin_codes
+        assert morse_code.encode_table("latin", ".", "-") is morse_code.encode_table("latin", ".", "-")
+        try:
+            morse_code.LATIN_CODES["A"] = "-"
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("Morse code tables should be read-only")
+        # Letters sharing a code decode to the first of them
+        assert morse_code.decode_table("latin")[morse_code.LATIN_CODES["A"]] == "A"
+
+    def test_decode_stream(self):
+        encoded_text = self.morse_code.MorseCode("Hello World", True, "latin", "1", "0")[0]
+        # Chunks cut anywhere decode the same as the whole text
+        chunks = [encoded_text[i : i + 3] for i in range(0, len(encoded_text), 3)]
+        decoded = list(morse_code.decode_stream(chunks, "latin", "1", "0"))
+        assert len(decoded) > 1
+        assert "".join(decoded) == "HELLO WORLD"
+        assert "".join(decoded) == self.morse_code.MorseCode(encoded_text, False, "latin", "1", "0")[0]
+        # Single symbols, surrounding whitespace and unknown codes
+        assert "".join(morse_code.decode_stream(iter("\n ... --- ... \n"), "latin")) == "SOS"
+        assert "".join(morse_code.decode_stream(["... ?? ", "  ---"], "latin")) == "S O"
+
+    def test_decode_tree(self):
+        letters = morse_code.decode_tree("latin")
+        assert letters[1] is None
+        assert letters[2] == "E"  # .
+        assert letters[3] == "T"  # -
+        assert letters[0b101] == "A"  # .-
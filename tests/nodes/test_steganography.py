@@ -0,0 +1,495 @@
+import os
+import tempfile
+import threading
+
+import cv2
+import imwatermark
+import numpy as np
+import stegano
+import torch
+from PIL import Image
+
+from src import frame_pool
+from src import image_convert
+from src import lsb_engine
+from src import steganalysis
+from src import steganography
+from src import watermark_engine
+from src import worker_pool
+
+
+# Test suite for the LSB steganography engine
+class TestLSBEngine:
+    def setup_method(self):
+        generator = torch.Generator().manual_seed(0)
+        self.frames = torch.randint(0, 256, (2, 24, 32, 3), dtype=torch.uint8, generator=generator)
+
+    def test_hide_matches_stegano(self):
+        for encoding in ["UTF-8", "UTF-32LE"]:
+            message = "Hello World! ✓"
+            encoded = lsb_engine.hide(self.frames, message, encoding)
+            for i in range(self.frames.shape[0]):
+                reference = stegano.lsb.hide(Image.fromarray(self.frames[i].numpy()), message, encoding=encoding)
+                assert np.array_equal(encoded[i].numpy(), np.array(reference))
+
+    def test_reveal_matches_stegano(self):
+        message = "Hello World!"
+        encoded = stegano.lsb.hide(Image.fromarray(self.frames[0].numpy()), message)
+        frames = torch.from_numpy(np.array(encoded)).unsqueeze(0)
+        assert lsb_engine.reveal(frames) == [message]
+
+    def test_hide_in_place(self):
+        frames = self.frames.clone()
+        expected = lsb_engine.hide(self.frames, "Hello World!", "UTF-8", "eratosthenes", 1)
+        assert lsb_engine.hide(frames, "Hello World!", "UTF-8", "eratosthenes", 1, out=frames) is frames
+        assert torch.equal(frames, expected)
+
+    def test_hide_leaves_alpha_untouched(self):
+        frames = torch.cat([self.frames, torch.full((2, 24, 32, 1), 7, dtype=torch.uint8)], dim=-1)
+        encoded = lsb_engine.hide(frames, "Hello World!")
+        assert torch.equal(encoded[..., 3], frames[..., 3])
+        assert lsb_engine.reveal(encoded) == ["Hello World!", "Hello World!"]
+
+    def test_message_too_long(self):
+        try:
+            lsb_engine.hide(self.frames, "x" * 1000)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Oversized message should have been rejected")
+
+    def test_reveal_without_message(self):
+        try:
+            lsb_engine.reveal(self.frames & 0xFE)
+        except IndexError:
+            pass
+        else:
+            raise AssertionError("A blank LSB plane should not decode")
+
+    def test_generators_match_stegano(self):
+        frames = torch.randint(0, 256, (2, 64, 64, 3), dtype=torch.uint8, generator=torch.Generator().manual_seed(1))
+        message = "Hello World!"
+        for generator_type, generator in [
+            ("eratosthenes", stegano.lsb.generators.eratosthenes()),
+            ("composite", stegano.lsb.generators.composite()),
+            ("triangular_numbers", stegano.lsb.generators.triangular_numbers()),
+            ("ackermann", stegano.lsb.generators.ackermann(m=2)),
+            ("LFSR", stegano.lsb.generators.LFSR(m=1024)),
+        ]:
+            encoded = lsb_engine.hide(frames, message, "UTF-8", generator_type, 1024 if generator_type == "LFSR" else 2)
+            reference = stegano.lsb.hide(Image.fromarray(frames[0].numpy()), message, generator)
+            assert np.array_equal(encoded[0].numpy(), np.array(reference)), generator_type
+            assert lsb_engine.reveal(encoded, "UTF-8", generator_type, 1024 if generator_type == "LFSR" else 2) == [message, message]
+
+    def test_capacity(self):
+        for pixels in range(200):
+            fitting = [n for n in range(pixels) if lsb_engine.payload_pixels(n) <= pixels]
+            assert lsb_engine.max_message_bytes(pixels) == max(fitting, default=0)
+        for generator_type, m in [("None", 1), ("triangular_numbers", 1), ("eratosthenes", 1), ("composite", 1), ("ackermann", 2)]:
+            expected = len(lsb_engine.generator_positions(generator_type, m, 24, 32, 24 * 32))
+            assert lsb_engine.capacity_pixels(generator_type, m, 24, 32) == expected, generator_type
+        # LFSR(1024) cycles through 1023 states and never leaves a 64x64 image
+        assert lsb_engine.capacity_pixels("LFSR", 1024, 64, 64) == 1023
+
+    def test_check_capacity(self):
+        capacity = lsb_engine.max_message_bytes(lsb_engine.capacity_pixels("eratosthenes", 1, 24, 32))
+        lsb_engine.check_capacity("x" * capacity, "UTF-8", "eratosthenes", 1, 24, 32)
+        try:
+            lsb_engine.check_capacity("x" * (capacity + 1), "UTF-8", "eratosthenes", 1, 24, 32)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Oversized message should have been rejected")
+
+    def test_shi_tomasi_fails_before_writing(self):
+        frames = self.frames.clone()
+        frames[1] = 0  # a blank frame has no corners at all
+        original = frames.clone()
+        try:
+            lsb_engine.hide(frames, "Hello World!", "UTF-8", "shi_tomashi", out=frames)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("A frame without corners cannot carry a message")
+        assert torch.equal(frames, original)
+
+    def test_sharded_round_trip(self):
+        frames = torch.randint(0, 256, (6, 64, 64, 3), dtype=torch.uint8, generator=torch.Generator().manual_seed(1))
+        message = "Ünïcode ✓ " * 300
+        for generator_type in ["None", "composite"]:
+            encoded = lsb_engine.hide_sharded(frames, message, "UTF-8", generator_type)
+            assert lsb_engine.reveal_sharded(encoded, "UTF-8", generator_type) == message
+            # Shards carry their own offsets, frame order does not matter
+            assert lsb_engine.reveal_sharded(encoded.flip(0), "UTF-8", generator_type) == message
+        # Only as many frames as needed get written
+        assert torch.equal(encoded[-1], frames[-1])
+
+    def test_sharded_too_long(self):
+        try:
+            lsb_engine.hide_sharded(self.frames, "x" * 1000, "UTF-8", "eratosthenes")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Oversized message should have been rejected")
+
+    def test_shard_assembler(self):
+        shards = list(lsb_engine.iter_shards(b"0123456789", [lsb_engine.SHARD_HEADER.size + 4] * 3))
+        assert [i for i, _ in shards] == [0, 1, 2]
+        assembler = lsb_engine.ShardAssembler()
+        assert not assembler.add(b"not a shard")
+        for _, body in reversed(shards[1:]):
+            assert assembler.add(body)
+        assert not assembler.complete
+        try:
+            assembler.message()
+        except IndexError:
+            pass
+        else:
+            raise AssertionError("An incomplete message should not decode")
+        assembler.add(shards[0][1])
+        assert assembler.message() == "0123456789"
+
+    def test_sweep_attempts(self):
+        attempts = lsb_engine.sweep_attempts(["None", "identity", "LFSR", "ackermann", "ackermann_fast"], 3, 40)
+        assert attempts == [("None", 1), ("LFSR", 4), ("LFSR", 8), ("LFSR", 16), ("LFSR", 32), ("ackermann", 3), ("ackermann", 4)]
+
+    def test_sweep_finds_generator(self):
+        frames = torch.cat(
+            [
+                lsb_engine.hide(self.frames[:1], "Hello World!", "UTF-8", "eratosthenes", 1),
+                lsb_engine.hide(self.frames[1:], "Hi!", "UTF-32LE", "LFSR", 512),
+            ]
+        )
+        attempts = lsb_engine.sweep_attempts(["None", "LFSR", "eratosthenes", "triangular_numbers"], 1, 1024)
+        candidates = lsb_engine.sweep(frames, attempts)
+        assert candidates[0][0] == lsb_engine.SweepCandidate(1.0, "eratosthenes", 1, "UTF-8", "Hello World!")
+        assert candidates[1][0] == lsb_engine.SweepCandidate(1.0, "LFSR", 512, "UTF-32LE", "Hi!")
+        assert lsb_engine.sweep(self.frames, attempts) == [[], []]
+
+    def test_generator_positions_are_cached(self):
+        first = lsb_engine.generator_positions("eratosthenes", 1, 24, 32, 10)
+        assert first.tolist() == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+        assert lsb_engine.generator_positions("eratosthenes", 1, 24, 32, 5).tolist() == first[:5].tolist()
+        # Primes run out before 1000 positions in a 24x32 image
+        assert len(lsb_engine.generator_positions("eratosthenes", 1, 24, 32, 1000)) == 135
+
+    def test_spilled_positions_are_checked(self):
+        cache_dir = lsb_engine.CACHE_DIR
+        key = ("eratosthenes", None, 1024, 1024)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            try:
+                lsb_engine.CACHE_DIR = os.path.join(temp_dir, "positions")
+                lsb_engine._positions_cache.pop(key, None)
+                expected = lsb_engine.generator_positions("eratosthenes", 1, 1024, 1024, 70000)
+                assert os.stat(lsb_engine.CACHE_DIR).st_mode & 0o777 == 0o700
+                (name,) = os.listdir(lsb_engine.CACHE_DIR)
+                assert name.startswith(f"v{lsb_engine.POSITIONS_VERSION}_stegano{lsb_engine.STEGANO_VERSION}_")
+                # Files that are not valid indices for the image are regenerated
+                for planted in [np.full(70000, 1 << 40), np.zeros((2, 35000), dtype=np.int64), np.zeros(70000, dtype=np.int32)]:
+                    lsb_engine._positions_cache.pop(key)
+                    np.save(os.path.join(lsb_engine.CACHE_DIR, name), planted)
+                    assert np.array_equal(lsb_engine.generator_positions("eratosthenes", 1, 1024, 1024, 70000), expected)
+                # Nothing is spilled to (or read from) a directory other users can get into
+                lsb_engine.CACHE_DIR = os.path.join(temp_dir, "shared")
+                os.mkdir(lsb_engine.CACHE_DIR)
+                os.chmod(lsb_engine.CACHE_DIR, 0o777)
+                lsb_engine._positions_cache.pop(key)
+                assert np.array_equal(lsb_engine.generator_positions("eratosthenes", 1, 1024, 1024, 70000), expected)
+                assert os.listdir(lsb_engine.CACHE_DIR) == []
+            finally:
+                lsb_engine._positions_cache.pop(key, None)
+                lsb_engine.CACHE_DIR = cache_dir
+
+    def test_shi_tomasi_positions_match_stegano(self):
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        rng = np.random.default_rng(0)
+        for _ in range(30):
+            y, x = rng.integers(0, 100), rng.integers(0, 140)
+            frame[y : y + 15, x : x + 15] = rng.integers(0, 256, 3)
+        positions = lsb_engine.shi_tomasi_positions(torch.from_numpy(frame))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "frame.png")
+            Image.fromarray(frame).save(path)
+            generator = stegano.lsb.generators.shi_tomashi(path)
+            assert positions.tolist() == [next(generator) for _ in range(len(positions))]
+
+
+# Test suite for the batched invisible-watermark engine
+class TestWatermarkEngine:
+    def setup_method(self):
+        rng = np.random.default_rng(0)
+        base = cv2.resize(rng.integers(0, 256, (20, 24, 3), dtype=np.uint8), (300, 262), interpolation=cv2.INTER_CUBIC)
+        noise = rng.integers(-20, 20, (2, *base.shape))
+        self.frames = torch.from_numpy(np.clip(base.astype(int) + noise, 0, 255).astype(np.uint8))
+
+    def test_encode_matches_imwatermark(self):
+        encoder = imwatermark.WatermarkEncoder()
+        encoder.set_watermark("bytes", b"Hello World!")
+        bits = watermark_engine.watermark_bits("bytes", b"Hello World!")
+        for method in ["dwtDct", "dwtDctSvd"]:
+            encoded = watermark_engine.encode(self.frames, bits, method)
+            for i in range(self.frames.shape[0]):
+                reference = encoder.encode(self.frames[i].numpy()[:, :, ::-1].copy(), method)[:, :, ::-1]
+                assert np.array_equal(encoded[i].numpy(), reference), method
+
+    def test_encode_in_place(self):
+        bits = watermark_engine.watermark_bits("bytes", b"Hi")
+        frames = self.frames.clone()
+        expected = watermark_engine.encode(self.frames, bits, "dwtDctSvd")
+        assert watermark_engine.encode(frames, bits, "dwtDctSvd", out=frames) is frames
+        assert torch.equal(frames, expected)
+
+    def test_decode_matches_imwatermark(self):
+        bits = watermark_engine.watermark_bits("bits", [1, 0, 1, 1, 0, 0, 1] * 5)
+        decoder = imwatermark.WatermarkDecoder("bits", len(bits))
+        for method in ["dwtDct", "dwtDctSvd"]:
+            # Both a watermarked and a clean batch, the latter exercises votes close to the threshold
+            frames = torch.cat([watermark_engine.encode(self.frames, bits, method), self.frames])
+            decoded = watermark_engine.decode(frames, len(bits), method)
+            for i in range(frames.shape[0]):
+                reference = decoder.decode(frames[i].numpy()[:, :, ::-1].copy(), method)
+                assert decoded[i].tolist() == list(reference), method
+            assert decoded[0].tolist() == [bool(bit) for bit in bits]
+
+    def test_rivagan_sessions_are_cached(self):
+        loads = []
+        original = watermark_engine._load_rivagan_session
+        watermark_engine._load_rivagan_session = lambda kind: loads.append(kind) or object()
+        try:
+            watermark_engine.evict_rivagan()
+            threads = [threading.Thread(target=watermark_engine.rivagan_session, args=("encoder",)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert loads == ["encoder"]
+            session = watermark_engine.rivagan_session("encoder")
+            assert watermark_engine.rivagan_session("encoder") is session
+            watermark_engine.evict_rivagan()
+            assert watermark_engine.rivagan_session("encoder") is not session
+            assert loads == ["encoder", "encoder"]
+        finally:
+            watermark_engine._load_rivagan_session = original
+            watermark_engine.evict_rivagan()
+
+    def test_rivagan_length(self):
+        try:
+            watermark_engine.rivagan_decode(self.frames, 64)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("RivaGAN only supports 32 bits")
+
+    def test_check_watermark(self):
+        watermark_engine.check_watermark(256, 256, 1024, "dwtDct")
+        for height, width, wm_length, method in [(200, 200, 32, "dwtDct"), (256, 256, 1025, "dwtDctSvd"), (256, 256, 64, "rivaGan")]:
+            try:
+                watermark_engine.check_watermark(height, width, wm_length, method)
+            except (RuntimeError, ValueError):
+                pass
+            else:
+                raise AssertionError(f"{wm_length} bits in {width}x{height} with {method} should have been rejected")
+
+    def test_image_too_small(self):
+        try:
+            watermark_engine.decode(self.frames[:, :200, :200], 32)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("Frames under 256x256 should have been rejected")
+
+
+# Test suite for the IMAGE <-> uint8 conversions
+class TestImageConvert:
+    def test_matches_numpy_round_trip(self):
+        images = torch.rand(3, 17, 23, 4, generator=torch.Generator().manual_seed(0))
+        image_convert.CHUNK_ELEMENTS, chunk_elements = 100, image_convert.CHUNK_ELEMENTS  # force several scratch chunks
+        try:
+            frames = image_convert.to_uint8(images)
+        finally:
+            image_convert.CHUNK_ELEMENTS = chunk_elements
+        assert np.array_equal(frames.numpy(), (images.numpy() * 255).astype(np.uint8))
+        assert torch.equal(image_convert.to_float(frames), torch.from_numpy(frames.numpy()).float() / 255.0)
+
+    def test_preallocated_outputs(self):
+        images = torch.rand(2, 8, 8, 3, generator=torch.Generator().manual_seed(0))
+        frames = torch.empty(2, 8, 8, 3, dtype=torch.uint8)
+        assert image_convert.to_uint8(images, out=frames) is frames
+        output = torch.empty(2, 8, 8, 3)
+        assert image_convert.to_float(frames, out=output) is output
+        # uint8 input still comes back as a tensor the caller owns
+        assert image_convert.to_uint8(frames).data_ptr() != frames.data_ptr()
+
+    def test_bgr_view_shares_memory(self):
+        frame = torch.arange(2 * 2 * 4, dtype=torch.uint8).view(2, 2, 4)
+        view = image_convert.bgr_view(frame)
+        assert view[0, 0].tolist() == [2, 1, 0]
+        view[0, 0] = [9, 8, 7]
+        assert frame[0, 0].tolist() == [7, 8, 9, 3]
+
+
+# Test suite for the process pool fan-out
+class TestFramePool:
+    def setup_method(self):
+        # Requests are clamped to the machine's cores, pretend there are enough of them for the pool to be used
+        self.cpu_count = worker_pool.CPU_COUNT
+        worker_pool.CPU_COUNT = 8
+
+    def teardown_method(self):
+        worker_pool.CPU_COUNT = self.cpu_count
+
+    def teardown_class(self):
+        frame_pool.shutdown()
+
+    def test_chunk_bounds(self):
+        assert frame_pool.chunk_bounds(10, 4) == [(0, 3), (3, 6), (6, 9), (9, 10)]
+        assert frame_pool.chunk_bounds(5, 2, chunk_size=2) == [(0, 2), (2, 4), (4, 5)]
+        assert frame_pool.chunk_bounds(3, 1) == [(0, 3)]
+
+    def test_map_frames_matches_in_process(self):
+        frames = torch.randint(0, 256, (5, 24, 32, 3), dtype=torch.uint8, generator=torch.Generator().manual_seed(0))
+        expected = lsb_engine.hide(frames, "Hello World!", "UTF-8", "eratosthenes", 1)
+        encoded = frame_pool.map_frames(lsb_engine.hide, frames, "Hello World!", "UTF-8", "eratosthenes", 1, workers=2, chunk_size=2)
+        assert torch.equal(encoded, expected)
+
+    def test_map_chunks_keeps_batch_order(self):
+        frames = torch.randint(0, 256, (6, 24, 32, 3), dtype=torch.uint8, generator=torch.Generator().manual_seed(0))
+        frames = torch.cat([lsb_engine.hide(frames[i : i + 1], f"frame {i}") for i in range(6)])
+        chunks = frame_pool.map_chunks(lsb_engine.reveal, frames, workers=3, chunk_size=1)
+        assert [message for messages in chunks for message in messages] == [f"frame {i}" for i in range(6)]
+
+    def test_worker_errors_propagate(self):
+        frames = torch.zeros(4, 24, 32, 3, dtype=torch.uint8)
+        try:
+            frame_pool.map_chunks(lsb_engine.reveal, frames, workers=2)
+        except IndexError:
+            pass
+        else:
+            raise AssertionError("A failing chunk should raise in the caller")
+
+    def test_map_tasks_keeps_task_order(self):
+        assert frame_pool.map_tasks(pow, [(2, i) for i in range(6)], workers=3) == [2**i for i in range(6)]
+
+    def test_pool_is_reused_for_short_batches(self):
+        assert frame_pool.map_tasks(pow, [(2, i) for i in range(4)], workers=4) == [1, 2, 4, 8]
+        executor = worker_pool._executor
+        assert frame_pool.map_tasks(pow, [(3, i) for i in range(2)], workers=4) == [1, 3]
+        frames = torch.zeros(2, 24, 32, 3, dtype=torch.uint8)
+        frame_pool.map_frames(lsb_engine.hide, frames, "Hi", workers=4, chunk_size=1)
+        assert worker_pool._executor is executor
+
+    def test_workers_are_clamped_to_the_cores(self):
+        worker_pool.shutdown()
+        worker_pool.CPU_COUNT = 1
+        assert frame_pool.map_tasks(pow, [(2, i) for i in range(4)], workers=frame_pool.MAX_WORKERS) == [1, 2, 4, 8]
+        assert worker_pool._executor is None
+        worker_pool.CPU_COUNT = 3
+        frame_pool.map_tasks(pow, [(2, i) for i in range(4)], workers=frame_pool.MAX_WORKERS)
+        assert worker_pool._executor_workers == 3
+
+    def test_pool_only_grows(self):
+        worker_pool.shutdown()
+        frame_pool.map_tasks(pow, [(2, i) for i in range(4)], workers=4)
+        executor = worker_pool._executor
+        assert frame_pool.map_tasks(pow, [(2, i) for i in range(6)], workers=2) == [2**i for i in range(6)]
+        assert worker_pool._executor is executor
+        frame_pool.map_tasks(pow, [(2, i) for i in range(6)], workers=5)
+        assert worker_pool._executor is not executor and worker_pool._executor_workers == 5
+
+
+# Test suite for the LSB steganalysis statistics
+class TestSteganalysis:
+    def setup_method(self):
+        # Smooth gradients plus a little noise, random pixels have even value pairs by nature and would always look embedded
+        generator = torch.Generator().manual_seed(0)
+        y, x = torch.linspace(0, 1, 256)[:, None], torch.linspace(0, 1, 256)[None, :]
+        base = (120 + 80 * torch.sin(6 * x + 3 * y) + torch.randn(256, 256, generator=generator) * 6).clamp(0, 255)
+        self.frames = torch.stack([base, base.flip(0), base.flip(1)], dim=-1).to(torch.uint8)[None].repeat(3, 1, 1, 1)
+        samples = self.frames[0].numel()
+        for i, share in [(1, 0.3), (2, 1.0)]:
+            flat = self.frames[i].view(-1)[: int(samples * share)]
+            flat.copy_((flat & 0xFE) | torch.randint(0, 2, flat.shape, dtype=torch.uint8, generator=generator))
+
+    def test_chi_square(self):
+        probabilities = steganalysis.chi_square(self.frames)
+        assert probabilities.shape == (3, steganalysis.SEGMENTS)
+        estimate = steganalysis.payload_estimate(probabilities)
+        assert estimate[0] < 0.1 and 0.3 <= estimate[1] < 1 and estimate[2] == 1
+
+    def test_rs_analysis(self):
+        estimate = steganalysis.rs_analysis(self.frames)
+        assert estimate[0] < 0.1 and 0.2 < estimate[1] < 0.5 and estimate[2] > 0.8
+
+    def test_chunks_match_whole_batch(self):
+        steganalysis.CHUNK_PIXELS, chunk_pixels = 1, steganalysis.CHUNK_PIXELS  # one frame per chunk
+        try:
+            chunked = steganalysis.chi_square(self.frames), steganalysis.rs_analysis(self.frames)
+        finally:
+            steganalysis.CHUNK_PIXELS = chunk_pixels
+        assert torch.equal(chunked[0], steganalysis.chi_square(self.frames))
+        assert torch.equal(chunked[1], steganalysis.rs_analysis(self.frames))
+
+
+# Test suite for steganography.py
+class TestSteganography:
+    def test_lsb_encode_decode_batch(self):
+        images = torch.rand(3, 32, 48, 3, generator=torch.Generator().manual_seed(0))
+        for generator_type in ["None", "eratosthenes"]:
+            encoded = steganography.Stegano_LSB_Encode().encode_stego(images, "Hello World!", 1, 2, generator_type, "UTF-8")
+            decoded = steganography.Stegano_LSB_Decode().decode_stego(encoded[0], 1, 2, generator_type, "UTF-8")
+            assert decoded[0] == "Hello World!" * 3
+
+    def test_imwatermark_encode_decode_batch(self):
+        images = torch.rand(2, 256, 320, 3, generator=torch.Generator().manual_seed(0))
+        for algorithm in ["dwtDct", "dwtDctSvd"]:
+            encoded = steganography.IMWatermarkEncode().encode_imwatermark(images, "Hi!", algorithm, "bytes", "utf-8", "")
+            decoded = steganography.IMWatermarkDecode().decode_imwatermark(encoded[0], 3, algorithm, "bytes", "utf-8", "", workers=2)
+            assert decoded[0] == "Hi!" * 2
+
+    def test_capacity_planner(self):
+        images = torch.rand(2, 24, 32, 3, generator=torch.Generator().manual_seed(0))
+        planner = steganography.SteganoCapacityPlanner()
+        report, capacity, lsb_fits, watermark_bits, watermark_fits = planner.plan(
+            images, "Hello World!", 1, "eratosthenes", "UTF-8", "dwtDct", "bytes", "utf-8"
+        )
+        assert capacity == lsb_engine.max_message_bytes(135) and lsb_fits
+        assert watermark_bits == 96 and not watermark_fits  # 24x32 is below the 256x256 minimum
+        assert "frame 1" in report
+        assert not planner.plan(images, "x" * 60, 1, "eratosthenes", "UTF-32LE", "dwtDct", "bytes", "utf-8")[2]
+
+    def test_lsb_encode_decode_sharded(self):
+        images = torch.rand(3, 32, 48, 3, generator=torch.Generator().manual_seed(0))
+        message = "Hello World! " * 100
+        encoded = steganography.Stegano_LSB_Encode().encode_stego(images, message, 1, 2, "None", "UTF-8", payload_mode="shard")
+        decoded = steganography.Stegano_LSB_Decode().decode_stego(encoded[0], 1, 2, "None", "UTF-8", payload_mode="shard")
+        assert decoded[0] == message
+
+    def test_lsb_encode_fails_fast(self):
+        images = torch.rand(2, 24, 32, 3, generator=torch.Generator().manual_seed(0))
+        try:
+            steganography.Stegano_LSB_Encode().encode_stego(images, "x" * 1000, 1, 2, "eratosthenes", "UTF-8")
+        except ValueError as e:
+            assert "fits 47 bytes" in str(e)
+        else:
+            raise AssertionError("Oversized message should have been rejected")
+
+    def test_lsb_analysis_picks_encoded_frames(self):
+        generator = torch.Generator().manual_seed(0)
+        y, x = torch.linspace(0, 1, 64)[:, None], torch.linspace(0, 1, 96)[None, :]
+        base = (0.5 + 0.3 * torch.sin(4 * x + 2 * y) + torch.randn(64, 96, generator=generator) * 0.02).clamp(0, 1)
+        images = torch.stack([base, base.flip(0), base.flip(1)], dim=-1)[None].repeat(2, 1, 1, 1)
+        encoded = steganography.Stegano_LSB_Encode().encode_stego(images[1:], "Hello World! " * 150, 1, 2, "None", "UTF-8")[0]
+        report, chi_square, rs_estimate, candidates = steganography.SteganoLSBAnalysis().analyze(torch.cat([images[:1], encoded]), 0.2)
+        assert len(chi_square) == len(rs_estimate) == 2
+        assert len(candidates) == 1 and torch.equal(candidates[0], encoded)
+        # No candidates is an empty list, not an empty batch
+        assert steganography.SteganoLSBAnalysis().analyze(images, 0.2)[3] == []
+        assert "frame 1" in report and "(candidate)" in report
+
+    def test_lsb_sweep(self):
+        images = torch.rand(2, 32, 48, 3, generator=torch.Generator().manual_seed(0))
+        encoded = steganography.Stegano_LSB_Encode().encode_stego(images, "Hello World!", 1, 2, "triangular_numbers", "UTF-8")[0]
+        for workers in [1, 2]:
+            report, best = steganography.SteganoLSBSweep().sweep(encoded, "all", 1, 64, "all", 3, True, workers=workers)
+            assert best == "Hello World!"
+            assert "frame 1: 1 candidates" in report and "triangular_numbers (m=1, UTF-8)" in report
@@ -0,0 +1,83 @@
+import os
+import sys
+import subprocess
+import importlib.util
+
+PACKAGE_NAME = "arg_toolkit_loader_test"
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def load_package():
+    # Mirrors how ComfyUI imports a custom node folder.
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE_NAME, os.path.join(PACKAGE_ROOT, "__init__.py"), submodule_search_locations=[PACKAGE_ROOT]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE_NAME] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Test suite for the lazy node loader in __init__.py
+class TestLoader:
+    def setup_method(self):
+        self.package = load_package()
+
+    def test_manifest_is_up_to_date(self):
+        # Run `python __init__.py` to regenerate node_manifest.json when this fails.
+        assert self.package.load_manifest() == self.package.build_manifest()
+
+    def test_modules_are_imported_on_first_touch(self):
+        module_name = f"{PACKAGE_NAME}.src.morse_code"
+        sys.modules.pop(module_name, None)
+        node = self.package.NODE_CLASS_MAPPINGS["MorseCode"]
+        assert module_name not in sys.modules
+        assert node.FUNCTION == "MorseCode"
+        assert module_name in sys.modules
+
+    def test_lazy_node_forwards_to_real_class(self):
+        node = self.package.NODE_CLASS_MAPPINGS["Caesar"]
+        assert "key" in node.INPUT_TYPES()["required"]
+        instance = node()
+        assert isinstance(instance, node)
+        assert instance.caesar("Hello World", "ENGLISH", 3, True, False) == ("khoorzruog",)
+        assert not hasattr(node, "IS_CHANGED")
+        assert self.package.NODE_DISPLAY_NAME_MAPPINGS["Caesar"] == "Caesar (ROT) Cipher"
+
+    def test_caesar_does_not_import_torch(self):
+        # A fresh interpreter, this one has long imported torch for the other tests
+        script = "\n".join(
+            [
+                "import sys",
+                "sys.path.insert(0, sys.argv[1])",
+                "from test_loader import load_package",
+                "package = load_package()",
+                "node = package.NODE_CLASS_MAPPINGS['Caesar']",
+                "assert 'workers' in node.INPUT_TYPES()['optional']",
+                "assert node().run_list(text=['Hello'], alphabet=['ENGLISH'], key=[3], mode=[True], keep_formatting=[False]) == (['khoor'],)",
+                "print(sorted({'torch', 'cv2'} & set(sys.modules)))",
+            ]
+        )
+        result = subprocess.run([sys.executable, "-c", script, os.path.dirname(__file__)], capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+
+    def test_profile_imports(self):
+        manifest = {key: self.package.load_manifest()[key] for key in ("MorseCode", "BooleanOutputter")}
+        for module_name in ("src.morse_code", "src.debugging_nodes"):
+            sys.modules.pop(f"{PACKAGE_NAME}.{module_name}", None)
+        records = self.package.profile_imports(manifest)
+        assert [record["name"] for record in records if record["kind"] == "module"] == ["src.morse_code", "src.debugging_nodes"]
+        assert all(record["error"] is None for record in records)
+        report = self.package.import_report(records)
+        assert "src.morse_code" in report and "src.debugging_nodes" in report
+
+    def test_import_budget(self):
+        records = [{"kind": "module", "name": "src.ciphers", "importer": None, "seconds": 0.5, "memory_bytes": 0, "error": None}]
+        self.package.check_import_budget(records, 1000)
+        try:
+            self.package.check_import_budget(records, 100)
+        except RuntimeError as e:
+            assert "src.ciphers" in str(e)
+        else:
+            raise AssertionError("Budget check should have failed")